@@ -91,4 +91,67 @@ SPECTACULAR_SETTINGS = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-}
\ No newline at end of file
+}
+
+# Background dataset generation (see fundraising/jobs.py)
+GENERATION_WORKER_PROCESSES = int(os.environ.get('GENERATION_WORKER_PROCESSES', 2))
+GENERATION_POLL_INTERVAL = 2.0
+GENERATION_STALE_AFTER = 6 * 3600
+# Processes each job shards campaign rendering over (1 = in-process)
+GENERATION_SHARD_WORKERS = int(os.environ.get('GENERATION_SHARD_WORKERS', 1))
+# Stored chunk format, one of fundraising.generator.schema.OUTPUT_FORMATS:
+# csv, csv.gz, parquet
+DATASET_OUTPUT_FORMAT = os.environ.get('DATASET_OUTPUT_FORMAT', 'parquet')
+DATASET_CHUNK_ROWS = int(os.environ.get('DATASET_CHUNK_ROWS', 500_000))
+# Codec of Parquet chunks: zstd, gzip, snappy or none
+DATASET_PARQUET_COMPRESSION = os.environ.get('DATASET_PARQUET_COMPRESSION', 'zstd')
+# Save generator state after each run so the dataset can be extended
+DATASET_SNAPSHOTS = os.environ.get('DATASET_SNAPSHOTS', 'True') == 'True'
+# Also load every generated table into a fundraising_dataset_<id>_<table>
+# SQL table of DATASET_SQL_DATABASE (see fundraising/sql_sink.py)
+DATASET_SQL_SINK = os.environ.get('DATASET_SQL_SINK', 'False') == 'True'
+DATASET_SQL_DATABASE = os.environ.get('DATASET_SQL_DATABASE', 'default')
+
+# Admission control: generation requests whose estimate exceeds any of
+# these budgets are rejected (see fundraising/generator/estimator.py)
+GENERATION_MAX_ROWS = int(os.environ.get('GENERATION_MAX_ROWS', 50_000_000))
+GENERATION_MAX_BYTES = int(os.environ.get('GENERATION_MAX_BYTES', 2 * 1024 ** 3))
+GENERATION_MAX_SECONDS = int(os.environ.get('GENERATION_MAX_SECONDS', 3600))
+# Fair scheduling across users (see fundraising/scheduler.py). A user may
+# have GENERATION_USER_MAX_PENDING jobs queued or processing (more get a
+# 429) and GENERATION_USER_MAX_RUNNING of them processing at once.
+# Processing jobs together hold at most GENERATION_CPU_BUDGET cores (each
+# job takes GENERATION_SHARD_WORKERS) and GENERATION_MEMORY_BUDGET bytes of
+# estimated peak memory. Staff users get GENERATION_STAFF_WEIGHT times the
+# share of other users in the fair queue.
+GENERATION_USER_MAX_PENDING = int(os.environ.get('GENERATION_USER_MAX_PENDING', 4))
+GENERATION_USER_MAX_RUNNING = int(os.environ.get('GENERATION_USER_MAX_RUNNING', 1))
+GENERATION_CPU_BUDGET = int(os.environ.get('GENERATION_CPU_BUDGET', os.cpu_count() or 1))
+GENERATION_MEMORY_BUDGET = int(os.environ.get('GENERATION_MEMORY_BUDGET', 4 * 1024 ** 3))
+GENERATION_STAFF_WEIGHT = float(os.environ.get('GENERATION_STAFF_WEIGHT', 2.0))
+# Preview requests ("preview": true on /api/generate/) run in the web
+# process; scaled configs with more campaigns than this (a few ms each)
+# are refused
+PREVIEW_MAX_CAMPAIGNS = int(os.environ.get('PREVIEW_MAX_CAMPAIGNS', 300))
+
+# Content-addressed dataset cache (see fundraising/cache.py)
+DATASET_CACHE_ENABLED = os.environ.get('DATASET_CACHE_ENABLED', 'True') == 'True'
+DATASET_CACHE_MAX_BYTES = int(os.environ.get('DATASET_CACHE_MAX_BYTES', 5 * 1024 ** 3))
+
+# Allow unauthenticated scrapes of /api/metrics/
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'False') == 'True'
+
+# Structured per-run log lines from fundraising.jobs and the generate view
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'fundraising': {
+            'handlers': ['console'],
+            'level': os.environ.get('FUNDRAISING_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
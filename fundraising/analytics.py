@@ -0,0 +1,179 @@
+"""Server-side aggregates of a stored dataset.
+
+The transactions table is scanned chunk by chunk, reading only the columns
+the aggregates need (a column projection for Parquet chunks). Each chunk
+is reduced to additive partial sums per (campaign_id, year, payment method),
+and donors are kept as integer contact indices, merged into one sorted
+array per payment method as chunks arrive. Memory stays bounded by the
+number of campaigns and of distinct donors, not of rows. The result is
+cached on the dataset row; datasets are immutable once completed, so it
+never goes stale.
+"""
+import numpy as np
+import pandas as pd
+
+from .generator.contact_registry import decode_contact_ids
+from .generator.recurring import RECURRING
+from .models import GeneratedDataset
+from .storage import iter_table_frames
+
+# Bump when the computed aggregates change
+ANALYTICS_VERSION = 3
+SCAN_BATCH_ROWS = 500_000
+
+WIDE_CAMPAIGN_COLUMNS = ['campaign_name', 'channel', 'campaign_type', 'campaign_start', 'cost', 'reactivity']
+
+
+def dataset_analytics(dataset):
+    """Aggregates of a completed dataset, computed once and then cached"""
+    if dataset.analytics.get('version') == ANALYTICS_VERSION:
+        return dataset.analytics
+    analytics = {'version': ANALYTICS_VERSION, **compute_analytics(dataset.manifest)}
+    # Skip the write when the dataset was evicted in the meantime
+    GeneratedDataset.objects.filter(
+        id=dataset.id, status=GeneratedDataset.STATUS_COMPLETED
+    ).update(analytics=analytics)
+    return analytics
+
+
+def compute_analytics(manifest):
+    transactions_manifest = manifest['transactions']
+    compact = 'campaign_name' not in transactions_manifest['columns']
+    # Wide tables stored before campaign_id was added only have the campaign name
+    key = 'campaign_id' if 'campaign_id' in transactions_manifest['columns'] else 'campaign_name'
+    columns = ['date', key, 'donation_amount', 'payment_method', 'contact_id']
+    campaign_columns = [key] + [column for column in WIDE_CAMPAIGN_COLUMNS if column != key]
+    if not compact:
+        columns += campaign_columns[1:]
+
+    partials = []
+    # Sorted unique contact indices of the donors of each payment method
+    method_donors = {}
+    campaign_frames = []
+    for frame in iter_table_frames(transactions_manifest, columns=columns, batch_rows=SCAN_BATCH_ROWS):
+        if not len(frame):
+            continue
+        frame['year'] = _years(frame['date'])
+        partials.append(
+            frame.groupby([key, 'year', 'payment_method'], observed=True, sort=False)['donation_amount']
+            .agg(['sum', 'size'])
+        )
+        _merge_donors(method_donors, frame)
+        if not compact:
+            campaign_frames.append(frame.drop_duplicates(key)[campaign_columns].astype({'campaign_name': str}))
+
+    if not partials:
+        return _empty()
+    rollup = pd.concat(partials).groupby(level=[0, 1, 2], observed=True).sum().reset_index()
+    rollup = rollup.rename(columns={'sum': 'revenue', 'size': 'transactions'})
+    rollup['payment_method'] = rollup['payment_method'].astype(str)
+
+    if compact:
+        campaigns = _compact_campaigns(manifest)
+    else:
+        if key == 'campaign_name':
+            rollup[key] = rollup[key].astype(str)
+        campaigns = _wide_campaigns(pd.concat(campaign_frames).drop_duplicates(key), rollup, key)
+    rollup = rollup.merge(campaigns[[key, 'channel', 'campaign_type']], on=key, how='left')
+
+    donors = pd.Series({method: len(ids) for method, ids in method_donors.items()}, dtype=np.int64)
+    return {
+        'transactions': int(rollup['transactions'].sum()),
+        'revenue': _money(rollup['revenue'].sum()),
+        'donors': len(np.unique(np.concatenate(list(method_donors.values())))),
+        'revenue_by_channel_year': _records(
+            rollup.groupby(['channel', 'year'], sort=True)[['revenue', 'transactions']].sum().reset_index()
+        ),
+        'payment_methods': _records(
+            rollup.groupby('payment_method', sort=True)[['revenue', 'transactions']].sum()
+            .assign(donors=donors).reset_index()
+        ),
+        'campaigns': _campaign_records(campaigns, rollup, key),
+    }
+
+
+def _merge_donors(method_donors, frame):
+    ids = decode_contact_ids(frame['contact_id'].astype(str).to_numpy())
+    methods = frame['payment_method'].astype(str).to_numpy()
+    for method in np.unique(methods):
+        chunk_ids = np.unique(ids[methods == method])
+        known = method_donors.get(str(method))
+        method_donors[str(method)] = chunk_ids if known is None else np.union1d(known, chunk_ids)
+
+
+def _years(dates):
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.dt.year.to_numpy(dtype=np.int32)
+    # CSV chunks hold ISO date strings
+    return dates.astype(str).str[:4].astype(np.int32).to_numpy()
+
+
+def _compact_campaigns(manifest):
+    frames = list(iter_table_frames(manifest['campaigns']))
+    campaigns = pd.concat(frames, ignore_index=True)
+    campaigns['channel'] = campaigns['channel'].astype(str)
+    campaigns['campaign_type'] = campaigns['campaign_type'].astype(str)
+    return campaigns[['campaign_id', 'campaign_name', 'channel', 'campaign_type', 'campaign_start',
+                      'cost_per_reach', 'nb_reach', 'donors']]
+
+
+def _wide_campaigns(attributes, rollup, key):
+    """Campaign attributes of the wide schema; reach is recovered from reactivity"""
+    rows = rollup.groupby(key)['transactions'].sum()
+    campaigns = attributes.rename(columns={'cost': 'cost_per_reach'}).reset_index(drop=True)
+    campaigns['channel'] = campaigns['channel'].astype(str)
+    campaigns['campaign_type'] = campaigns['campaign_type'].astype(str)
+    campaign_rows = campaigns[key].map(rows).fillna(0)
+    # reactivity is nb_reach / max(1, rows)
+    campaigns['nb_reach'] = np.rint(campaigns['reactivity'].astype(float) * campaign_rows.clip(lower=1)).astype(np.int64)
+    # One row per donor, except recurring campaigns where every reached donor gives monthly
+    campaigns['donors'] = np.where(campaigns['campaign_type'] == RECURRING, campaigns['nb_reach'], campaign_rows)
+    return campaigns.drop(columns='reactivity')
+
+
+def _campaign_records(campaigns, rollup, key):
+    totals = rollup.groupby(key)[['revenue', 'transactions']].sum()
+    campaigns = campaigns.join(totals, on=key).fillna({'revenue': 0.0, 'transactions': 0})
+    cost = campaigns['cost_per_reach'].astype(float) * campaigns['nb_reach']
+    records = []
+    for row, campaign_cost in zip(campaigns.itertuples(index=False), cost):
+        reach = int(row.nb_reach)
+        donors = int(row.donors)
+        records.append({
+            'campaign_id': int(row.campaign_id) if key == 'campaign_id' else None,
+            'campaign_name': row.campaign_name,
+            'channel': row.channel,
+            'campaign_type': row.campaign_type,
+            'campaign_start': str(pd.Timestamp(row.campaign_start).date()),
+            'nb_reach': reach,
+            'donors': donors,
+            'transactions': int(row.transactions),
+            'revenue': _money(row.revenue),
+            'cost': _money(campaign_cost),
+            'roi': round((row.revenue - campaign_cost) / campaign_cost, 4) if campaign_cost else None,
+            # Share of the reached contacts who gave: the retention rate of a retention campaign
+            'response_rate': round(donors / reach, 4) if reach else None,
+        })
+    return sorted(records, key=lambda record: (record['campaign_start'], record['campaign_name']))
+
+
+def _records(frame):
+    records = frame.to_dict(orient='records')
+    for record in records:
+        for name, value in record.items():
+            if name == 'revenue':
+                record[name] = _money(value)
+            elif isinstance(value, (np.integer, np.floating)):
+                record[name] = value.item()
+    return records
+
+
+def _money(value):
+    return round(float(value), 2)
+
+
+def _empty():
+    return {
+        'transactions': 0, 'revenue': 0.0, 'donors': 0,
+        'revenue_by_channel_year': [], 'payment_methods': [], 'campaigns': [],
+    }
@@ -0,0 +1,166 @@
+"""Reference configs and runners for the benchmark_generator and
+check_startup commands.
+
+Kept free of Django imports so that each benchmark can run in a freshly
+spawned process, which gives every run its own peak RSS.
+"""
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from .generator.instrumentation import peak_rss_bytes
+
+
+def _channels(scale):
+    return {
+        'mail': {
+            'duration': 45,
+            'cost_per_reach': 0.8,
+            'payment': {'cheque': 0.6, 'card': 0.3, 'transfer': 0.1},
+            'campaigns': {
+                'prospecting': {'nb': 4, 'max_reach_contact': 50_000 * scale, 'transformation_rate': 0.02,
+                                'avg_donation': 40, 'std_deviation': 12},
+                'retention': {'nb': 8, 'transformation_rate': 0.12, 'avg_donation': 55, 'std_deviation': 15},
+            },
+        },
+        'phone': {
+            'duration': 20,
+            'cost_per_reach': 3,
+            'payment': {'card': 0.8, 'sepa': 0.2},
+            'campaigns': {
+                'prospecting': {'nb': 2, 'max_reach_contact': 20_000 * scale, 'transformation_rate': 0.05},
+                'retention': {'nb': 4, 'transformation_rate': 0.2},
+            },
+        },
+    }
+
+
+# Roughly 50k, 1M and 10M transaction rows
+REFERENCE_CONFIGS = {
+    'small': {'FIRST_YEAR': 2020, 'YEARS': 3, 'SEED': 1, 'CHANNELS': _channels(1)},
+    'medium': {'FIRST_YEAR': 2014, 'YEARS': 10, 'SEED': 1, 'CHANNELS': _channels(4)},
+    'large': {'FIRST_YEAR': 2014, 'YEARS': 10, 'SEED': 1, 'CHANNELS': _channels(44)},
+}
+
+BENCHMARK_FORMATS = ['none', 'csv', 'csv.gz', 'parquet']
+
+
+def environment():
+    import numpy
+    import pandas
+    return {
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_benchmark(name, config, workers=1, output_format='none', profiler=None, profile_path=None):
+    """Generate one config and return its measurements as a dict.
+
+    output_format 'none' encodes nothing and discards the chunks, which
+    leaves the export stage at the cost of the contact id encoding.
+    """
+    from .generator import FundraisingDataGenerator
+    from .generator.writers import open_table_writer
+
+    generator = FundraisingDataGenerator(config, workers=workers)
+    profile = _start_profiler(profiler)
+    start = time.perf_counter()
+    tables = ['transactions', 'contacts'] + (['campaigns'] if generator.schema == 'compact' else [])
+    with tempfile.TemporaryDirectory() as directory:
+        if output_format == 'none':
+            writers = [_NullTableWriter(table) for table in tables]
+        else:
+            writers = [
+                open_table_writer(os.path.join(directory, f'{table}.{output_format}'), output_format)
+                for table in tables
+            ]
+        transactions, contacts = generator.generate_to(*writers[:2], campaigns_writer=(writers[2:] or [None])[0])
+        output_bytes = sum(
+            os.path.getsize(os.path.join(directory, entry)) for entry in os.listdir(directory)
+        )
+    elapsed = time.perf_counter() - start
+    _stop_profiler(profiler, profile, profile_path)
+
+    return {
+        'name': name,
+        'workers': workers,
+        'format': output_format,
+        'schema': generator.schema,
+        'transactions': transactions,
+        'contacts': contacts,
+        'seconds': round(elapsed, 6),
+        'rows_per_second': round(transactions / elapsed, 1) if elapsed else 0.0,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'output_bytes': output_bytes,
+        'stages': generator.timer.as_dict(),
+    }
+
+
+# The data stack: web processes must not import it at startup
+HEAVY_MODULES = ('numpy', 'pandas', 'pyarrow', 'faker', 'scipy')
+
+
+def measure_startup(settings_module):
+    """Load the WSGI application and every view as a web worker does.
+
+    Meant to run in a fresh process. Returns the seconds it took, the
+    peak RSS of the process and the HEAVY_MODULES it imported.
+    """
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    start = time.perf_counter()
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import get_resolver
+
+    get_wsgi_application()
+    # Resolving the URLconf imports every view module
+    get_resolver().url_patterns
+    elapsed = time.perf_counter() - start
+    return {
+        'seconds': round(elapsed, 6),
+        'peak_rss_bytes': peak_rss_bytes(),
+        'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+class _NullTableWriter:
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+
+    def write(self, frame):
+        self.rows += len(frame)
+
+    def close(self):
+        pass
+
+
+def _start_profiler(profiler):
+    if profiler == 'cprofile':
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+    if profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+        profile = Profiler()
+        profile.start()
+        return profile
+    return None
+
+
+def _stop_profiler(profiler, profile, path):
+    if profile is None:
+        return
+    if profiler == 'cprofile':
+        profile.disable()
+        profile.dump_stats(path)
+    else:
+        profile.stop()
+        with open(path, 'w') as f:
+            f.write(profile.output_html())
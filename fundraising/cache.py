@@ -0,0 +1,193 @@
+"""Content-addressed cache of generated datasets.
+
+A dataset is keyed by a hash of its compiled config, seed included.
+Submitting the same config again returns the existing dataset instead of
+generating it a second time. Datasets stay owned by the user who
+submitted them: another user gets a clone, a dataset row of their own
+listing the same files. Completed datasets are evicted
+least-recently-used first once their files exceed DATASET_CACHE_MAX_BYTES.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import DatasetCacheStats, GeneratedDataset
+from .storage import delete_file, delete_manifest_files, manifest_files, manifest_files_exist
+
+# Bump when a generator change alters the output for a given config.
+CACHE_VERSION = 6
+
+REUSABLE_STATUSES = [
+    GeneratedDataset.STATUS_QUEUED,
+    GeneratedDataset.STATUS_PROCESSING,
+    GeneratedDataset.STATUS_COMPLETED,
+]
+
+
+def config_fingerprint(config_data):
+    """Hash a validated config, seed included, after compiling it.
+
+    Configs are compared as compiled specs (see generator/specs.py), so
+    spelled-out defaults, top-level key order and ignored keys do not
+    change the fingerprint. Channel, campaign and payment order do: they
+    change the generated data.
+    """
+    from .generator.specs import compile_config
+
+    payload = json.dumps([CACHE_VERSION, compile_config(config_data).key()], separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _stats():
+    stats, _ = DatasetCacheStats.objects.get_or_create(id=1)
+    return stats
+
+
+def _count(field, amount=1):
+    _stats()
+    DatasetCacheStats.objects.filter(id=1).update(**{field: F(field) + amount})
+
+
+def lookup(fingerprint, user, save_configuration):
+    """Return a reusable dataset of user for a fingerprint and record a hit or miss.
+
+    The user's own queued, processing or completed dataset is returned as
+    is. A dataset completed for another user is cloned into one owned by
+    user, whose configuration save_configuration creates; jobs still
+    pending for another user are not shared.
+    """
+    if not settings.DATASET_CACHE_ENABLED:
+        return None
+    datasets = GeneratedDataset.objects.filter(config_hash=fingerprint).order_by('-created_at')
+    dataset = (
+        datasets.filter(configuration__created_by=user, status__in=REUSABLE_STATUSES).first()
+        or datasets.filter(status=GeneratedDataset.STATUS_COMPLETED).first()
+    )
+    if dataset is not None and dataset.status == GeneratedDataset.STATUS_COMPLETED and not manifest_files_exist(dataset.manifest):
+        evict(dataset)
+        dataset = None
+
+    if dataset is None:
+        _count('misses')
+        return None
+
+    _count('hits')
+    GeneratedDataset.objects.filter(id=dataset.id).update(last_accessed_at=timezone.now())
+    if dataset.configuration.created_by_id != user.id:
+        dataset = clone(dataset, save_configuration())
+    return dataset
+
+
+def clone(dataset, configuration):
+    """Create a completed dataset of configuration sharing the files of dataset.
+
+    The clone joins the lineage of dataset, so eviction keeps the files,
+    snapshot and SQL tables while either of them lists them.
+    """
+    now = timezone.now()
+    return GeneratedDataset.objects.create(
+        configuration=configuration,
+        status=GeneratedDataset.STATUS_COMPLETED,
+        progress=100,
+        lineage=dataset.lineage or dataset.id,
+        manifest=dataset.manifest,
+        transactions_rows=dataset.transactions_rows,
+        contacts_rows=dataset.contacts_rows,
+        snapshot=dataset.snapshot,
+        sql_tables=dataset.sql_tables,
+        analytics=dataset.analytics,
+        # The generation metrics carry the seed an extension needs
+        metrics={**dataset.metrics, 'cloned_from': dataset.id},
+        config_hash=dataset.config_hash,
+        size_bytes=dataset.size_bytes,
+        started_at=now,
+        finished_at=now,
+        last_accessed_at=now,
+    )
+
+
+def evict(dataset):
+    """Delete a dataset's files and SQL tables and take it out of the cache.
+
+    Chunk files, snapshots and SQL tables still listed by another live
+    dataset of the same lineage (a parent, an extension or a clone) are
+    kept.
+    """
+    shared = shared_files(dataset)
+    delete_manifest_files(dataset.manifest, keep=shared)
+    if dataset.snapshot not in shared:
+        delete_file(dataset.snapshot)
+    sql_tables = set(dataset.sql_tables.values()) - shared
+    if sql_tables:
+        from .sql_sink import drop_sql_tables
+        drop_sql_tables(sql_tables)
+    GeneratedDataset.objects.filter(id=dataset.id).update(
+        status=GeneratedDataset.STATUS_EVICTED, config_hash='', size_bytes=0, manifest={}, snapshot='', sql_tables={},
+        analytics={},
+    )
+    _count('evictions')
+
+
+def shared_files(dataset):
+    """Chunk files, snapshots and SQL tables that other live datasets of the lineage of dataset need"""
+    root = dataset.lineage or dataset.id
+    others = (
+        GeneratedDataset.objects
+        .filter(Q(id=root) | Q(lineage=root))
+        .exclude(id=dataset.id)
+        .filter(status=GeneratedDataset.STATUS_COMPLETED)
+        .values_list('manifest', 'snapshot', 'sql_tables')
+    )
+    shared = set()
+    for manifest, snapshot, sql_tables in others:
+        shared |= manifest_files(manifest) | set(sql_tables.values())
+        if snapshot:
+            shared.add(snapshot)
+    return shared
+
+
+def enforce_budget(max_bytes=None, keep=None):
+    """Evict least recently used datasets until the cache fits the budget.
+
+    The dataset with id keep (typically the one just generated) is never
+    evicted.
+    """
+    max_bytes = settings.DATASET_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    completed = GeneratedDataset.objects.filter(status=GeneratedDataset.STATUS_COMPLETED)
+    total = completed.aggregate(total=Sum('size_bytes'))['total'] or 0
+    if total <= max_bytes:
+        return 0
+
+    evicted = 0
+    # Parents of pending extensions are still needed to resume from
+    candidates = completed.exclude(id=keep).exclude(
+        extensions__status__in=[GeneratedDataset.STATUS_QUEUED, GeneratedDataset.STATUS_PROCESSING]
+    ).annotate(
+        last_used=Coalesce('last_accessed_at', 'finished_at', 'created_at')
+    ).order_by('last_used', 'id')
+    for dataset in candidates.only('id', 'size_bytes', 'manifest', 'snapshot', 'sql_tables', 'lineage').iterator():
+        if total <= max_bytes:
+            break
+        total -= dataset.size_bytes
+        evict(dataset)
+        evicted += 1
+    return evicted
+
+
+def cache_stats():
+    stats = _stats()
+    completed = GeneratedDataset.objects.filter(status=GeneratedDataset.STATUS_COMPLETED)
+    lookups = stats.hits + stats.misses
+    return {
+        'hits': stats.hits,
+        'misses': stats.misses,
+        'evictions': stats.evictions,
+        'hit_rate': stats.hits / lookups if lookups else 0.0,
+        'entries': completed.count(),
+        'size_bytes': completed.aggregate(total=Sum('size_bytes'))['total'] or 0,
+        'max_bytes': settings.DATASET_CACHE_MAX_BYTES,
+    }
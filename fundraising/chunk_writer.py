@@ -0,0 +1,85 @@
+"""Chunk file writer of generated tables; see storage.py for the layout.
+
+Parquet chunks are compressed with DATASET_PARQUET_COMPRESSION (zstd by
+default) and keep the repeated text columns dictionary encoded. Every
+chunk's manifest entry records the min/max of STATS_COLUMNS, which lets
+filtered reads skip chunks without opening them.
+"""
+import hashlib
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from .generator.schema import OUTPUT_FORMATS
+from .generator.writers import TableWriter, arrow_table
+from .storage import chunk_rows, chunk_stats, parquet_compression, table_rows
+from .streaming import FILE_BLOCK_SIZE
+
+
+class ChunkedTableWriter(TableWriter):
+    """Write a table as chunk files on a storage backend"""
+
+    def __init__(self, prefix, output_format, storage=None, batch_rows=None, append_to=None, compression=None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        super().__init__(prefix, batch_rows=batch_rows or chunk_rows())
+        self.output_format = output_format
+        self.compression = compression or parquet_compression()
+        self.storage = storage or default_storage
+        self.chunks = []
+        self.columns = None
+        self.dtypes = None
+        self._arrow_schema = None
+        if append_to is not None:
+            # Continue an existing table: its chunks stay where they are
+            # and new ones are listed after them.
+            if append_to['format'] != output_format:
+                raise ValueError('Appended chunks must use the format of the table')
+            self.chunks = list(append_to['chunks'])
+            self.columns = append_to['columns'] or None
+            self.dtypes = append_to['dtypes'] or None
+            self.rows = table_rows(append_to)
+
+    def _write_frame(self, frame):
+        if self.columns is None:
+            self.columns = list(frame.columns)
+            self.dtypes = {column: str(dtype) for column, dtype in frame.dtypes.items()}
+
+        name = f'{self.path}/part-{len(self.chunks):05d}{OUTPUT_FORMATS[self.output_format]}'
+        with tempfile.TemporaryFile() as buffer:
+            self._encode(frame, buffer)
+            buffer.seek(0)
+            digest = hashlib.sha256()
+            for block in iter(lambda: buffer.read(FILE_BLOCK_SIZE), b''):
+                digest.update(block)
+            size = buffer.tell()
+            buffer.seek(0)
+            name = self.storage.save(name, File(buffer, name=name))
+
+        self.chunks.append({
+            'name': name, 'rows': len(frame), 'bytes': size, 'sha256': digest.hexdigest(), 'stats': chunk_stats(frame),
+        })
+
+    def _encode(self, frame, buffer):
+        header = not self.chunks
+        if self.output_format == 'parquet':
+            import pyarrow.parquet as pq
+
+            table = arrow_table(frame, self._arrow_schema)
+            if self._arrow_schema is None:
+                self._arrow_schema = table.schema
+            pq.write_table(table, buffer, compression=self.compression)
+        elif self.output_format == 'csv.gz':
+            frame.to_csv(buffer, index=False, header=header, mode='wb',
+                         compression={'method': 'gzip', 'mtime': 0})
+        else:
+            frame.to_csv(buffer, index=False, header=header, mode='wb')
+
+    def manifest(self):
+        return {
+            'format': self.output_format,
+            'columns': self.columns or [],
+            'dtypes': self.dtypes or {},
+            'chunks': self.chunks,
+        }
@@ -1,3 +1,13 @@
-from .generator import FundraisingDataGenerator
+"""Synthetic fundraising data generator.
 
-__all__ = ['FundraisingDataGenerator']
\ No newline at end of file
+FundraisingDataGenerator is imported on first access, so that importing a
+light submodule (schema, estimator) does not load pandas and Faker.
+"""
+__all__ = ['FundraisingDataGenerator']
+
+
+def __getattr__(name):
+    if name == 'FundraisingDataGenerator':
+        from .generator import FundraisingDataGenerator
+        return FundraisingDataGenerator
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,166 @@
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from .dates import response_lags, year_start
+from .recurring import RECURRING, expand_schedule
+
+# Campaign names are not unique (two campaigns of a channel and type may
+# start on the same day); campaign_id is.
+TRANSACTION_COLUMNS = [
+    'date', 'campaign_id', 'campaign_start', 'campaign_end', 'channel', 'campaign_name',
+    'campaign_type', 'donation_amount', 'payment_method', 'cost',
+    'reactivity', 'contact_id',
+]
+
+# SCHEMA: compact keeps campaign attributes in a campaigns table joined
+# on campaign_id instead of repeating them on every transaction.
+COMPACT_TRANSACTION_COLUMNS = ['date', 'campaign_id', 'donation_amount', 'payment_method', 'contact_id']
+CAMPAIGN_COLUMNS = [
+    'campaign_id', 'campaign_name', 'channel', 'campaign_type', 'campaign_start',
+    'campaign_end', 'cost_per_reach', 'nb_reach', 'donors', 'reactivity',
+]
+
+# One campaign whose contacts are already chosen; key identifies its shard.
+# Recurring plans carry the year's debit schedule of their donors (see
+# recurring.py) and have one row per debit instead of one per contact.
+CampaignPlan = namedtuple('CampaignPlan', [
+    'key', 'campaign_id', 'year', 'start_day', 'channel', 'campaign_type', 'nb_reach', 'contacts', 'schedule',
+], defaults=(None,))
+
+
+def campaign_name(plan):
+    return f"{plan.year}-{plan.start_day:03d}_{plan.channel}_{plan.campaign_type}"
+
+
+def campaign_start(plan):
+    return year_start(plan.year) + (plan.start_day - 1)
+
+
+def campaign_end(plan, channel):
+    if plan.campaign_type == RECURRING:
+        return year_start(plan.year + 1) - 1
+    return campaign_start(plan) + channel.duration
+
+
+def campaign_cost(plan, channel):
+    # Recurring debits are not solicited
+    return 0.0 if plan.campaign_type == RECURRING else channel.cost_per_reach
+
+
+def _constant(value, size, dtype=None):
+    """Single-category column: one byte per row instead of one string"""
+    return pd.Categorical.from_codes(np.zeros(size, dtype=np.int8), dtype=dtype or pd.CategoricalDtype([value]))
+
+
+@lru_cache(maxsize=1024)
+def _category_dtype(*categories):
+    # Building a dtype validates its categories, which costs more than
+    # the rows of a small campaign; channels and types repeat.
+    return pd.CategoricalDtype(list(categories))
+
+
+def concat_chunks(chunks, columns):
+    """Concatenate transaction chunks, keeping categorical columns categorical.
+
+    Chunks have their own categories (their channel, campaign name and
+    payment methods), which pd.concat would turn into object columns.
+    """
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    frame = pd.concat(chunks, ignore_index=True)
+    for column in frame.columns:
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype):
+            frame[column] = union_categoricals([chunk[column] for chunk in chunks])
+    return frame
+
+
+class CampaignEngine:
+    """Columnar generation of campaign transactions.
+
+    All per-donor draws of a campaign (dates, amounts, payment methods) are
+    made as NumPy arrays in one batch and returned as a DataFrame chunk.
+    Channels and campaigns are the compiled specs of specs.py.
+    """
+
+    def render(self, rng, plan, channel, campaign, schema='wide'):
+        """Build the transactions chunk of one planned campaign.
+
+        Both schemas make the same draws, so they hold the same data.
+        """
+        if plan.schedule is not None:
+            return self.render_recurring(plan, channel, campaign, schema)
+        contacts = plan.contacts
+        size = len(contacts)
+
+        dates = campaign_start(plan) + response_lags(rng, size, channel.duration, channel.response_half_life)
+
+        amounts = np.maximum(1, rng.normal(campaign.avg_donation, campaign.std_deviation, size=size))
+
+        payment = pd.Categorical.from_codes(
+            channel.payment.sample(rng, size), dtype=_category_dtype(*channel.payment.methods)
+        )
+        return self._frame(plan, channel, schema, dates, amounts, payment, contacts)
+
+    def render_recurring(self, plan, channel, recurring, schema='wide'):
+        """Build the chunk of a year's recurring debits, in date order"""
+        contacts, first, debits, day, methods, amounts = plan.schedule
+        donors, dates = expand_schedule(first, debits, day)
+        payment = pd.Categorical.from_codes(
+            methods[donors].astype(np.int8), dtype=_category_dtype(*recurring.payment.methods)
+        )
+        return self._frame(plan, channel, schema, dates, amounts[donors], payment, contacts[donors])
+
+    def _frame(self, plan, channel, schema, dates, amounts, payment, contacts):
+        size = len(contacts)
+        if schema == 'compact':
+            return pd.DataFrame({
+                'date': dates,
+                'campaign_id': np.full(size, plan.campaign_id, dtype=np.int32),
+                'donation_amount': amounts.astype(np.float32),
+                'payment_method': payment,
+                'contact_id': contacts,
+            }, columns=COMPACT_TRANSACTION_COLUMNS)
+
+        return pd.DataFrame({
+            'date': dates,
+            'campaign_id': np.full(size, plan.campaign_id, dtype=np.int32),
+            'campaign_start': np.full(size, campaign_start(plan)),
+            'campaign_end': np.full(size, campaign_end(plan, channel)),
+            'channel': _constant(plan.channel, size, _category_dtype(plan.channel)),
+            'campaign_name': _constant(campaign_name(plan), size),
+            'campaign_type': _constant(plan.campaign_type, size, _category_dtype(plan.campaign_type)),
+            'donation_amount': amounts,
+            'payment_method': payment,
+            'cost': campaign_cost(plan, channel),
+            'reactivity': plan.nb_reach / max(1, size),
+            'contact_id': contacts,
+        }, columns=TRANSACTION_COLUMNS)
+
+
+def campaign_record(plan, channel, rows):
+    """Row of the campaigns table for a rendered campaign of rows transactions"""
+    # Every reached recurring donor is debited at least once
+    donors = plan.nb_reach if plan.schedule is not None else rows
+    return (
+        plan.campaign_id, campaign_name(plan), plan.channel, plan.campaign_type, campaign_start(plan),
+        campaign_end(plan, channel), campaign_cost(plan, channel),
+        plan.nb_reach, donors, plan.nb_reach / max(1, rows),
+    )
+
+
+def campaigns_frame(records):
+    """Build the campaigns table from campaign_record tuples"""
+    frame = pd.DataFrame.from_records(records, columns=CAMPAIGN_COLUMNS)
+    return frame.astype({
+        'campaign_id': np.int32,
+        'channel': 'category',
+        'campaign_type': 'category',
+        'campaign_start': 'datetime64[s]',
+        'campaign_end': 'datetime64[s]',
+        'cost_per_reach': np.float32,
+        'nb_reach': np.int64,
+        'donors': np.int32,
+        'reactivity': np.float32,
+    })
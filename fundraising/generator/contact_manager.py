@@ -1,46 +1,70 @@
-import random
-import string
+import numpy as np
+from .contact_registry import ContactRegistry
+from .lifecycle import DonorLifecycle
 
 class ContactManager:
-    def __init__(self, channels):
-        self.existing_contacts = {channel: [] for channel in channels}
-        self.channels = channels
+    """Contact selection of every campaign; channels are ChannelSpecs (see specs.py)"""
 
-    def get_or_create_contacts(self, campaign_type, channel, randomness=1.0):
-        channel_info = self.channels.get(channel, {})
-        
-        if campaign_type == 'prospecting':
-            return self._handle_prospecting(channel, channel_info, randomness)
-        elif campaign_type == 'retention':
-            return self._handle_retention(channel, channel_info, randomness)
+    def __init__(self, channels, rng=None):
+        self.channels = {channel.name: channel for channel in channels}
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.registry = ContactRegistry(self.channels)
+        self.lifecycles = {name: DonorLifecycle(channel.lifecycle) for name, channel in self.channels.items()}
+
+    def start_year(self, year):
+        """Move every channel's donors through one year of their lifecycle"""
+        for lifecycle in self.lifecycles.values():
+            lifecycle.advance(self.rng, year)
+
+    def get_or_create_contacts(self, campaign, channel, randomness=1.0, year=0):
+        if campaign.campaign_type == 'prospecting':
+            return self._handle_prospecting(campaign, channel, randomness, year)
+        elif campaign.campaign_type == 'retention':
+            return self._handle_retention(campaign, channel, randomness)
         
-        return 0, 0, []
-    
-    def _generate_contact_ids(self, count):
-        return [
-            ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-            for _ in range(count)
-        ]
+        return 0, 0, np.empty(0, dtype=np.int64)
     
-    def _handle_prospecting(self, channel, channel_info, randomness):
-        campaign_info = channel_info.get('campaigns', {}).get('prospecting', {})
-        max_reach = campaign_info.get('max_reach_contact', 1000)
-        transformation_rate = campaign_info.get('transformation_rate', 0.1) * randomness
+    def _handle_prospecting(self, campaign, channel, randomness, year):
+        max_reach = campaign.max_reach_contact
+        transformation_rate = campaign.transformation_rate * randomness
         
         num_contacts = int(max_reach * transformation_rate)
-        new_contacts = self._generate_contact_ids(num_contacts)
-        self.existing_contacts[channel].extend(new_contacts)
+        new_contacts = self.registry.allocate(channel, num_contacts)
+        self.lifecycles[channel].add_cohort(self.registry.size - num_contacts, num_contacts, year)
         
         return max_reach, len(new_contacts), new_contacts
 
-    def _handle_retention(self, channel, channel_info, randomness):
-        campaign_info = channel_info.get('campaigns', {}).get('retention', {})
-        existing_contacts = self.existing_contacts.get(channel, [])
+    def _handle_retention(self, campaign, channel, randomness):
+        lifecycle = self.lifecycles[channel]
+        transformation_rate = campaign.transformation_rate * randomness
+        if campaign.cross_sell:
+            return self._handle_cross_sell(channel, lifecycle, campaign.cross_sell, transformation_rate)
         
-        if not existing_contacts:
-            return 0, 0, []
+        active = lifecycle.active
+        if not active:
+            return 0, 0, np.empty(0, dtype=np.int64)
             
-        transformation_rate = campaign_info.get('transformation_rate', 0.2) * randomness
-        num_contacts = int(len(existing_contacts) * transformation_rate)
+        num_contacts = int(active * transformation_rate)
+        
+        return active, num_contacts, lifecycle.sample(self.rng, num_contacts)
+
+    def _handle_cross_sell(self, channel, lifecycle, cross_sell, transformation_rate):
+        """Retention campaign also reaching donors of other channels.
+
+        cross_sell holds (source channel, fraction of its active donors
+        reached) pairs. Source donors who already gave on this channel are
+        always reached; donors who give here join the channel.
+        """
+        audience = [lifecycle.active_ids()]
+        for source, weight in cross_sell:
+            donors = self.lifecycles[source].active_ids()
+            joined = self.registry.on_channel(donors, channel)
+            new = donors[~joined]
+            audience += [donors[joined], new[self.rng.random(len(new)) < weight]]
+        audience = np.concatenate(audience)
+        
+        num_contacts = int(len(audience) * transformation_rate)
+        contacts = audience[self.rng.choice(len(audience), size=min(num_contacts, len(audience)), replace=False)]
+        self.registry.join(channel, contacts)
         
-        return len(existing_contacts), num_contacts, random.sample(existing_contacts, min(num_contacts, len(existing_contacts)))
\ No newline at end of file
+        return len(audience), num_contacts, contacts
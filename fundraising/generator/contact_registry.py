@@ -0,0 +1,87 @@
+import numpy as np
+from .schema import MAX_CHANNELS
+
+ID_ALPHABET = np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', dtype='S1')
+ID_LENGTH = 8
+ID_SPACE = len(ID_ALPHABET) ** ID_LENGTH
+
+# Affine bijection on [0, ID_SPACE): the multiplier is coprime with 36 so
+# distinct contact indices always map to distinct public IDs.
+_ID_MULTIPLIER = 1_853_020_188_851
+_ID_OFFSET = 1_679_616_571_393
+
+
+def _mulmod(values, factor):
+    # Split the factor so intermediate products fit in int64.
+    high, low = divmod(factor, 1 << 20)
+    return ((values * high % ID_SPACE) * (1 << 20) + values * low) % ID_SPACE
+
+
+def encode_contact_ids(indices):
+    """Encode dense contact indices as 8-character public IDs"""
+    values = np.asarray(indices, dtype=np.int64) % ID_SPACE
+    values = (_mulmod(values, _ID_MULTIPLIER) + _ID_OFFSET) % ID_SPACE
+    digits = np.empty((len(values), ID_LENGTH), dtype=np.int64)
+    for position in range(ID_LENGTH - 1, -1, -1):
+        values, digits[:, position] = np.divmod(values, len(ID_ALPHABET))
+    chars = ID_ALPHABET[digits]
+    return chars.view(f'S{ID_LENGTH}').ravel().astype(f'U{ID_LENGTH}').astype(object)
+
+
+def decode_contact_ids(contact_ids):
+    """Decode public IDs produced by encode_contact_ids back to indices"""
+    chars = np.asarray(contact_ids, dtype=f'S{ID_LENGTH}').view('S1').reshape(-1, ID_LENGTH)
+    lookup = np.zeros(256, dtype=np.int64)
+    lookup[ID_ALPHABET.view(np.uint8)] = np.arange(len(ID_ALPHABET))
+    digits = lookup[chars.view(np.uint8)]
+    values = np.zeros(len(digits), dtype=np.int64)
+    for position in range(ID_LENGTH):
+        values = values * len(ID_ALPHABET) + digits[:, position]
+    return _mulmod((values - _ID_OFFSET) % ID_SPACE, pow(_ID_MULTIPLIER, -1, ID_SPACE))
+
+
+def _membership_dtype(channels):
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if channels <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f'At most {MAX_CHANNELS} channels are supported')
+
+
+class ContactRegistry:
+    """Allocate unique contact indices and index their channels.
+
+    Contacts are dense int64 indices internally; they are only turned into
+    public string IDs by encode_contact_ids when data is exported.
+    membership[i] has the bit of every channel contact i has given on. The
+    contacts of a channel are tracked by its DonorLifecycle cohorts.
+    """
+
+    def __init__(self, channels=()):
+        self.size = 0
+        self.channel_bits = {channel: 1 << index for index, channel in enumerate(channels)}
+        self.membership = np.zeros(0, dtype=_membership_dtype(len(self.channel_bits)))
+
+    def reserve(self, size):
+        if size > len(self.membership):
+            grown = np.zeros(max(size, 2 * len(self.membership), 1024), dtype=self.membership.dtype)
+            grown[:self.size] = self.membership[:self.size]
+            self.membership = grown
+
+    def allocate(self, channel, count):
+        """Create count new contacts acquired on channel"""
+        ids = np.arange(self.size, self.size + count, dtype=np.int64)
+        self.reserve(self.size + count)
+        self.membership[self.size:self.size + count] = self.channel_bits[channel]
+        self.size += count
+        return ids
+
+    def join(self, channel, ids):
+        """Record that contacts ids gave on channel"""
+        self.membership[ids] |= self._bit(channel)
+
+    def on_channel(self, ids, channel):
+        """Boolean mask of the contacts in ids that have given on channel"""
+        return (self.membership[ids] & self._bit(channel)) != 0
+
+    def _bit(self, channel):
+        return self.membership.dtype.type(self.channel_bits[channel])
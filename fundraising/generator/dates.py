@@ -0,0 +1,59 @@
+"""Campaign calendars and response dates.
+
+A campaign's start day is drawn from a seasonal profile: twelve relative
+monthly giving intensities, spread over the actual days of the year (so
+leap years have a 29 February and a 31 December) and sampled by inverse
+CDF from a cumulative day table built once per profile and year length.
+
+Donors answer a campaign after a lag in days. By default the lag is
+uniform over the campaign duration; with a response half-life it follows
+an exponential decay truncated at the duration, so most gifts arrive in
+the first days after the appeal. Lags are drawn for a whole campaign at
+once and added to its start as datetime64 arrays.
+"""
+from functools import lru_cache
+import numpy as np
+from .schema import SEASONAL_PROFILES
+
+DEFAULT_SEASONALITY = 'flat'
+
+
+def seasonal_weights(seasonality=None):
+    """Monthly weights of a profile name or of a list of twelve weights"""
+    if seasonality is None:
+        seasonality = DEFAULT_SEASONALITY
+    if isinstance(seasonality, str):
+        return SEASONAL_PROFILES[seasonality]
+    return tuple(float(weight) for weight in seasonality)
+
+
+def year_start(year):
+    return np.datetime64(f'{year:04d}-01-01', 'D')
+
+
+@lru_cache(maxsize=64)
+def day_table(weights, year):
+    """Cumulative start-day probabilities of every day of year"""
+    months = np.arange(np.datetime64(f'{year:04d}-01'), np.datetime64(f'{year + 1:04d}-01'), dtype='datetime64[M]')
+    days_in_month = (months + 1).astype('datetime64[D]') - months.astype('datetime64[D]')
+    daily = np.repeat(np.asarray(weights, dtype=float), days_in_month.astype(np.int64))
+    cumulative = np.cumsum(daily) / daily.sum()
+    cumulative[-1] = 1.0
+    return cumulative
+
+
+def start_days(rng, year, seasonality=None, size=None):
+    """Draw 1-based days of year from a seasonal profile"""
+    table = day_table(seasonal_weights(seasonality), year)
+    return np.searchsorted(table, rng.random(size), side='right') + 1
+
+
+def response_lags(rng, size, duration, half_life=None):
+    """Days between a campaign's start and each donor's gift, in [0, duration]"""
+    if not half_life:
+        return rng.integers(0, duration + 1, size=size)
+    rate = np.log(2) / half_life
+    # Inverse CDF of the exponential truncated to [0, duration + 1)
+    mass = -np.expm1(-rate * (duration + 1))
+    lags = -np.log1p(-rng.random(size) * mass) / rate
+    return np.minimum(lags.astype(np.int64), duration)
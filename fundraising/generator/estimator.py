@@ -0,0 +1,174 @@
+"""Analytic size and runtime estimates for a generator config.
+
+The donor lifecycles are replayed with expected values (campaign
+randomness averages 1.0), which takes a few microseconds per channel and year
+instead of generating anything. Byte and time constants come from
+benchmark_generator runs on a single core and are meant for admission
+control and capacity planning, not as exact predictions.
+"""
+from .specs import compile_config
+
+# Bytes per (transaction, contact) row of each stored format
+BYTES_PER_ROW = {
+    'csv': (130, 136),
+    'csv.gz': (21, 56),
+    'parquet': (16, 45),
+}
+# Bytes per transaction row with SCHEMA: compact (the campaigns table is negligible)
+COMPACT_BYTES_PER_TRANSACTION = {'csv': 54, 'csv.gz': 16, 'parquet': 12}
+
+# Seconds per transaction for planning, rendering and aggregation
+GENERATION_SECONDS_PER_ROW = 1.4e-6
+# Seconds per contact profile, by PROFILE_MODE
+PROFILE_SECONDS_PER_CONTACT = {'pooled': 4.5e-6, 'faker': 1.3e-4}
+# Seconds per written row (transactions and contacts), by format
+EXPORT_SECONDS_PER_ROW = {'csv': 1.1e-5, 'csv.gz': 2.1e-5, 'parquet': 1.2e-6}
+# Faker pools, imports and writer setup
+FIXED_SECONDS = 0.5
+# Peak resident memory: imports and chunk buffers, plus the contact
+# registry, lifecycles and profiles that grow with the contacts
+BASE_MEMORY_BYTES = 300 * 2 ** 20
+MEMORY_BYTES_PER_CONTACT = 100
+
+
+def estimate_config(config, output_format='parquet', resumed_years=0):
+    """Predict rows, contacts, output bytes, peak memory and runtime of a validated config.
+
+    With resumed_years the estimate is that of an extension resuming a run
+    of that many years: transactions, contacts and campaigns count only
+    the new ones, while output bytes, memory and runtime also cover the
+    contacts table, which is rewritten with every contact.
+    """
+    spec = compile_config(config)
+    output_format = spec.output_format or output_format
+    estimates = {channel.name: _ChannelEstimate(channel) for channel in spec.channels}
+    resumed = {}
+    for year in range(spec.years):
+        if year == resumed_years:
+            resumed = {name: estimate.as_dict() for name, estimate in estimates.items()}
+        for estimate in estimates.values():
+            estimate.start_year()
+        for estimate in estimates.values():
+            estimate.run_year(estimates)
+    channels = {
+        name: {key: value - resumed.get(name, {}).get(key, 0) for key, value in estimate.as_dict().items()}
+        for name, estimate in estimates.items()
+    }
+
+    transactions = sum(channel['transactions'] for channel in channels.values())
+    contacts = sum(channel['contacts'] for channel in channels.values())
+    all_contacts = contacts + sum(channel['contacts'] for channel in resumed.values())
+    transaction_bytes, contact_bytes = BYTES_PER_ROW[output_format]
+    if spec.schema == 'compact':
+        transaction_bytes = COMPACT_BYTES_PER_TRANSACTION[output_format]
+    seconds = (
+        FIXED_SECONDS
+        + transactions * GENERATION_SECONDS_PER_ROW
+        + contacts * PROFILE_SECONDS_PER_CONTACT[spec.profile_mode]
+        + (transactions + all_contacts) * EXPORT_SECONDS_PER_ROW[output_format]
+    )
+    return {
+        'transactions': transactions,
+        'contacts': contacts,
+        'campaigns': sum(channel['campaigns'] for channel in channels.values()),
+        'output_format': output_format,
+        'output_bytes': transactions * transaction_bytes + all_contacts * contact_bytes,
+        'memory_bytes': BASE_MEMORY_BYTES + all_contacts * MEMORY_BYTES_PER_CONTACT,
+        'seconds': round(seconds, 1),
+        'channels': channels,
+    }
+
+
+class _ChannelEstimate:
+    """Expected donor lifecycle of one channel, replayed year by year"""
+
+    def __init__(self, channel):
+        self.campaigns = channel.campaigns
+        self.rates = channel.lifecycle
+        self.acquired = 0.0
+        self.new = 0.0
+        self.active = 0.0
+        self.lapsed = 0.0
+        # Donors of other channels who gave here, by source channel
+        self.joined = {}
+        self.survival = 0.0
+        self.transactions = 0.0
+        self.campaign_count = 0
+        self.recurring = channel.recurring
+        # Recurring donors still giving at the start of the year
+        self.recurring_live = 0.0
+
+    def start_year(self):
+        rates = self.rates
+        before = self.new + self.active
+        reactivated = self.lapsed * rates.reactivation_rate
+        self.active, self.lapsed = (
+            self.new * rates.first_year_retention + self.active * rates.repeat_retention + reactivated,
+            self.new * (1 - rates.first_year_retention) + self.active * (1 - rates.repeat_retention)
+            + (self.lapsed - reactivated) * (1 - rates.churn_rate),
+        )
+        self.new = 0.0
+        # Share of last year's active donors still active, for donors joined from it
+        self.survival = self.active / before if before else 0.0
+
+    def run_year(self, estimates):
+        for source in self.joined:
+            self.joined[source] *= estimates[source].survival
+        signups = 0.0
+        for campaign in self.campaigns:
+            nb = campaign.nb
+            if campaign.campaign_type == 'prospecting':
+                new_contacts = campaign.max_reach_contact * campaign.transformation_rate
+                self.new += nb * new_contacts
+                self.acquired += nb * new_contacts
+                self.transactions += nb * new_contacts
+                self.campaign_count += nb
+                if self.recurring:
+                    signups += nb * new_contacts * min(1.0, self.recurring.conversion_rate)
+            elif campaign.campaign_type == 'retention' and campaign.cross_sell:
+                self._cross_sell(campaign, nb, estimates)
+            elif campaign.campaign_type == 'retention' and self.active + self.new:
+                self.transactions += nb * (self.active + self.new) * min(1.0, campaign.transformation_rate)
+                self.campaign_count += nb
+
+        if self.recurring:
+            self._recurring_year(signups)
+
+    def _recurring_year(self, signups):
+        """Debits of the year; sign-ups have 0 to 11 debit months left in it"""
+        survival = 1 - self.recurring.attrition_rate
+        # A donor is debited a t-th time with probability survival ** t
+        debits = [survival ** t for t in range(13)]
+        within = [sum(debits[:months]) for months in range(12)]
+        year_debits = self.recurring_live * sum(debits[:12]) + signups / 12 * sum(within)
+        if year_debits:
+            self.transactions += year_debits
+            self.campaign_count += 1
+        self.recurring_live = self.recurring_live * debits[12] + signups / 12 * sum(debits[:12])
+
+    def _cross_sell(self, campaign, nb, estimates):
+        """nb retention campaigns that also reach donors of other channels.
+
+        Each campaign converts a fraction weight * rate of the source donors
+        who have not joined yet, so the not-joined share decays
+        geometrically and the nb campaigns are summed in closed form.
+        """
+        if not nb:
+            return
+        rate = min(1.0, campaign.transformation_rate)
+        reach = nb * (self.active + self.new)
+        for source, weight in campaign.cross_sell:
+            donors = estimates[source].active + estimates[source].new
+            joined = min(donors, self.joined.get(source, 0.0))
+            remaining = 1 - weight * rate
+            # Sum of remaining ** k over the nb campaigns
+            decay = nb if remaining == 1 else (1 - remaining ** nb) / (1 - remaining)
+            # Campaign k reaches donors - (donors - joined) * remaining ** k * (1 - weight)
+            reach += nb * donors - (donors - joined) * (1 - weight) * decay
+            self.joined[source] = donors - (donors - joined) * remaining ** nb
+        if reach:
+            self.transactions += reach * rate
+            self.campaign_count += nb
+
+    def as_dict(self):
+        return {'transactions': int(self.transactions), 'contacts': int(self.acquired), 'campaigns': self.campaign_count}
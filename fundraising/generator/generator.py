@@ -1,117 +1,270 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
-from faker import Faker
+from .campaign_engine import (
+    CampaignPlan, COMPACT_TRANSACTION_COLUMNS, TRANSACTION_COLUMNS, campaign_record, campaign_start, campaigns_frame,
+    concat_chunks,
+)
 from .contact_manager import ContactManager
+from .contact_registry import decode_contact_ids, encode_contact_ids
+from .dates import start_days
+from .instrumentation import StageTimer
+from .preview import PREVIEW_ROWS, preview_config
+from .parallel import bounded_map, generate_profiles, planner_rng, render_campaign, shard_executor
+from .profiles import ProfileGenerator, PROFILE_COLUMNS
+from .recurring import RECURRING, RecurringGiving
+from .specs import compile_config
+from .writers import ContactAggregator, CONTACT_AGGREGATE_COLUMNS
+
+CONTACT_COLUMNS = CONTACT_AGGREGATE_COLUMNS[:1] + PROFILE_COLUMNS + CONTACT_AGGREGATE_COLUMNS[1:]
 
 class FundraisingDataGenerator:
-    def __init__(self, config):
+    def __init__(self, config, workers=1):
         self.config = config
-        self.contact_manager = ContactManager(config.get('CHANNELS', {}))
-        self.faker = Faker(config.get('LOCALISATION', 'fr_FR'))
-        
-    def generate(self):
-        """Main method to generate fundraising data"""
-        transactions = []
-        current_year = self.config.get('FIRST_YEAR', 2014)
-        years = self.config.get('YEARS', 10)
+        # Planning and rendering read the compiled specs, not the YAML tree
+        self.spec = compile_config(config)
+        self.workers = workers
+        # Every random stream derives from one master seed; record a fresh
+        # one when the config has none so the run can be reproduced.
+        seed = self.spec.seed
+        self.seed = int(seed) if seed is not None else np.random.SeedSequence().entropy
+        self.rng = planner_rng(self.seed)
+        self.contact_manager = ContactManager(self.spec.channels, self.rng)
+        self.recurring = RecurringGiving(self.spec.channels)
+        self.profiles = ProfileGenerator(
+            self.spec.localisation,
+            salt=int(self.rng.integers(2 ** 32)),
+            mode=self.spec.profile_mode,
+        )
+        self.schema = self.spec.schema
+        self.transaction_columns = COMPACT_TRANSACTION_COLUMNS if self.schema == 'compact' else TRANSACTION_COLUMNS
+        self.timer = StageTimer()
+        # {channel: {campaign_type: {'campaigns': n, 'rows': n}}}
+        self.campaign_rows = {}
+        # Running contact aggregates, the number of years already generated
+        # and the contacts of those years; all are carried over by
+        # snapshots (see snapshot.py).
+        self.aggregator = ContactAggregator()
+        self.years_done = 0
+        self.campaigns_done = 0
+        self.contacts_done = 0
+        # Campaigns table rows of this run (see campaign_record)
+        self.campaign_records = []
+    
+    @classmethod
+    def resume(cls, config, snapshot_file, workers=1):
+        """Build a generator that continues a snapshotted run.
+
+        config must be the snapshotted run's config with a larger YEARS;
+        only the additional years are generated.
+        """
+        from .snapshot import load_snapshot
+        generator = cls(config, workers=workers)
+        load_snapshot(generator, snapshot_file)
+        return generator
+    
+    @classmethod
+    def preview(cls, config, rows=PREVIEW_ROWS):
+        """Build a generator for config scaled down to about rows transactions.
+
+        fraction holds the scale factor; see preview.py.
+        """
+        scaled, fraction = preview_config(config, rows)
+        generator = cls(scaled)
+        generator.fraction = fraction
+        return generator
         
-        # Generate transactions for each year
-        for year in range(years):
-            year_data = self._generate_year_data(current_year + year)
-            transactions.extend(year_data)
+    def generate(self, progress=None):
+        """Main method to generate fundraising data.
+
+        progress, if given, is called with the completed fraction (0-1) of
+        the transaction generation after each year.
+        """
+        chunks = []
+        with shard_executor(self.workers) as executor:
+            for chunk in self.iter_chunks(progress, executor):
+                with self.timer.stage('aggregation'):
+                    self.aggregator.update(chunk)
+                chunks.append(chunk)
+            contact_frames = list(self._iter_contacts(self.aggregator, executor))
         
         # Convert to DataFrame
-        transactions_df = pd.DataFrame(transactions)
+        transactions_df = concat_chunks(chunks, self.transaction_columns)
         
-        # Generate contacts based on transactions
-        contacts_df = self._generate_contacts(transactions_df)
+        # Contacts come from the running aggregates
+        if contact_frames:
+            contacts_df = pd.concat(contact_frames, ignore_index=True)
+        else:
+            contacts_df = pd.DataFrame(columns=CONTACT_COLUMNS)
+        
+        # Contacts are integer indices until export
+        with self.timer.stage('export'):
+            transactions_df['contact_id'] = encode_contact_ids(transactions_df['contact_id'])
         
         return transactions_df, contacts_df
     
-    def _generate_year_data(self, year):
-        transactions = []
-        
-        for channel_name, channel_info in self.config['CHANNELS'].items():
-            for campaign_type, campaign_config in channel_info.get('campaigns', {}).items():
-                num_campaigns = campaign_config.get('nb', 1)
-                
-                for _ in range(num_campaigns):
-                    campaign_data = self._generate_campaign(year, channel_name, channel_info, campaign_type, campaign_config)
-                    transactions.extend(campaign_data)
+    def campaigns_table(self):
+        """Campaigns generated by this run, the table joined on campaign_id"""
+        return campaigns_frame(self.campaign_records)
+    
+    def generate_to(self, transactions_writer, contacts_writer, progress=None, campaigns_writer=None,
+                    stored_contacts=None):
+        """Stream the dataset into table writers chunk by chunk.
+
+        Only the current chunk and the per-contact aggregates are held in
+        memory. The campaigns table is written when a writer is given for
+        it. A resumed generator may be given the stored contacts table of
+        the snapshotted run as stored_contacts, an iterable of frames: the
+        profiles of those contacts are copied instead of being generated
+        again. Returns the number of transactions and contacts written.
+        """
+        transactions_written = 0
+        contacts_written = 0
+        with shard_executor(self.workers) as executor:
+            for chunk in self.iter_chunks(progress, executor):
+                with self.timer.stage('aggregation'):
+                    self.aggregator.update(chunk)
+                with self.timer.stage('export'):
+                    chunk['contact_id'] = encode_contact_ids(chunk['contact_id'])
+                    transactions_writer.write(chunk)
+                transactions_written += len(chunk)
+            with self.timer.stage('export'):
+                # An appending writer already holds rows; only a new empty table needs a schema
+                if not transactions_written and not transactions_writer.rows:
+                    transactions_writer.write(pd.DataFrame(columns=self.transaction_columns))
+                transactions_writer.close()
+                if campaigns_writer is not None:
+                    if self.campaign_records or not campaigns_writer.rows:
+                        campaigns_writer.write(self.campaigns_table())
+                    campaigns_writer.close()
+            
+            for contacts_df in self._iter_contacts(self.aggregator, executor, stored_contacts):
+                with self.timer.stage('export'):
+                    contacts_writer.write(contacts_df)
+                contacts_written += len(contacts_df)
+        with self.timer.stage('export'):
+            if not contacts_written:
+                contacts_writer.write(pd.DataFrame(columns=CONTACT_COLUMNS))
+            contacts_writer.close()
         
-        return transactions
+        return transactions_written, contacts_written
     
-    def _generate_campaign(self, year, channel, channel_info, campaign_type, campaign_config):
-        # Generate campaign dates
-        start_day = random.randint(1, 365)
-        start_date = datetime(year, 1, 1) + timedelta(days=start_day)
-        end_date = start_date + timedelta(days=channel_info.get('duration', 30))
+    def iter_chunks(self, progress=None, executor=None):
+        """Yield one transactions DataFrame per generated campaign.
+
+        Campaigns are planned year by year in this process and rendered on
+        the executor (serially when none is given), in plan order. A
+        resumed generator starts after the years it has already done.
+        """
+        current_year = self.spec.first_year
+        years = self.spec.years
+        first = self.years_done
+        executor = executor or shard_executor(1)
         
+        for year in range(first, years):
+            with self.timer.stage('contact_selection'):
+                tasks = [
+                    (self.seed, plan, channel, campaign, self.schema)
+                    for plan, channel, campaign in self._plan_year(current_year + year)
+                ]
+            chunks = bounded_map(executor, render_campaign, tasks, self._window())
+            for task, chunk in self.timer.iter('campaign_generation', chunks):
+                self._count_rows(task[1], len(chunk))
+                self.campaign_records.append(campaign_record(task[1], task[2], len(chunk)))
+                yield chunk
+            self.years_done = year + 1
+            if progress:
+                progress((year + 1 - first) / (years - first))
+    
+    def _plan_year(self, year):
+        """Yield (plan, channel spec, campaign spec) for every campaign of a year, in config order"""
+        self.contact_manager.start_year(year)
+        for channel in self.spec.channels:
+            for campaign in channel.campaigns:
+                days = start_days(self.rng, year, campaign.seasonality, size=campaign.nb)
+                
+                for number, start_day in enumerate(days.tolist()):
+                    plan = self._plan_campaign(
+                        (year, channel.index, campaign.index, number), year, start_day, channel, campaign
+                    )
+                    if plan is not None:
+                        yield plan, channel, campaign
+        yield from self._plan_recurring(year)
+    
+    def _plan_recurring(self, year):
+        """One campaign per channel holding the year's recurring debits"""
+        for name, schedule in self.recurring.schedules(year):
+            channel = self.spec.channel(name)
+            self.campaigns_done += 1
+            plan = CampaignPlan(
+                # Keyed after the channel's campaign types
+                (year, channel.index, len(channel.campaigns), 0), self.campaigns_done - 1, year, 1, name, RECURRING,
+                len(schedule[0]), schedule[0], schedule,
+            )
+            yield plan, channel, channel.recurring
+    
+    def _plan_campaign(self, key, year, start_day, channel, campaign):
         # Get contacts
-        randomness = random.uniform(0.85, 1.15)
+        randomness = self.rng.uniform(0.85, 1.15)
         nb_reach, nb_sent, contacts = self.contact_manager.get_or_create_contacts(
-            campaign_type, channel, randomness
+            campaign, channel.name, randomness, year
         )
         
-        if not contacts:
-            return []
-            
-        # Generate transactions
-        transactions = []
-        avg_donation = campaign_config.get('avg_donation', 50)
-        std_deviation = campaign_config.get('std_deviation', 10)
-        
-        for contact_id in contacts:
-            transaction = {
-                'date': self._generate_transaction_date(start_date, end_date),
-                'campaign_start': start_date,
-                'campaign_end': end_date,
-                'channel': channel,
-                'campaign_name': f"{year}-{start_day:03d}_{channel}_{campaign_type}",
-                'campaign_type': campaign_type,
-                'donation_amount': max(1, random.gauss(avg_donation, std_deviation)),
-                'payment_method': self._select_payment_method(channel_info),
-                'cost': channel_info.get('cost_per_reach', 1),
-                'reactivity': nb_reach / max(1, nb_sent),
-                'contact_id': contact_id
-            }
-            transactions.append(transaction)
+        if not len(contacts):
+            return None
         
-        return transactions
+        self.campaigns_done += 1
+        plan = CampaignPlan(
+            key, self.campaigns_done - 1, year, start_day, channel.name, campaign.campaign_type, nb_reach, contacts
+        )
+        if campaign.campaign_type == 'prospecting':
+            self.recurring.enroll(self.rng, channel.name, contacts, campaign_start(plan))
+        return plan
     
-    def _generate_transaction_date(self, start_date, end_date):
-        delta = end_date - start_date
-        random_days = random.randint(0, delta.days)
-        return start_date + timedelta(days=random_days)
+    def metrics(self):
+        """Stage timings, memory high-water marks and row counts of the run so far"""
+        return {
+            'seed': self.seed,
+            'workers': self.workers,
+            'stages': self.timer.as_dict(),
+            'stage_peak_rss_bytes': dict(self.timer.peak_rss),
+            'peak_rss_bytes': self.timer.peak_rss_bytes(),
+            'campaigns': self.campaign_rows,
+        }
     
-    def _select_payment_method(self, channel_info):
-        payment_methods = channel_info.get('payment', {'card': 1.0})
-        methods, weights = zip(*payment_methods.items())
-        return random.choices(methods, weights=weights)[0]
+    def _count_rows(self, plan, rows):
+        counts = self.campaign_rows.setdefault(plan.channel, {}).setdefault(
+            plan.campaign_type, {'campaigns': 0, 'rows': 0}
+        )
+        counts['campaigns'] += 1
+        counts['rows'] += rows
     
-    def _generate_contacts(self, transactions_df):
-        # Group by contact_id to get unique contacts
-        unique_contacts = transactions_df.groupby('contact_id').agg({
-            'donation_amount': ['mean', 'count'],
-            'date': 'min'
-        }).reset_index()
-        
-        contacts_data = []
-        
-        for _, row in unique_contacts.iterrows():
-            contact = {
-                'contact_id': row['contact_id'],
-                'first_name': self.faker.first_name(),
-                'last_name': self.faker.last_name(),
-                'email': self.faker.email(),
-                'phone': self.faker.phone_number(),
-                'address': self.faker.address(),
-                'creation_date': row['date']['min'],
-                'avg_donation': row['donation_amount']['mean'],
-                'total_transactions': row['donation_amount']['count']
-            }
-            contacts_data.append(contact)
-        
-        return pd.DataFrame(contacts_data)
\ No newline at end of file
+    def _window(self):
+        # Two tasks per worker keep every worker busy while bounding the
+        # results waiting in the parent
+        return 2 * max(1, self.workers)
+    
+    def _iter_contacts(self, aggregator, executor, stored=None):
+        """Yield contact frames with profiles, built from the aggregates.
+
+        Contacts of the snapshotted years take their profiles from the
+        stored frames when given; only later contacts, whose ids all come
+        after them, are profiled. Aggregate frames are built as profile
+        batches are submitted, so the time spent building them counts as
+        contact_profiling.
+        """
+        start = 0
+        if stored is not None:
+            for frame in self.timer.iter('contact_profiling', stored):
+                ids = decode_contact_ids(frame['contact_id'])
+                yield self._contacts_frame(aggregator.frame(ids), frame[PROFILE_COLUMNS])
+            start = self.contacts_done
+        profiles = bounded_map(
+            executor, generate_profiles, aggregator.iter_frames(start=start), self._window(),
+            task=lambda frame: (self.profiles, frame['contact_id'].to_numpy()),
+        )
+        for contacts_df, profiles_df in self.timer.iter('contact_profiling', profiles):
+            yield self._contacts_frame(contacts_df, profiles_df)
+
+    def _contacts_frame(self, contacts_df, profiles_df):
+        contacts_df['contact_id'] = encode_contact_ids(contacts_df['contact_id'])
+        return pd.concat([contacts_df[['contact_id']], profiles_df, contacts_df.drop(columns='contact_id')], axis=1)
@@ -0,0 +1,75 @@
+"""Cheap per-stage wall clock and memory instrumentation"""
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+STAGES = ['contact_selection', 'campaign_generation', 'aggregation', 'contact_profiling', 'export']
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+class StageTimer:
+    """Accumulate wall clock seconds per named stage.
+
+    Stages may be entered many times (once per campaign or chunk); the
+    durations add up. Time spent inside a nested stage is not subtracted
+    from the outer one, so stages should not be nested. The resident set
+    size is sampled whenever a stage ends, giving a per-stage high-water
+    mark that is not inherited from earlier jobs of the same process.
+    """
+
+    def __init__(self, stages=STAGES):
+        self.seconds = dict.fromkeys(stages, 0.0)
+        self.peak_rss = dict.fromkeys(stages, 0)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.peak_rss[name] = max(self.peak_rss.get(name, 0), current_rss_bytes())
+
+    def iter(self, name, iterable):
+        """Yield from iterable, charging the time spent producing each item to name"""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                return
+            self.add(name, time.perf_counter() - start)
+            yield item
+
+    def as_dict(self):
+        return {name: round(seconds, 6) for name, seconds in self.seconds.items()}
+
+    def peak_rss_bytes(self):
+        return max(self.peak_rss.values(), default=0)
+
+
+def current_rss_bytes():
+    """Resident set size of this process, or its peak where unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    """High-water mark of this process's resident set size"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
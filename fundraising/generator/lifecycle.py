@@ -0,0 +1,75 @@
+"""Donor lifecycle of a channel, tracked per acquisition cohort.
+
+Every prospecting campaign acquires a contiguous range of contact indices,
+which becomes one cohort. Within a cohort donors are ranked by loyalty
+(their offset in the range): the first `active` are active, the next
+`lapsed` are lapsed and the rest have churned. So a cohort is a single row
+of integers whatever its size, and retention campaigns draw their donors
+from the active ranges without a per-contact pool.
+
+Once a year, before its campaigns are planned, every cohort moves:
+active donors stay active with the cohort's retention probability (lower
+in the year after acquisition) and lapse otherwise; lapsed donors are
+reactivated or churn. Fully churned cohorts are dropped.
+"""
+import numpy as np
+
+# Cohort array rows
+START, SIZE, YEAR, ACTIVE, LAPSED = range(5)
+
+
+class DonorLifecycle:
+    """Active, lapsed and churned counts of every live cohort of a channel.
+
+    rates is the channel's LifecycleSpec (see specs.py).
+    """
+
+    def __init__(self, rates):
+        self.rates = rates
+        self.cohorts = np.empty((5, 0), dtype=np.int64)
+
+    @property
+    def active(self):
+        return int(self.cohorts[ACTIVE].sum())
+
+    @property
+    def lapsed(self):
+        return int(self.cohorts[LAPSED].sum())
+
+    def add_cohort(self, start, size, year):
+        """Register size contacts acquired in year, all active"""
+        if size:
+            cohort = np.array([[start], [size], [year], [size], [0]], dtype=np.int64)
+            self.cohorts = np.concatenate([self.cohorts, cohort], axis=1)
+
+    def advance(self, rng, year):
+        """Apply the yearly transitions to cohorts acquired before year"""
+        cohorts = self.cohorts
+        old = cohorts[YEAR] < year
+        if not old.any():
+            return
+        active, lapsed = cohorts[ACTIVE][old], cohorts[LAPSED][old]
+        retention = np.where(
+            year - cohorts[YEAR][old] == 1, self.rates.first_year_retention, self.rates.repeat_retention
+        )
+        retained = rng.binomial(active, retention)
+        reactivated = rng.binomial(lapsed, self.rates.reactivation_rate)
+        churned = rng.binomial(lapsed - reactivated, self.rates.churn_rate)
+        cohorts[ACTIVE][old] = retained + reactivated
+        cohorts[LAPSED][old] = active - retained + lapsed - reactivated - churned
+        self.cohorts = cohorts[:, (cohorts[ACTIVE] + cohorts[LAPSED]) > 0]
+
+    def active_ids(self):
+        """Contact indices of every active donor, cohort by cohort"""
+        active = self.cohorts[ACTIVE]
+        offsets = np.repeat(self.cohorts[START] - (np.cumsum(active) - active), active)
+        return offsets + np.arange(len(offsets), dtype=np.int64)
+
+    def sample(self, rng, count):
+        """Draw count distinct active donors across cohorts in one batch"""
+        active = self.cohorts[ACTIVE]
+        ends = np.cumsum(active)
+        total = int(ends[-1]) if len(ends) else 0
+        positions = rng.choice(total, size=min(count, total), replace=False)
+        cohort = np.searchsorted(ends, positions, side='right')
+        return self.cohorts[START][cohort] + positions - (ends[cohort] - active[cohort])
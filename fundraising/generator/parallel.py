@@ -0,0 +1,82 @@
+"""Sharded execution of the generator.
+
+The parent process plans every campaign (contact selection mutates the
+shared donor lifecycles, so it runs serially in canonical config
+order). Rendering the rows of a planned campaign is independent work: each
+shard draws from its own Generator seeded with
+SeedSequence(seed, spawn_key=shard key), so the output is identical
+whatever the number of workers.
+"""
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import numpy as np
+from .campaign_engine import CampaignEngine
+
+PLANNER_STREAM = 0
+SHARD_STREAM = 1
+
+_engine = CampaignEngine()
+
+
+def planner_rng(seed):
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(PLANNER_STREAM,)))
+
+
+def shard_rng(seed, key):
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(SHARD_STREAM,) + tuple(key)))
+
+
+def render_campaign(task):
+    """Render one planned campaign; task is (seed, plan, channel spec, campaign spec, schema)"""
+    seed, plan, channel, campaign, schema = task
+    return _engine.render(shard_rng(seed, plan.key), plan, channel, campaign, schema)
+
+
+def generate_profiles(task):
+    """Build profile columns for one batch; task is (profile_generator, contact_ids)"""
+    profiles, contact_ids = task
+    return profiles.generate(contact_ids)
+
+
+class SerialExecutor:
+    """In-process stand-in for ProcessPoolExecutor"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def bounded_map(executor, fn, items, window, task=None):
+    """Yield (item, fn(task(item))) for every item, in order.
+
+    Unlike executor.map, which submits every task up front, at most window
+    tasks are in flight: items are drawn lazily and only window results
+    wait to be consumed. task defaults to passing the item itself.
+    """
+    pending = deque()
+    try:
+        for item in items:
+            if len(pending) >= window:
+                done, future = pending.popleft()
+                yield done, future.result()
+            pending.append((item, executor.submit(fn, task(item) if task else item)))
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def shard_executor(workers):
+    """Return an executor running shards on workers processes"""
+    if workers <= 1:
+        return SerialExecutor()
+    return ProcessPoolExecutor(workers)
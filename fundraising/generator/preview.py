@@ -0,0 +1,158 @@
+"""Scaled-down preview runs of a config.
+
+A preview shrinks every channel's acquisition (prospecting reach, and
+prospecting nb when campaigns would bring too few donors each) by the
+factor that brings the estimated transactions down to a few thousand.
+Other campaigns are merged down to PREVIEW_RETENTION_CAMPAIGNS per channel
+and year, with their transformation rate raised (up to 1) so they bring
+the same expected donations: a campaign costs the same to plan whatever
+its size. Lifecycle and cross-sell rates, payment mixes and amount
+distributions are untouched and pools scale with acquisition, so the
+preview has the shape of the full data at a fraction of its size.
+"""
+import copy
+import time
+
+import numpy as np
+
+from .campaign_engine import concat_chunks
+from .estimator import estimate_config
+from .specs import CAMPAIGN_DEFAULTS, UNKNOWN_CAMPAIGN_DEFAULTS
+
+PREVIEW_ROWS = 5000
+# Prospecting campaigns are merged rather than left with fewer donors
+MIN_PROSPECTING_DONORS = 20
+# Retention (and other non-prospecting) campaigns per channel and year
+PREVIEW_RETENTION_CAMPAIGNS = 2
+QUANTILES = {'p10': 0.1, 'p25': 0.25, 'median': 0.5, 'p75': 0.75, 'p90': 0.9}
+
+
+def preview_config(config, rows=PREVIEW_ROWS):
+    """Return a copy of config scaled to about rows transactions and the scale factor"""
+    full = estimate_config(config)['transactions']
+    fraction = min(1.0, rows / full) if full else 1.0
+    scaled = copy.deepcopy(config)
+    # The summary is computed from the wide columns
+    scaled['SCHEMA'] = 'wide'
+    for channel_info in scaled.get('CHANNELS', {}).values():
+        for campaign_type, campaign in channel_info.get('campaigns', {}).items():
+            if campaign_type != 'prospecting' and isinstance(campaign, dict):
+                _merge_campaigns(campaign_type, campaign)
+        prospecting = channel_info.get('campaigns', {}).get('prospecting')
+        if not isinstance(prospecting, dict):
+            continue
+        values = {**CAMPAIGN_DEFAULTS['prospecting'], **prospecting}
+        nb = values['nb']
+        reach = values['max_reach_contact'] * nb * fraction
+        donors = reach * values['transformation_rate']
+        scaled_nb = max(1, min(nb, int(donors / MIN_PROSPECTING_DONORS)))
+        prospecting['nb'] = scaled_nb
+        prospecting['max_reach_contact'] = max(1, round(reach / scaled_nb))
+    return scaled, fraction
+
+
+def _merge_campaigns(campaign_type, campaign):
+    values = {**CAMPAIGN_DEFAULTS.get(campaign_type, UNKNOWN_CAMPAIGN_DEFAULTS), **campaign}
+    nb = values['nb']
+    if nb <= PREVIEW_RETENTION_CAMPAIGNS:
+        return
+    campaign['nb'] = PREVIEW_RETENTION_CAMPAIGNS
+    campaign['transformation_rate'] = min(1.0, values['transformation_rate'] * nb / PREVIEW_RETENTION_CAMPAIGNS)
+
+
+def run_preview(config, rows=PREVIEW_ROWS, max_campaigns=None):
+    """Generate a preview of config and return its summary statistics.
+
+    Raises ValueError when the scaled config still has more than
+    max_campaigns campaigns, whose fixed cost would dominate.
+    """
+    from .generator import FundraisingDataGenerator
+
+    start = time.perf_counter()
+    generator = FundraisingDataGenerator.preview(config, rows)
+    campaigns = estimate_config(generator.config)['campaigns']
+    if max_campaigns is not None and campaigns > max_campaigns:
+        raise ValueError(f'{campaigns:,} campaigns are too many for a preview (limit {max_campaigns:,})')
+    chunks = list(generator.iter_chunks())
+    transactions = concat_chunks(chunks, generator.transaction_columns)
+    summary = summarize(transactions)
+    estimate = estimate_config(config)
+    return {
+        'seed': generator.seed,
+        'fraction': round(generator.fraction, 6),
+        'estimate': {key: estimate[key] for key in ('transactions', 'contacts', 'campaigns')},
+        **summary,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def summarize(transactions):
+    """Distribution, mix and retention statistics of a wide transactions frame"""
+    amounts = transactions['donation_amount'].astype(float)
+    rows = len(transactions)
+    return {
+        'transactions': rows,
+        'contacts': int(transactions['contact_id'].nunique()),
+        'campaigns': int(transactions['campaign_id'].nunique()),
+        'donation_amount': _distribution(amounts),
+        'payment_methods': _shares(transactions['payment_method']),
+        'channels': _groups(transactions, 'channel'),
+        'campaign_types': _groups(transactions, 'campaign_type'),
+        'years': _years(transactions),
+    }
+
+
+def _distribution(values):
+    if not len(values):
+        return {}
+    quantiles = values.quantile(list(QUANTILES.values())).to_numpy()
+    return {
+        'mean': round(float(values.mean()), 2),
+        'std': round(float(values.std(ddof=0)), 2),
+        'min': round(float(values.min()), 2),
+        **{name: round(float(value), 2) for name, value in zip(QUANTILES, quantiles)},
+        'max': round(float(values.max()), 2),
+    }
+
+
+def _shares(column):
+    counts = column.astype(str).value_counts()
+    total = int(counts.sum())
+    return {key: round(int(count) / total, 4) for key, count in counts.sort_index().items()}
+
+
+def _groups(transactions, column):
+    groups = {}
+    rows = len(transactions)
+    for key, group in transactions.groupby(transactions[column].astype(str), sort=True):
+        groups[key] = {
+            'transactions': len(group),
+            'share': round(len(group) / rows, 4),
+            'donors': int(group['contact_id'].nunique()),
+            'mean_amount': round(float(group['donation_amount'].astype(float).mean()), 2),
+        }
+    return groups
+
+
+def _years(transactions):
+    """Donors per year and the share of the previous year's donors who gave again"""
+    if not len(transactions):
+        return {}
+    years = transactions['date'].dt.year.to_numpy()
+    contacts = transactions['contact_id'].to_numpy(dtype=np.int64)
+    pairs = np.unique(np.stack([years, contacts], axis=1), axis=0)
+    donors = {}
+    for year in np.unique(years):
+        donors[int(year)] = pairs[pairs[:, 0] == year, 1]
+    summary = {}
+    for year, year_donors in donors.items():
+        mask = years == year
+        summary[str(year)] = {
+            'transactions': int(mask.sum()),
+            'donors': len(year_donors),
+            'amount': round(float(transactions['donation_amount'].to_numpy()[mask].astype(float).sum()), 2),
+        }
+        previous = donors.get(year - 1)
+        if previous is not None and len(previous):
+            summary[str(year)]['retention'] = round(len(np.intersect1d(previous, year_donors)) / len(previous), 4)
+    return summary
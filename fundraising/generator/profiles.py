@@ -0,0 +1,130 @@
+import re
+import unicodedata
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+PROFILE_COLUMNS = ['first_name', 'last_name', 'email', 'phone', 'address']
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix(contact_ids, salt):
+    """SplitMix64 finalizer: a stable pseudo-random uint64 per contact"""
+    with np.errstate(over='ignore'):
+        z = np.asarray(contact_ids).astype(np.uint64) + np.uint64(salt) * _GOLDEN
+        z = (z ^ (z >> np.uint64(30))) * _MIX_1
+        z = (z ^ (z >> np.uint64(27))) * _MIX_2
+    return z ^ (z >> np.uint64(31))
+
+
+def _slug(value):
+    ascii_value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '', ascii_value.lower()) or 'contact'
+
+
+class ProfilePools:
+    """Per-locale value pools drawn once from Faker"""
+
+    def __init__(self, locale, size):
+        faker = Faker(locale)
+        faker.seed_instance(0)
+        self.first_names = np.array([faker.first_name() for _ in range(size)], dtype=object)
+        self.last_names = np.array([faker.last_name() for _ in range(size)], dtype=object)
+        self.first_slugs = np.array([_slug(name) for name in self.first_names], dtype=object)
+        self.last_slugs = np.array([_slug(name) for name in self.last_names], dtype=object)
+        self.domains = np.array(sorted({faker.free_email_domain() for _ in range(size)}), dtype=object)
+
+        streets, localities = [], []
+        for _ in range(size):
+            street, _, locality = faker.address().rpartition('\n')
+            streets.append(street or faker.street_address())
+            localities.append(locality)
+        self.streets = np.array(streets, dtype=object)
+        self.localities = np.array(localities, dtype=object)
+
+        phones = [faker.phone_number() for _ in range(size)]
+        # Keep numbers ending in four digits so the suffix can be varied per contact.
+        suffixed = [phone[:-4] for phone in phones if re.search(r'\d{4}$', phone)]
+        self.phone_prefixes = np.array(suffixed, dtype=object) if suffixed else None
+        self.phones = np.array(phones, dtype=object)
+
+
+@lru_cache(maxsize=8)
+def get_profile_pools(locale, size):
+    return ProfilePools(locale, size)
+
+
+class ProfileGenerator:
+    """Build contact profile columns in bulk.
+
+    In 'pooled' mode every field is picked from cached per-locale pools by
+    hashing the contact index, so a contact always gets the same profile
+    for a given salt. 'faker' mode calls Faker for every contact.
+    """
+
+    POOL_SIZE = 2000
+
+    def __init__(self, locale='fr_FR', salt=0, mode='pooled', pool_size=POOL_SIZE):
+        if mode not in ('pooled', 'faker'):
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.locale = locale
+        self.salt = salt
+        self.mode = mode
+        self.pool_size = pool_size
+
+    def generate(self, contact_ids):
+        """Return a DataFrame of profile columns aligned with contact_ids"""
+        if self.mode == 'faker':
+            return self._generate_with_faker(contact_ids)
+
+        pools = get_profile_pools(self.locale, self.pool_size)
+        ids = np.asarray(contact_ids)
+
+        def draw(field, size):
+            return _mix(ids, self.salt * 16 + field) % np.uint64(size)
+
+        first_index = draw(1, len(pools.first_names))
+        last_index = draw(2, len(pools.last_names))
+
+        email = (
+            pd.Series(pools.first_slugs[first_index]) + '.'
+            + pd.Series(pools.last_slugs[last_index])
+            + pd.Series(draw(3, 100).astype(np.int64)).astype(str).str.zfill(2) + '@'
+            + pd.Series(pools.domains[draw(4, len(pools.domains))])
+        )
+        if pools.phone_prefixes is not None:
+            phone = (
+                pd.Series(pools.phone_prefixes[draw(5, len(pools.phone_prefixes))])
+                + pd.Series(draw(6, 10000).astype(np.int64)).astype(str).str.zfill(4)
+            )
+        else:
+            phone = pd.Series(pools.phones[draw(5, len(pools.phones))])
+        address = (
+            pd.Series(pools.streets[draw(7, len(pools.streets))]) + '\n'
+            + pd.Series(pools.localities[draw(8, len(pools.localities))])
+        )
+
+        return pd.DataFrame({
+            'first_name': pools.first_names[first_index],
+            'last_name': pools.last_names[last_index],
+            'email': email.to_numpy(),
+            'phone': phone.to_numpy(),
+            'address': address.to_numpy(),
+        }, columns=PROFILE_COLUMNS)
+
+    def _generate_with_faker(self, contact_ids):
+        """Call Faker once per field and contact.
+
+        Faker is reseeded per contact from the salt and the contact id,
+        so a contact gets the same profile whatever batch it comes in.
+        """
+        faker = Faker(self.locale)
+        rows = []
+        for seed in _mix(contact_ids, self.salt).tolist():
+            faker.seed_instance(seed)
+            rows.append((faker.first_name(), faker.last_name(), faker.email(), faker.phone_number(), faker.address()))
+        return pd.DataFrame(rows, columns=PROFILE_COLUMNS)
@@ -0,0 +1,125 @@
+"""Recurring (monthly) giving.
+
+A channel with a `recurring` mapping converts a share of the new donors of
+every prospecting campaign into monthly direct-debit donors, starting the
+month after the campaign. Each recurring donor is one column of a small
+array book holding its first debit month, debit day, payment method,
+amount and monthly attrition hazard; the number of debits before the
+donor cancels is drawn from the hazard at sign-up, so the whole schedule
+is fixed then and does not depend on how many years are generated.
+
+Once a year the debits falling in that year are cut out of the book for
+all live donors at once and rendered, by expand_schedule, into one chunk
+per channel with a few array operations per month (no per-payment Python).
+The chunk goes through the same path as campaign chunks, as a campaign of
+type `recurring` spanning the year.
+"""
+import numpy as np
+
+RECURRING = 'recurring'
+# Debits are taken on a day that exists in every month
+MAX_DEBIT_DAY = 28
+# Donor hazards are spread uniformly around the channel rate by this factor
+HAZARD_SPREAD = 0.5
+
+# Book rows: integer fields, then float fields
+CONTACT, START, DEBITS, DAY, METHOD = range(5)
+AMOUNT, HAZARD = range(2)
+
+
+def month_index(date):
+    """Months since 1970-01 of a datetime64"""
+    return np.asarray(date).astype('datetime64[M]').astype(np.int64)
+
+
+class RecurringDonors:
+    """Sign-ups and debit schedules of one channel's recurring donors.
+
+    spec is the channel's RecurringSpec (see specs.py).
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.book = np.empty((5, 0), dtype=np.int64)
+        self.terms = np.empty((2, 0), dtype=np.float64)
+
+    def __len__(self):
+        return self.book.shape[1]
+
+    def enroll(self, rng, contacts, start_date):
+        """Convert a share of a campaign's donors, debited from the next month"""
+        spec = self.spec
+        size = rng.binomial(len(contacts), min(1.0, spec.conversion_rate))
+        if not size:
+            return
+        contacts = contacts[rng.choice(len(contacts), size=size, replace=False)]
+        hazard = np.minimum(1.0, spec.attrition_rate * rng.uniform(1 - HAZARD_SPREAD, 1 + HAZARD_SPREAD, size))
+        book = np.empty((5, size), dtype=np.int64)
+        book[CONTACT] = contacts
+        book[START] = month_index(start_date) + 1
+        # Number of debits until the donor cancels; at least one
+        book[DEBITS] = rng.geometric(np.maximum(hazard, 1e-9))
+        book[DAY] = rng.integers(1, MAX_DEBIT_DAY + 1, size=size)
+        book[METHOD] = spec.payment.sample(rng, size)
+        terms = np.empty((2, size), dtype=np.float64)
+        terms[AMOUNT] = np.maximum(1, rng.normal(spec.avg_donation, spec.std_deviation, size=size))
+        terms[HAZARD] = hazard
+        self.book = np.concatenate([self.book, book], axis=1)
+        self.terms = np.concatenate([self.terms, terms], axis=1)
+
+    def schedule(self, year):
+        """Debits of year: (contacts, first months, debit counts, days, methods, amounts) of live donors"""
+        first_month = month_index(np.datetime64(f'{year:04d}-01'))
+        book = self.book
+        end = book[START] + book[DEBITS]
+        first = np.maximum(book[START], first_month)
+        debits = np.minimum(end, first_month + 12) - first
+        live = debits > 0
+        schedule = (
+            book[CONTACT][live], first[live], debits[live], book[DAY][live], book[METHOD][live],
+            self.terms[AMOUNT][live],
+        )
+        # Cancelled donors are dropped once their last debit is behind
+        keep = end > first_month + 12
+        self.book, self.terms = book[:, keep], self.terms[:, keep]
+        return schedule
+
+
+def expand_schedule(first, debits, day):
+    """Expand per-donor schedules into (donor index, debit date) rows in date order.
+
+    Rows are built month by month: the donors due in a month are one mask
+    over the schedule, ordered by debit day with a stable (radix) sort.
+    """
+    if not len(debits):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype='datetime64[D]')
+    last = first + debits
+    day = day.astype(np.int8)
+    donors, dates = [], []
+    for month in range(int(first.min()), int(last.max())):
+        due = np.flatnonzero((first <= month) & (last > month))
+        due = due[np.argsort(day[due], kind='stable')]
+        donors.append(due)
+        dates.append(np.datetime64(month, 'M').astype('datetime64[D]') + (day[due] - 1))
+    return np.concatenate(donors), np.concatenate(dates)
+
+
+class RecurringGiving:
+    """Recurring donors of every channel that has recurring giving"""
+
+    def __init__(self, channels):
+        self.channels = {
+            channel.name: RecurringDonors(channel.recurring) for channel in channels if channel.recurring is not None
+        }
+
+    def enroll(self, rng, channel, contacts, start_date):
+        donors = self.channels.get(channel)
+        if donors is not None and len(contacts):
+            donors.enroll(rng, contacts, start_date)
+
+    def schedules(self, year):
+        """Yield (channel, schedule) for every channel with debits in year"""
+        for channel, donors in self.channels.items():
+            schedule = donors.schedule(year)
+            if len(schedule[0]):
+                yield channel, schedule
@@ -0,0 +1,250 @@
+"""Validation of generator configs.
+
+validate_config checks the whole CHANNELS / campaigns structure up front
+and reports every problem at once, with the path of the offending key,
+instead of letting the generator fail halfway through a job.
+
+The module also holds the config vocabulary (formats, schemas, profiles,
+lifecycle and recurring defaults) that the generator modules import. It
+must stay free of NumPy and pandas: web processes import it to validate
+configs without loading the data stack.
+"""
+from numbers import Real
+
+CAMPAIGN_TYPES = ('prospecting', 'retention')
+PROFILE_MODES = ('pooled', 'faker')
+SCHEMAS = ('wide', 'compact')
+# Stored chunk formats and their file extensions
+OUTPUT_FORMATS = {
+    'csv': '.csv',
+    'csv.gz': '.csv.gz',
+    'parquet': '.parquet',
+}
+# Channel bitmasks fit in one unsigned integer per contact
+MAX_CHANNELS = 64
+# Payment method codes are drawn as int8
+MAX_PAYMENT_METHODS = 127
+
+SEASONAL_PROFILES = {
+    'flat': (1,) * 12,
+    # Year-end appeals: giving builds through the autumn and peaks in December
+    'year_end': (1.0, 0.8, 0.9, 0.9, 0.9, 0.8, 0.6, 0.6, 1.0, 1.2, 1.6, 2.8),
+}
+LIFECYCLE_DEFAULTS = {
+    'first_year_retention': 0.6,
+    'repeat_retention': 0.8,
+    'reactivation_rate': 0.1,
+    'churn_rate': 0.3,
+}
+RECURRING_DEFAULTS = {
+    'conversion_rate': 0.05,
+    'avg_donation': 15,
+    'std_deviation': 5,
+    # Monthly probability that a donor cancels after a debit
+    'attrition_rate': 0.03,
+    'payment': {'sepa': 1.0},
+}
+
+TOP_LEVEL_KEYS = {
+    'FIRST_YEAR', 'YEARS', 'SEED', 'LOCALISATION', 'PROFILE_MODE', 'OUTPUT_FORMAT', 'SCHEMA', 'CHANNELS',
+}
+CHANNEL_KEYS = {
+    'duration', 'cost_per_reach', 'payment', 'lifecycle', 'seasonality', 'response_half_life', 'recurring',
+    'campaigns',
+}
+CAMPAIGN_KEYS = {
+    'prospecting': {'nb', 'max_reach_contact', 'transformation_rate', 'avg_donation', 'std_deviation', 'seasonality'},
+    'retention': {'nb', 'transformation_rate', 'avg_donation', 'std_deviation', 'seasonality', 'cross_sell'},
+}
+
+MAX_YEARS = 200
+MAX_CAMPAIGNS = 10_000
+
+
+class ConfigError(ValueError):
+    """Raised with the list of every problem found in a config"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors))
+
+
+def validate_config(config):
+    """Check a parsed config; return warnings, raise ConfigError on errors"""
+    errors = []
+    warnings = []
+    if not isinstance(config, dict):
+        raise ConfigError(['Configuration must be a mapping'])
+
+    for key in sorted(set(config) - TOP_LEVEL_KEYS, key=str):
+        warnings.append(f'{key}: unknown key, ignored')
+
+    _integer(errors, config, 'FIRST_YEAR', 'FIRST_YEAR', minimum=1, maximum=9999 - MAX_YEARS)
+    _integer(errors, config, 'YEARS', 'YEARS', minimum=0, maximum=MAX_YEARS)
+    if config.get('SEED') is not None:
+        _integer(errors, config, 'SEED', 'SEED', minimum=0)
+    _choice(errors, config, 'PROFILE_MODE', 'PROFILE_MODE', PROFILE_MODES)
+    _choice(errors, config, 'OUTPUT_FORMAT', 'OUTPUT_FORMAT', list(OUTPUT_FORMATS))
+    _choice(errors, config, 'SCHEMA', 'SCHEMA', SCHEMAS)
+    if 'LOCALISATION' in config:
+        _locale(errors, config['LOCALISATION'])
+
+    channels = config.get('CHANNELS')
+    if not isinstance(channels, dict) or not channels:
+        errors.append('CHANNELS: must be a non-empty mapping of channel names')
+        raise ConfigError(errors)
+    if len(channels) > MAX_CHANNELS:
+        errors.append(f'CHANNELS: at most {MAX_CHANNELS} channels are supported')
+
+    for channel_name, channel in channels.items():
+        path = f'CHANNELS.{channel_name}'
+        if not isinstance(channel, dict):
+            errors.append(f'{path}: must be a mapping')
+            continue
+        for key in sorted(set(channel) - CHANNEL_KEYS, key=str):
+            warnings.append(f'{path}.{key}: unknown key, ignored')
+        _integer(errors, channel, 'duration', f'{path}.duration', minimum=0, maximum=366)
+        _number(errors, channel, 'cost_per_reach', f'{path}.cost_per_reach', minimum=0)
+        _seasonality(errors, channel, f'{path}.seasonality')
+        _number(errors, channel, 'response_half_life', f'{path}.response_half_life', minimum=0)
+        _payment(errors, channel.get('payment'), f'{path}.payment')
+        _lifecycle(errors, warnings, channel.get('lifecycle', {}), f'{path}.lifecycle')
+        _recurring(errors, warnings, channel.get('recurring', {}), f'{path}.recurring')
+        _campaigns(errors, warnings, channel.get('campaigns', {}), f'{path}.campaigns')
+        _cross_sell(errors, channel.get('campaigns', {}), channel_name, channels, f'{path}.campaigns')
+
+    if errors:
+        raise ConfigError(errors)
+    return warnings
+
+
+def _campaigns(errors, warnings, campaigns, path):
+    if not isinstance(campaigns, dict):
+        errors.append(f'{path}: must be a mapping of campaign types')
+        return
+    for campaign_type, campaign in campaigns.items():
+        campaign_path = f'{path}.{campaign_type}'
+        if campaign_type not in CAMPAIGN_TYPES:
+            warnings.append(f"{campaign_path}: unknown campaign type, expected one of {', '.join(CAMPAIGN_TYPES)}")
+            continue
+        if not isinstance(campaign, dict):
+            errors.append(f'{campaign_path}: must be a mapping')
+            continue
+        for key in sorted(set(campaign) - CAMPAIGN_KEYS[campaign_type], key=str):
+            warnings.append(f'{campaign_path}.{key}: unknown key, ignored')
+        _integer(errors, campaign, 'nb', f'{campaign_path}.nb', minimum=0, maximum=MAX_CAMPAIGNS)
+        _integer(errors, campaign, 'max_reach_contact', f'{campaign_path}.max_reach_contact', minimum=0)
+        _number(errors, campaign, 'transformation_rate', f'{campaign_path}.transformation_rate', minimum=0, maximum=1)
+        _number(errors, campaign, 'avg_donation', f'{campaign_path}.avg_donation', minimum=0)
+        _number(errors, campaign, 'std_deviation', f'{campaign_path}.std_deviation', minimum=0)
+        _seasonality(errors, campaign, f'{campaign_path}.seasonality')
+
+
+def _cross_sell(errors, campaigns, channel_name, channels, path):
+    if not isinstance(campaigns, dict) or not isinstance(campaigns.get('retention'), dict):
+        return
+    cross_sell = campaigns['retention'].get('cross_sell')
+    path = f'{path}.retention.cross_sell'
+    if cross_sell is None:
+        return
+    if not isinstance(cross_sell, dict):
+        errors.append(f'{path}: must be a mapping of source channels to fractions of their donors')
+        return
+    for source in cross_sell:
+        if source == channel_name or source not in channels:
+            errors.append(f'{path}.{source}: must be another channel of CHANNELS')
+        else:
+            _number(errors, cross_sell, source, f'{path}.{source}', minimum=0, maximum=1)
+
+
+def _lifecycle(errors, warnings, lifecycle, path):
+    if not isinstance(lifecycle, dict):
+        errors.append(f'{path}: must be a mapping of lifecycle probabilities')
+        return
+    for key in sorted(set(lifecycle) - set(LIFECYCLE_DEFAULTS), key=str):
+        warnings.append(f'{path}.{key}: unknown key, ignored')
+    for key in LIFECYCLE_DEFAULTS:
+        _number(errors, lifecycle, key, f'{path}.{key}', minimum=0, maximum=1)
+
+
+def _recurring(errors, warnings, recurring, path):
+    if not isinstance(recurring, dict):
+        errors.append(f'{path}: must be a mapping of recurring giving settings')
+        return
+    for key in sorted(set(recurring) - set(RECURRING_DEFAULTS), key=str):
+        warnings.append(f'{path}.{key}: unknown key, ignored')
+    _number(errors, recurring, 'conversion_rate', f'{path}.conversion_rate', minimum=0, maximum=1)
+    _number(errors, recurring, 'avg_donation', f'{path}.avg_donation', minimum=0)
+    _number(errors, recurring, 'std_deviation', f'{path}.std_deviation', minimum=0)
+    _number(errors, recurring, 'attrition_rate', f'{path}.attrition_rate', minimum=0, maximum=1)
+    _payment(errors, recurring.get('payment'), f'{path}.payment')
+
+
+def _seasonality(errors, mapping, path):
+    if 'seasonality' not in mapping:
+        return
+    seasonality = mapping['seasonality']
+    if isinstance(seasonality, str):
+        if seasonality not in SEASONAL_PROFILES:
+            errors.append(f"{path}: must be one of {', '.join(SEASONAL_PROFILES)} or a list of 12 monthly weights")
+        return
+    if not isinstance(seasonality, list) or len(seasonality) != 12:
+        errors.append(f"{path}: must be one of {', '.join(SEASONAL_PROFILES)} or a list of 12 monthly weights")
+    elif not all(_is_number(weight) and weight >= 0 for weight in seasonality):
+        errors.append(f'{path}: monthly weights must be non-negative numbers')
+    elif sum(seasonality) <= 0:
+        errors.append(f'{path}: monthly weights must not all be zero')
+
+
+def _payment(errors, payment, path):
+    if payment is None:
+        return
+    if not isinstance(payment, dict) or not payment:
+        errors.append(f'{path}: must be a non-empty mapping of payment method weights')
+        return
+    if len(payment) > MAX_PAYMENT_METHODS:
+        errors.append(f'{path}: at most {MAX_PAYMENT_METHODS} payment methods are supported')
+        return
+    for method, weight in payment.items():
+        if not _is_number(weight) or weight < 0:
+            errors.append(f'{path}.{method}: must be a non-negative number')
+            return
+    if sum(payment.values()) <= 0:
+        errors.append(f'{path}: weights must not all be zero')
+
+
+def _is_number(value):
+    return isinstance(value, Real) and not isinstance(value, bool)
+
+
+def _number(errors, mapping, key, path, minimum=None, maximum=None):
+    if key not in mapping:
+        return
+    value = mapping[key]
+    if not _is_number(value):
+        errors.append(f'{path}: must be a number')
+    elif minimum is not None and value < minimum:
+        errors.append(f'{path}: must be at least {minimum}')
+    elif maximum is not None and value > maximum:
+        errors.append(f'{path}: must be at most {maximum}')
+
+
+def _integer(errors, mapping, key, path, minimum=None, maximum=None):
+    if key not in mapping:
+        return
+    if not isinstance(mapping[key], int) or isinstance(mapping[key], bool):
+        errors.append(f'{path}: must be an integer')
+    else:
+        _number(errors, mapping, key, path, minimum, maximum)
+
+
+def _choice(errors, mapping, key, path, choices):
+    if key in mapping and mapping[key] not in choices:
+        errors.append(f"{path}: must be one of {', '.join(choices)}")
+
+
+def _locale(errors, locale):
+    from faker.config import AVAILABLE_LOCALES
+
+    if locale not in AVAILABLE_LOCALES:
+        errors.append(f'LOCALISATION: unknown Faker locale {locale!r}')
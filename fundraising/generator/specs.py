@@ -0,0 +1,219 @@
+"""Compiled generator configs.
+
+compile_config turns a validated config into immutable specs: every
+default is resolved once, seasonal profiles become weight tuples and
+payment mixes become PaymentMix tables, so planning and rendering read
+attributes instead of looking keys up in the parsed YAML. Specs are
+hashable on their resolved values; two configs that only differ by
+spelled-out defaults, key order at the top level or ignored keys compile
+to equal specs. They pickle, so they travel with shard tasks.
+"""
+import numpy as np
+
+from .dates import seasonal_weights
+from .schema import LIFECYCLE_DEFAULTS, RECURRING_DEFAULTS
+
+CHANNEL_DEFAULTS = {
+    'duration': 30,
+    'cost_per_reach': 1,
+    'payment': {'card': 1.0},
+    'seasonality': None,
+    'response_half_life': None,
+}
+CAMPAIGN_DEFAULTS = {
+    'prospecting': {'nb': 1, 'max_reach_contact': 1000, 'transformation_rate': 0.1, 'avg_donation': 50, 'std_deviation': 10},
+    'retention': {'nb': 1, 'transformation_rate': 0.2, 'avg_donation': 50, 'std_deviation': 10},
+}
+# Campaign types the generator does not know are planned (and produce nothing)
+UNKNOWN_CAMPAIGN_DEFAULTS = {'nb': 1, 'transformation_rate': 0.0, 'avg_donation': 50, 'std_deviation': 10}
+# Payment mixes with more methods than this are sampled with their alias
+# table; below it a binary search of the cumulative weights is faster.
+ALIAS_MIN_METHODS = 16
+
+
+class Spec:
+    """Immutable record with __slots__, compared and hashed on its fields"""
+
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def key(self):
+        return tuple(_key(getattr(self, name)) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.key() == self.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+def _key(value):
+    if isinstance(value, Spec):
+        return value.key()
+    if isinstance(value, tuple):
+        return tuple(_key(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return tuple(value.tolist())
+    return value
+
+
+class PaymentMix(Spec):
+    """Payment methods with their cumulative weights and alias table"""
+
+    __slots__ = ('methods', 'weights', 'cumulative', 'probability', 'alias')
+
+    def sample(self, rng, size):
+        """Draw size method codes (int8, see schema.MAX_PAYMENT_METHODS)"""
+        if len(self.methods) < ALIAS_MIN_METHODS:
+            return np.searchsorted(self.cumulative, rng.random(size), side='right').astype(np.int8)
+        scaled = rng.random(size) * len(self.methods)
+        columns = scaled.astype(np.int64)
+        return np.where(scaled - columns < self.probability[columns], columns, self.alias[columns]).astype(np.int8)
+
+
+def payment_mix(payment_methods):
+    methods = tuple(payment_methods)
+    weights = np.asarray(list(payment_methods.values()), dtype=float)
+    cumulative = np.cumsum(weights) / weights.sum()
+    cumulative[-1] = 1.0
+    probability, alias = _alias_table(weights / weights.sum())
+    return PaymentMix(
+        methods=methods, weights=tuple(weights.tolist()), cumulative=cumulative, probability=probability, alias=alias,
+    )
+
+
+def _alias_table(probabilities):
+    """Vose's alias method: one uniform column and a coin flip per draw"""
+    size = len(probabilities)
+    scaled = probabilities * size
+    probability = np.ones(size)
+    alias = np.arange(size, dtype=np.int64)
+    small = [index for index in range(size) if scaled[index] < 1]
+    large = [index for index in range(size) if scaled[index] >= 1]
+    while small and large:
+        low, high = small.pop(), large.pop()
+        probability[low], alias[low] = scaled[low], high
+        scaled[high] += scaled[low] - 1
+        (small if scaled[high] < 1 else large).append(high)
+    return probability, alias
+
+
+class LifecycleSpec(Spec):
+    __slots__ = tuple(LIFECYCLE_DEFAULTS)
+
+
+class RecurringSpec(Spec):
+    __slots__ = ('conversion_rate', 'avg_donation', 'std_deviation', 'attrition_rate', 'payment')
+
+
+class CampaignSpec(Spec):
+    """One campaign type of a channel; cross_sell is a tuple of (source, fraction)"""
+
+    __slots__ = (
+        'campaign_type', 'index', 'nb', 'max_reach_contact', 'transformation_rate', 'avg_donation', 'std_deviation',
+        'seasonality', 'cross_sell',
+    )
+
+
+class ChannelSpec(Spec):
+    __slots__ = (
+        'name', 'index', 'duration', 'cost_per_reach', 'payment', 'response_half_life', 'lifecycle', 'recurring',
+        'campaigns',
+    )
+
+    def campaign(self, campaign_type):
+        for campaign in self.campaigns:
+            if campaign.campaign_type == campaign_type:
+                return campaign
+        return None
+
+
+class ConfigSpec(Spec):
+    __slots__ = (
+        'first_year', 'years', 'seed', 'localisation', 'profile_mode', 'output_format', 'schema', 'channels',
+    )
+
+    def channel(self, name):
+        for channel in self.channels:
+            if channel.name == name:
+                return channel
+        raise KeyError(name)
+
+
+def compile_config(config):
+    """Compile a validated config into a ConfigSpec"""
+    channels = tuple(
+        _channel(name, index, channel_info)
+        for index, (name, channel_info) in enumerate(config.get('CHANNELS', {}).items())
+    )
+    return ConfigSpec(
+        first_year=config.get('FIRST_YEAR', 2014),
+        years=config.get('YEARS', 10),
+        seed=config.get('SEED'),
+        localisation=config.get('LOCALISATION', 'fr_FR'),
+        profile_mode=config.get('PROFILE_MODE', 'pooled'),
+        output_format=config.get('OUTPUT_FORMAT'),
+        schema=config.get('SCHEMA', 'wide'),
+        channels=channels,
+    )
+
+
+def _channel(name, index, channel_info):
+    values = {**CHANNEL_DEFAULTS, **channel_info}
+    recurring = channel_info.get('recurring')
+    if recurring is not None:
+        recurring = {**RECURRING_DEFAULTS, **recurring}
+        recurring = RecurringSpec(
+            conversion_rate=recurring['conversion_rate'],
+            avg_donation=recurring['avg_donation'],
+            std_deviation=recurring['std_deviation'],
+            attrition_rate=recurring['attrition_rate'],
+            payment=payment_mix(recurring['payment']),
+        )
+    campaigns = tuple(
+        _campaign(campaign_type, type_index, campaign_config or {}, values['seasonality'])
+        for type_index, (campaign_type, campaign_config) in enumerate(channel_info.get('campaigns', {}).items())
+    )
+    return ChannelSpec(
+        name=name,
+        index=index,
+        duration=values['duration'],
+        cost_per_reach=float(values['cost_per_reach']),
+        payment=payment_mix(values['payment']),
+        response_half_life=values['response_half_life'] or None,
+        lifecycle=LifecycleSpec(**{**LIFECYCLE_DEFAULTS, **channel_info.get('lifecycle', {})}),
+        recurring=recurring,
+        campaigns=campaigns,
+    )
+
+
+def _campaign(campaign_type, index, campaign_config, channel_seasonality):
+    values = {**CAMPAIGN_DEFAULTS.get(campaign_type, UNKNOWN_CAMPAIGN_DEFAULTS), **campaign_config}
+    return CampaignSpec(
+        campaign_type=campaign_type,
+        index=index,
+        nb=values['nb'],
+        max_reach_contact=values.get('max_reach_contact', 0),
+        transformation_rate=values['transformation_rate'],
+        avg_donation=values['avg_donation'],
+        std_deviation=values['std_deviation'],
+        seasonality=seasonal_weights(values.get('seasonality', channel_seasonality)),
+        cross_sell=tuple((values.get('cross_sell') or {}).items()),
+    )
@@ -0,0 +1,178 @@
+import gzip
+import numpy as np
+import pandas as pd
+
+CONTACT_AGGREGATE_COLUMNS = ['contact_id', 'creation_date', 'avg_donation', 'total_transactions']
+
+# Day-precision columns, stored as 4-byte date32 in Parquet
+DATE_COLUMNS = ('date', 'campaign_start', 'campaign_end', 'creation_date')
+# Columns with few distinct values, stored as Arrow dictionaries so that
+# Parquet readers get pandas categoricals instead of one string per row
+DICTIONARY_COLUMNS = ('channel', 'campaign_name', 'campaign_type', 'payment_method')
+PARQUET_COMPRESSION = 'zstd'
+
+_NO_DATE = np.iinfo(np.int32).max
+
+
+class ContactAggregator:
+    """Running per-contact donation statistics.
+
+    Contact ids are dense registry indices, so the aggregates are plain
+    arrays indexed by contact and each chunk is folded in with ufunc.at.
+    """
+
+    def __init__(self, capacity=0):
+        self.total = np.zeros(capacity, dtype=np.float64)
+        self.count = np.zeros(capacity, dtype=np.int32)
+        self.first_day = np.full(capacity, _NO_DATE, dtype=np.int32)
+
+    def reserve(self, size):
+        if size <= len(self.count):
+            return
+        size = max(size, 2 * len(self.count))
+        grown = len(self.count)
+        self.total = np.concatenate([self.total, np.zeros(size - grown, dtype=np.float64)])
+        self.count = np.concatenate([self.count, np.zeros(size - grown, dtype=np.int32)])
+        self.first_day = np.concatenate([self.first_day, np.full(size - grown, _NO_DATE, dtype=np.int32)])
+
+    def update(self, chunk):
+        """Fold a transactions chunk (with integer contact ids) in"""
+        ids = chunk['contact_id'].to_numpy(dtype=np.int64)
+        if not len(ids):
+            return
+        self.reserve(int(ids.max()) + 1)
+        days = chunk['date'].to_numpy().astype('datetime64[D]').astype(np.int32)
+        np.add.at(self.total, ids, chunk['donation_amount'].to_numpy(dtype=np.float64))
+        np.add.at(self.count, ids, 1)
+        np.minimum.at(self.first_day, ids, days)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.count))
+
+    def iter_frames(self, batch_size=250_000, start=0):
+        """Yield contact aggregate frames of the contacts from start on, ordered by contact id"""
+        ids = start + np.flatnonzero(self.count[start:])
+        for offset in range(0, len(ids), batch_size):
+            yield self.frame(ids[offset:offset + batch_size])
+
+    def frame(self, ids):
+        """Aggregate frame of the given contacts"""
+        return pd.DataFrame({
+            'contact_id': ids,
+            'creation_date': self.first_day[ids].astype('datetime64[D]'),
+            'avg_donation': self.total[ids] / self.count[ids],
+            'total_transactions': self.count[ids].astype(np.int64),
+        }, columns=CONTACT_AGGREGATE_COLUMNS)
+
+
+class TableWriter:
+    """Append DataFrame chunks to one output file.
+
+    Small chunks are buffered until batch_rows rows are pending so that
+    per-campaign chunks do not turn into tiny writes or row groups.
+    """
+
+    def __init__(self, path, batch_rows=100_000):
+        self.path = path
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self._pending = []
+        self._pending_rows = 0
+
+    def write(self, frame):
+        self._pending.append(frame)
+        self._pending_rows += len(frame)
+        if self._pending_rows >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        frame = pd.concat(self._pending, ignore_index=True) if len(self._pending) > 1 else self._pending[0]
+        self._pending = []
+        self._pending_rows = 0
+        self._write_frame(frame)
+        self.rows += len(frame)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_frame(self, frame):
+        raise NotImplementedError
+
+
+class CsvTableWriter(TableWriter):
+    def __init__(self, path, compress=False, **kwargs):
+        super().__init__(path, **kwargs)
+        self._file = gzip.open(path, 'wt', newline='') if compress else open(path, 'w', newline='')
+        self._header = True
+
+    def _write_frame(self, frame):
+        frame.to_csv(self._file, index=False, header=self._header)
+        self._header = False
+
+    def close(self):
+        super().close()
+        self._file.close()
+
+
+class ParquetTableWriter(TableWriter):
+    def __init__(self, path, compression=PARQUET_COMPRESSION, **kwargs):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ValueError('Parquet output requires the pyarrow package') from e
+        super().__init__(path, **kwargs)
+        self.compression = compression
+        self._writer = None
+
+    def _write_frame(self, frame):
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            table = arrow_table(frame)
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression=self.compression)
+        else:
+            table = arrow_table(frame, self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        super().close()
+        if self._writer is not None:
+            self._writer.close()
+
+
+def arrow_table(frame, schema=None, dictionaries=True):
+    """Convert a chunk to a pyarrow Table, optionally cast to schema.
+
+    Dates become date32 and, with dictionaries, DICTIONARY_COLUMNS are
+    dictionary encoded.
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    for index, field in enumerate(table.schema):
+        if field.name in DATE_COLUMNS and pa.types.is_timestamp(field.type):
+            table = table.set_column(index, field.name, table.column(index).cast(pa.date32()))
+        elif dictionaries and field.name in DICTIONARY_COLUMNS and (
+            pa.types.is_string(field.type) or pa.types.is_large_string(field.type)
+        ):
+            table = table.set_column(index, field.name, table.column(index).dictionary_encode())
+    return table.cast(schema) if schema is not None else table
+
+
+def open_table_writer(path, output_format, **kwargs):
+    """Return a writer for one of schema.OUTPUT_FORMATS"""
+    if output_format == 'csv':
+        return CsvTableWriter(path, **kwargs)
+    if output_format == 'csv.gz':
+        return CsvTableWriter(path, compress=True, **kwargs)
+    if output_format == 'parquet':
+        return ParquetTableWriter(path, **kwargs)
+    raise ValueError(f"Unknown output format: {output_format}")
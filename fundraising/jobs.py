@@ -0,0 +1,342 @@
+"""Database-backed queue for dataset generation jobs.
+
+A GeneratedDataset row is the job: the API creates it in the 'queued'
+state and the run_generation_worker command claims it and runs the
+generator in a separate process.
+"""
+import json
+import logging
+import time
+from datetime import timedelta
+
+import yaml
+from django.conf import settings
+from django.utils import timezone
+
+from .models import GeneratedDataset
+from .scheduler import claim_order
+
+logger = logging.getLogger(__name__)
+
+
+def parse_config(config):
+    """Return the generator config from a stored YAML string or mapping"""
+    if isinstance(config, str):
+        config = yaml.safe_load(config)
+    if not isinstance(config, dict):
+        raise ValueError('Configuration must be a YAML mapping')
+    return config
+
+
+def assess_config(config_data, resumed_years=0):
+    """Validate a parsed config and estimate its cost.
+
+    An extension resuming a run of resumed_years is charged for the
+    additional years only. Returns (warnings, estimate, admission errors)
+    and raises ConfigError when the config is invalid.
+    """
+    from .generator.estimator import estimate_config
+    from .generator.schema import validate_config
+
+    warnings = validate_config(config_data)
+    estimate = estimate_config(config_data, settings.DATASET_OUTPUT_FORMAT, resumed_years=resumed_years)
+    return warnings, estimate, admission_errors(estimate)
+
+
+def admission_errors(estimate):
+    """Return the budgets an estimated job exceeds, empty when it is admitted"""
+    errors = []
+    rows = estimate['transactions'] + estimate['contacts']
+    if rows > settings.GENERATION_MAX_ROWS:
+        errors.append(f'{rows:,} estimated rows exceed the limit of {settings.GENERATION_MAX_ROWS:,}')
+    if estimate['output_bytes'] > settings.GENERATION_MAX_BYTES:
+        errors.append(
+            f"{estimate['output_bytes']:,} estimated bytes exceed the limit of {settings.GENERATION_MAX_BYTES:,}"
+        )
+    if estimate['memory_bytes'] > settings.GENERATION_MEMORY_BUDGET:
+        errors.append(
+            f"{estimate['memory_bytes']:,} estimated bytes of memory exceed the budget of "
+            f"{settings.GENERATION_MEMORY_BUDGET:,}"
+        )
+    if estimate['seconds'] > settings.GENERATION_MAX_SECONDS:
+        errors.append(
+            f"{estimate['seconds']:,.0f} estimated seconds exceed the limit of {settings.GENERATION_MAX_SECONDS:,}"
+        )
+    return errors
+
+
+def enqueue_generation(configuration, config_hash='', metrics=None, parent=None):
+    """Create a queued dataset job for a configuration.
+
+    With a parent dataset the job extends it: it resumes from the parent's
+    snapshot and only generates the additional years.
+    """
+    return GeneratedDataset.objects.create(
+        configuration=configuration,
+        status=GeneratedDataset.STATUS_QUEUED,
+        config_hash=config_hash,
+        metrics=metrics or {},
+        parent=parent,
+        lineage=(parent.lineage or parent.id) if parent is not None else None,
+    )
+
+
+def extension_config(dataset, years):
+    """Return the config of a completed dataset extended by years.
+
+    The seed actually used is pinned so that the extension matches a full
+    run of the longer config. Raises ValueError when it was not recorded.
+    """
+    config = parse_config(dataset.configuration.config)
+    seed = config.get('SEED')
+    if seed is None:
+        seed = dataset.metrics.get('generation', {}).get('seed')
+    if seed is None:
+        raise ValueError('The seed of this dataset was not recorded, it cannot be extended')
+    return {**config, 'YEARS': config.get('YEARS', 10) + years, 'SEED': seed}
+
+
+def claim_next_job():
+    """Atomically move the next job of the fair queue to 'processing'.
+
+    The order and the budgets are decided by scheduler.claim_order. The
+    conditional UPDATE makes concurrent workers safe on every database
+    backend: only one of them can flip a given row out of 'queued'.
+    """
+    for dataset_id in claim_order():
+        claimed = GeneratedDataset.objects.filter(
+            id=dataset_id, status=GeneratedDataset.STATUS_QUEUED
+        ).update(status=GeneratedDataset.STATUS_PROCESSING, progress=0, started_at=timezone.now())
+        if claimed:
+            return dataset_id
+    return None
+
+
+def requeue_stale_jobs(max_age):
+    """Put back jobs left in 'processing' by a worker that died"""
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    return GeneratedDataset.objects.filter(
+        status=GeneratedDataset.STATUS_PROCESSING, started_at__lt=cutoff
+    ).update(status=GeneratedDataset.STATUS_QUEUED, progress=0, started_at=None)
+
+
+def fail_job(dataset_id, message):
+    GeneratedDataset.objects.filter(id=dataset_id).update(
+        status=GeneratedDataset.STATUS_FAILED,
+        error_message=message,
+        finished_at=timezone.now(),
+    )
+
+
+class ProgressReporter:
+    """Persist job progress, writing only when the percentage changes"""
+
+    def __init__(self, dataset_id):
+        self.dataset_id = dataset_id
+        self.last = -1
+
+    def __call__(self, percent):
+        percent = max(0, min(100, int(percent)))
+        if percent != self.last:
+            GeneratedDataset.objects.filter(id=self.dataset_id).update(progress=percent)
+            self.last = percent
+
+    def stage(self, start, end):
+        """Map a 0-1 fraction of one stage onto [start, end] percent"""
+        return lambda fraction: self(start + (end - start) * fraction)
+
+
+def run_job(dataset_id):
+    """Generate the dataset of a claimed job and record the outcome"""
+    from . import cache
+    from .metrics import record_run
+    from .storage import table_bytes, table_rows
+
+    dataset = GeneratedDataset.objects.select_related('configuration', 'parent').get(id=dataset_id)
+    report = ProgressReporter(dataset_id)
+    start = time.perf_counter()
+    generator = None
+    writers = {}
+    snapshot = ''
+    parse_seconds = 0.0
+
+    try:
+        config_data = parse_config(dataset.configuration.config)
+        parse_seconds = time.perf_counter() - start
+        generator, writers, stored_contacts = _prepare_run(dataset, config_data)
+
+        # Chunks are written as they are generated
+        generator.generate_to(
+            writers['transactions'], writers['contacts'],
+            progress=report.stage(0, 90), campaigns_writer=writers.get('campaigns'),
+            stored_contacts=stored_contacts,
+        )
+
+        manifest = {table: writer.manifest() for table, writer in writers.items()}
+        snapshot, snapshot_bytes = _save_snapshot(dataset_id, generator)
+        metrics = _run_metrics(dataset, generator, parse_seconds, start, rows=table_rows(manifest['transactions']))
+        GeneratedDataset.objects.filter(id=dataset_id).update(
+            status=GeneratedDataset.STATUS_COMPLETED,
+            progress=100,
+            manifest=manifest,
+            transactions_rows=table_rows(manifest['transactions']),
+            contacts_rows=table_rows(manifest['contacts']),
+            size_bytes=sum(table_bytes(table_manifest) for table_manifest in manifest.values()) + snapshot_bytes,
+            snapshot=snapshot,
+            sql_tables=_sql_tables(writers),
+            metrics=metrics,
+            finished_at=timezone.now(),
+        )
+        _log_run(dataset_id, GeneratedDataset.STATUS_COMPLETED, metrics)
+        record_run(GeneratedDataset.STATUS_COMPLETED, metrics['generation'])
+        cache.enforce_budget(keep=dataset_id)
+    except Exception as e:
+        logger.exception('Dataset generation %s failed', dataset_id)
+        fail_job(dataset_id, str(e))
+        _drop_sql_tables(writers)
+        _delete_partial_files(dataset, writers, snapshot)
+        metrics = _run_metrics(dataset, generator, parse_seconds, start)
+        GeneratedDataset.objects.filter(id=dataset_id).update(metrics=metrics)
+        _log_run(dataset_id, GeneratedDataset.STATUS_FAILED, metrics)
+        record_run(GeneratedDataset.STATUS_FAILED, metrics['generation'])
+        return False
+    return True
+
+
+def _prepare_run(dataset, config_data):
+    """Build the generator, the table writers and the stored contacts of a job.
+
+    An extension resumes from its parent's snapshot and appends to the
+    parent's transaction and campaign chunks. Its contacts table is
+    rewritten, since the aggregates of existing contacts change, but the
+    parent's contact profiles are read back from its chunks (the stored
+    contacts) instead of being generated again. When the parent or its
+    snapshot is gone it falls back to generating every year, which yields
+    the same data.
+    """
+    from .generator import FundraisingDataGenerator
+    from .generator.profiles import PROFILE_COLUMNS
+    from .chunk_writer import ChunkedTableWriter
+    from .storage import APPENDED_TABLES, iter_table_frames, manifest_files_exist, open_snapshot_file
+
+    workers = settings.GENERATION_SHARD_WORKERS
+    prefix = f'datasets/{dataset.id}'
+    tables = ['transactions', 'contacts']
+    if config_data.get('SCHEMA') == 'compact':
+        tables.append('campaigns')
+
+    parent = dataset.parent
+    if parent is not None and parent.status == GeneratedDataset.STATUS_COMPLETED and manifest_files_exist(parent.manifest):
+        snapshot_file = open_snapshot_file(parent.snapshot)
+        if snapshot_file is not None:
+            with snapshot_file:
+                generator = FundraisingDataGenerator.resume(config_data, snapshot_file, workers=workers)
+            # Tables stored by an older version may have other columns
+            if parent.manifest['transactions']['columns'] == generator.transaction_columns:
+                output_format = parent.manifest['transactions']['format']
+                writers = {
+                    table: ChunkedTableWriter(
+                        f'{prefix}/{table}', output_format,
+                        append_to=parent.manifest[table] if table in APPENDED_TABLES else None,
+                    )
+                    for table in tables
+                }
+                stored_contacts = iter_table_frames(
+                    parent.manifest['contacts'], columns=['contact_id', *PROFILE_COLUMNS]
+                )
+                return generator, _with_sql_sinks(dataset, writers, parent), stored_contacts
+            logger.warning('Dataset %s has other columns, regenerating %s in full', parent.id, dataset.id)
+        else:
+            logger.warning('Snapshot of dataset %s is missing, regenerating %s in full', parent.id, dataset.id)
+
+    output_format = config_data.get('OUTPUT_FORMAT', settings.DATASET_OUTPUT_FORMAT)
+    generator = FundraisingDataGenerator(config_data, workers=workers)
+    writers = {table: ChunkedTableWriter(f'{prefix}/{table}', output_format) for table in tables}
+    return generator, _with_sql_sinks(dataset, writers), None
+
+
+def _with_sql_sinks(dataset, writers, parent=None):
+    """Also load every table into SQL when DATASET_SQL_SINK is enabled.
+
+    An extension starts its appended tables from the parent's SQL table
+    when there is one, otherwise from the parent's stored chunks.
+    """
+    if not settings.DATASET_SQL_SINK:
+        return writers
+    from .sql_sink import SqlTableWriter, TeeTableWriter, sql_table_exists, sql_table_name
+    from .storage import APPENDED_TABLES, iter_table_frames
+
+    sinked = {}
+    for table, writer in writers.items():
+        copy_from = None
+        if parent is not None and table in APPENDED_TABLES:
+            copy_from = parent.sql_tables.get(table)
+            if copy_from and not sql_table_exists(copy_from):
+                copy_from = None
+        sink = SqlTableWriter(sql_table_name(dataset.id, table), table, copy_from=copy_from)
+        if parent is not None and table in APPENDED_TABLES and copy_from is None:
+            for frame in iter_table_frames(parent.manifest[table], batch_rows=sink.batch_rows):
+                sink.write(frame)
+            # Stored CSV frames have other dtypes than generated ones; never batch them together
+            sink.flush()
+        sinked[table] = TeeTableWriter(writer, sink)
+    return sinked
+
+
+def _sql_tables(writers):
+    return {table: sink.path for table, writer in writers.items() for sink in getattr(writer, 'sinks', ())}
+
+
+def _drop_sql_tables(writers):
+    from .sql_sink import drop_sql_tables
+
+    try:
+        drop_sql_tables(_sql_tables(writers).values())
+    except Exception:
+        logger.exception('Could not drop the SQL tables of a failed job')
+
+
+def _delete_partial_files(dataset, writers, snapshot):
+    """Delete the chunks and snapshot a failed job has stored.
+
+    An extension's manifests also list its parent's chunks; those stay.
+    """
+    from .storage import delete_file, delete_manifest_files, manifest_files
+
+    keep = manifest_files(dataset.parent.manifest) if dataset.parent is not None else ()
+    try:
+        delete_manifest_files({table: writer.manifest() for table, writer in writers.items()}, keep=keep)
+        delete_file(snapshot)
+    except Exception:
+        logger.exception('Could not delete the files of a failed job')
+
+
+def _save_snapshot(dataset_id, generator):
+    if not settings.DATASET_SNAPSHOTS:
+        return '', 0
+    from .storage import save_snapshot_file
+    return save_snapshot_file(f'datasets/{dataset_id}', generator)
+
+
+def _run_metrics(dataset, generator, parse_seconds, start, rows=None):
+    """Merge the generator instrumentation into the metrics recorded at enqueue time"""
+    generation = generator.metrics() if generator is not None else {'stages': {}}
+    generation['stages'] = {'parse_config': round(parse_seconds, 6), **generation['stages']}
+    generation['seconds'] = round(time.perf_counter() - start, 6)
+    if rows is not None:
+        generation['rows_per_second'] = round(rows / generation['seconds'], 1) if generation['seconds'] else 0.0
+    return {**dataset.metrics, 'generation': generation}
+
+
+def _log_run(dataset_id, status, metrics):
+    # One JSON line per run, for log-based dashboards
+    generation = metrics['generation']
+    logger.info('dataset_generation %s', json.dumps({
+        'dataset_id': dataset_id,
+        'status': status,
+        'seconds': generation['seconds'],
+        'rows_per_second': generation.get('rows_per_second'),
+        'peak_rss_bytes': generation.get('peak_rss_bytes'),
+        'stages': generation['stages'],
+        'request': metrics.get('request'),
+    }, separators=(',', ':')))
@@ -0,0 +1,122 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks import BENCHMARK_FORMATS, REFERENCE_CONFIGS, environment, run_benchmark
+from ...jobs import parse_config
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the dataset generator on reference or custom configs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'configs', nargs='*', default=['small', 'medium'],
+            help=f"Reference config names ({', '.join(REFERENCE_CONFIGS)}) or paths to YAML configs"
+        )
+        parser.add_argument('--workers', type=int, default=1, help='Shard worker processes per run')
+        parser.add_argument(
+            '--format', dest='output_format', choices=BENCHMARK_FORMATS, default='none',
+            help="Output format written to a temporary directory; 'none' discards the rows"
+        )
+        parser.add_argument('--repeat', type=int, default=1, help='Runs per config; the fastest is reported')
+        parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'], help='Profile each run')
+        parser.add_argument('--profile-dir', default='.', help='Directory for profile dumps')
+        parser.add_argument('--json', dest='json_path', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='JSON results of a previous run to compare rows/sec against')
+        parser.add_argument(
+            '--max-regression', type=float,
+            help='Fail when rows/sec drops by more than this percentage versus --compare'
+        )
+        parser.add_argument(
+            '--no-isolate', action='store_true',
+            help='Run in this process instead of a fresh one per run (peak RSS then accumulates)'
+        )
+
+    def handle(self, *args, **options):
+        if options['profile'] == 'pyinstrument':
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                raise CommandError('--profile pyinstrument requires the pyinstrument package')
+        configs = [
+            (name if name in REFERENCE_CONFIGS else os.path.splitext(os.path.basename(name))[0], self._load_config(name))
+            for name in options['configs']
+        ]
+        results = []
+        for name, config in configs:
+            runs = []
+            for attempt in range(max(1, options['repeat'])):
+                profile_path = None
+                if options['profile']:
+                    extension = 'prof' if options['profile'] == 'cprofile' else 'html'
+                    profile_path = os.path.join(options['profile_dir'], f'benchmark_{name}_{attempt}.{extension}')
+                runs.append(self._run(
+                    options['no_isolate'], name, config, options['workers'], options['output_format'],
+                    options['profile'], profile_path,
+                ))
+            result = min(runs, key=lambda run: run['seconds'])
+            results.append(result)
+            self._report(result)
+
+        report = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'environment': environment(),
+            'results': results,
+        }
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['json_path']}")
+
+        if options['compare']:
+            self._compare(results, options['compare'], options['max_regression'])
+
+    def _load_config(self, name):
+        if name in REFERENCE_CONFIGS:
+            return REFERENCE_CONFIGS[name]
+        if not os.path.exists(name):
+            raise CommandError(f'Unknown reference config or file: {name}')
+        with open(name) as f:
+            try:
+                return parse_config(f.read())
+            except ValueError as e:
+                raise CommandError(f'{name}: {e}')
+
+    def _run(self, in_process, *args):
+        if in_process:
+            return run_benchmark(*args)
+        # A fresh process per run so that peak RSS belongs to that run only
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(1, mp_context=context) as pool:
+            return pool.submit(run_benchmark, *args).result()
+
+    def _report(self, result):
+        self.stdout.write(
+            f"{result['name']}: {result['transactions']:,} transactions, {result['contacts']:,} contacts "
+            f"in {result['seconds']:.2f}s ({result['rows_per_second']:,.0f} rows/s), "
+            f"peak RSS {result['peak_rss_bytes'] / 2 ** 20:,.0f} MiB"
+        )
+        for stage, seconds in result['stages'].items():
+            self.stdout.write(f'  {stage:<20} {seconds:8.3f}s')
+
+    def _compare(self, results, path, max_regression):
+        with open(path) as f:
+            baseline = {result['name']: result for result in json.load(f)['results']}
+
+        regressions = []
+        for result in results:
+            previous = baseline.get(result['name'])
+            if previous is None or not previous['rows_per_second']:
+                continue
+            change = 100 * (result['rows_per_second'] / previous['rows_per_second'] - 1)
+            self.stdout.write(f"{result['name']}: {change:+.1f}% rows/s versus {path}")
+            if max_regression is not None and change < -max_regression:
+                regressions.append(result['name'])
+
+        if regressions:
+            raise CommandError(f"Throughput regressed by more than {max_regression}%: {', '.join(regressions)}")
@@ -0,0 +1,46 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks import HEAVY_MODULES, environment, measure_startup
+
+
+class Command(BaseCommand):
+    help = 'Measure the startup time and memory of a web worker and check it does not import the data stack'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Fresh processes to start; the fastest is reported')
+        parser.add_argument('--max-seconds', type=float, help='Fail when startup takes longer than this')
+        parser.add_argument('--max-rss', type=float, help='Fail when the peak RSS exceeds this many MiB')
+        parser.add_argument('--json', dest='json_path', help='Write the result to this JSON file')
+
+    def handle(self, *args, **options):
+        settings_module = os.environ['DJANGO_SETTINGS_MODULE']
+        runs = [self._run(settings_module) for _ in range(max(1, options['repeat']))]
+        result = min(runs, key=lambda run: run['seconds'])
+        self.stdout.write(
+            f"Web worker startup: {result['seconds']:.3f}s, peak RSS {result['peak_rss_bytes'] / 2 ** 20:,.0f} MiB"
+        )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({'environment': environment(), 'settings': settings_module, 'result': result}, f, indent=2)
+            self.stdout.write(f"Result written to {options['json_path']}")
+
+        problems = []
+        if result['heavy_modules']:
+            problems.append(f"imports {', '.join(result['heavy_modules'])} (none of {', '.join(HEAVY_MODULES)} may load)")
+        if options['max_seconds'] is not None and result['seconds'] > options['max_seconds']:
+            problems.append(f"takes {result['seconds']:.3f}s, more than {options['max_seconds']}s")
+        if options['max_rss'] is not None and result['peak_rss_bytes'] > options['max_rss'] * 2 ** 20:
+            problems.append(f"peaks at {result['peak_rss_bytes'] / 2 ** 20:,.0f} MiB, more than {options['max_rss']} MiB")
+        if problems:
+            raise CommandError(f"Web worker startup {'; '.join(problems)}")
+
+    def _run(self, settings_module):
+        # A spawned process starts from a bare interpreter, like a new web worker
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(1, mp_context=context) as pool:
+            return pool.submit(measure_startup, settings_module).result()
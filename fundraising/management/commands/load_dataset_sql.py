@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import GeneratedDataset
+from ...sql_sink import SqlTableWriter, drop_sql_tables, sql_database, sql_table_name
+from ...storage import iter_table_frames
+
+
+class Command(BaseCommand):
+    help = 'Load the stored tables of completed datasets into SQL tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset_ids', nargs='+', type=int, help='Datasets to load')
+        parser.add_argument(
+            '--database', default=sql_database(),
+            help='Database alias to load into (default: DATASET_SQL_DATABASE)'
+        )
+        parser.add_argument('--drop', action='store_true', help="Drop the datasets' SQL tables instead")
+
+    def handle(self, *args, **options):
+        for dataset_id in options['dataset_ids']:
+            dataset = GeneratedDataset.objects.filter(id=dataset_id).first()
+            if dataset is None:
+                raise CommandError(f'Dataset {dataset_id} not found')
+            if options['drop']:
+                drop_sql_tables(dataset.sql_tables.values(), using=options['database'])
+                GeneratedDataset.objects.filter(id=dataset_id).update(sql_tables={})
+                self.stdout.write(f'Dataset {dataset_id}: dropped {len(dataset.sql_tables)} tables')
+                continue
+            if dataset.status != GeneratedDataset.STATUS_COMPLETED:
+                raise CommandError(f'Dataset {dataset_id} is {dataset.status}, not completed')
+
+            sql_tables = {}
+            for table, table_manifest in dataset.manifest.items():
+                start = time.perf_counter()
+                writer = SqlTableWriter(sql_table_name(dataset_id, table), table, using=options['database'])
+                for frame in iter_table_frames(table_manifest, batch_rows=writer.batch_rows):
+                    writer.write(frame)
+                writer.close()
+                sql_tables[table] = writer.path
+                seconds = time.perf_counter() - start
+                self.stdout.write(
+                    f'Dataset {dataset_id}: {writer.rows:,} rows into {writer.path} in {seconds:.2f}s'
+                    f' ({writer.rows / seconds if seconds else 0:,.0f} rows/s)'
+                )
+            GeneratedDataset.objects.filter(id=dataset_id).update(sql_tables=sql_tables)
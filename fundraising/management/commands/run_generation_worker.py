@@ -0,0 +1,85 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ...jobs import claim_next_job, fail_job, requeue_stale_jobs
+from ...worker import execute_job, init_process
+
+
+class Command(BaseCommand):
+    help = 'Run queued dataset generation jobs in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int,
+            default=getattr(settings, 'GENERATION_WORKER_PROCESSES', 2),
+            help='Number of generation processes'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=getattr(settings, 'GENERATION_POLL_INTERVAL', 2.0),
+            help='Seconds to wait between polls when the queue is empty'
+        )
+        parser.add_argument(
+            '--stale-after', type=int,
+            default=getattr(settings, 'GENERATION_STALE_AFTER', 6 * 3600),
+            help='Requeue jobs left processing for longer than this many seconds'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is empty and all running jobs are done'
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(options['stale_after'])
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale job(s)')
+
+        processes = max(1, options['processes'])
+        # Children are spawned with their own Django setup and DB connections.
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+
+        while True:
+            with ProcessPoolExecutor(processes, mp_context=context, initializer=init_process) as pool:
+                finished = self._serve(pool, processes, options)
+            if finished:
+                return
+            self.stderr.write('Worker pool broke, restarting it')
+
+    def _serve(self, pool, processes, options):
+        """Feed jobs to the pool; return False if the pool has to be rebuilt"""
+        running = {}
+        while True:
+            broken = False
+            for future in [f for f in running if f.done()]:
+                dataset_id = running.pop(future)
+                try:
+                    succeeded = future.result()
+                except Exception as e:
+                    succeeded = False
+                    broken = broken or isinstance(e, BrokenProcessPool)
+                    fail_job(dataset_id, f'Worker process crashed: {e}')
+                self.stdout.write(f"Job {dataset_id} {'completed' if succeeded else 'failed'}")
+            if broken:
+                for dataset_id in running.values():
+                    fail_job(dataset_id, 'Worker process crashed')
+                return False
+
+            claimed = False
+            while len(running) < processes:
+                dataset_id = claim_next_job()
+                if dataset_id is None:
+                    break
+                claimed = True
+                running[pool.submit(execute_job, dataset_id)] = dataset_id
+                self.stdout.write(f'Job {dataset_id} started')
+
+            if options['once'] and not running and not claimed:
+                return True
+            time.sleep(options['poll_interval'] if not claimed else 0.1)
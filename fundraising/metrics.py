@@ -0,0 +1,142 @@
+"""Prometheus text exposition of dataset generation metrics.
+
+Everything is read from the database on each scrape, so the numbers are
+the same whichever web or worker process serves the request. Gauges are
+computed from the dataset rows; counters and summaries are MetricCounter
+rows incremented as requests and runs finish, so they never go down when
+datasets are evicted or deleted.
+"""
+import json
+
+from django.db.models import Count, F, Sum
+
+from .cache import cache_stats
+from .models import GeneratedDataset, MetricCounter
+
+
+class MetricsWriter:
+    """Accumulate metric families in the Prometheus text format"""
+
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name, metric_type, help_text, samples):
+        """samples is a list of (labels dict, value) or (suffix, labels dict, value)"""
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {metric_type}')
+        for sample in samples:
+            suffix, labels, value = sample if len(sample) == 3 else ('', *sample)
+            self.lines.append(f'{name}{suffix}{_labels(labels)} {_value(value)}')
+
+    def render(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _value(value):
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def increment(name, amount=1, **labels):
+    key = json.dumps(labels, sort_keys=True) if labels else ''
+    counter, _ = MetricCounter.objects.get_or_create(name=name, labels=key)
+    MetricCounter.objects.filter(id=counter.id).update(value=F('value') + amount)
+
+
+def _observe(name, amount, **labels):
+    """Add one observation to a summary"""
+    increment(f'{name}_sum', amount, **labels)
+    increment(f'{name}_count', **labels)
+
+
+def record_request(stages):
+    for stage, seconds in stages.items():
+        _observe('fundraising_request_stage_seconds', seconds, stage=stage)
+
+
+def record_run(status, generation):
+    """Count a finished or failed generation run"""
+    _observe('fundraising_generation_seconds', generation['seconds'], status=status)
+    for stage, seconds in generation['stages'].items():
+        _observe('fundraising_generation_stage_seconds', seconds, stage=stage)
+    for channel, campaign_types in generation.get('campaigns', {}).items():
+        for campaign_type, counts in campaign_types.items():
+            increment('fundraising_generated_rows_total', counts['rows'], channel=channel, campaign_type=campaign_type)
+
+
+def _counters():
+    counters = {}
+    for name, labels, value in MetricCounter.objects.order_by('name', 'labels').values_list('name', 'labels', 'value'):
+        value = int(value) if value.is_integer() else value
+        counters.setdefault(name, []).append((json.loads(labels) if labels else {}, value))
+    return counters
+
+
+def _summary(counters, name):
+    return (
+        [('_sum', labels, value) for labels, value in counters.get(f'{name}_sum', [])]
+        + [('_count', labels, value) for labels, value in counters.get(f'{name}_count', [])]
+    )
+
+
+def render_metrics():
+    datasets = GeneratedDataset.objects
+    writer = MetricsWriter()
+
+    by_status = {row['status']: row['count'] for row in datasets.values('status').annotate(count=Count('id'))}
+    writer.family(
+        'fundraising_datasets', 'gauge', 'Datasets by job status',
+        [({'status': value}, by_status.get(value, 0)) for value, _ in GeneratedDataset.STATUS_CHOICES],
+    )
+
+    completed = datasets.filter(status=GeneratedDataset.STATUS_COMPLETED)
+    totals = completed.aggregate(
+        transactions=Sum('transactions_rows'), contacts=Sum('contacts_rows'), size=Sum('size_bytes')
+    )
+    writer.family(
+        'fundraising_stored_rows', 'gauge', 'Rows held by completed datasets',
+        [({'table': 'transactions'}, totals['transactions'] or 0), ({'table': 'contacts'}, totals['contacts'] or 0)],
+    )
+    writer.family('fundraising_stored_bytes', 'gauge', 'Bytes held by completed datasets', [({}, totals['size'] or 0)])
+
+    peak_rss = max(
+        (metrics.get('generation', {}).get('peak_rss_bytes') or 0
+         for metrics in datasets.exclude(metrics={}).values_list('metrics', flat=True).iterator()),
+        default=0,
+    )
+    writer.family(
+        'fundraising_generation_peak_rss_bytes', 'gauge',
+        'Highest resident set size sampled in the generation runs of stored datasets', [({}, peak_rss)],
+    )
+
+    counters = _counters()
+    writer.family(
+        'fundraising_generation_seconds', 'summary', 'Wall clock time of generation runs',
+        _summary(counters, 'fundraising_generation_seconds'),
+    )
+    writer.family(
+        'fundraising_generation_stage_seconds', 'summary', 'Time spent per generation stage',
+        _summary(counters, 'fundraising_generation_stage_seconds'),
+    )
+    writer.family(
+        'fundraising_request_stage_seconds', 'summary', 'Time spent per stage of generation requests',
+        _summary(counters, 'fundraising_request_stage_seconds'),
+    )
+    writer.family(
+        'fundraising_generated_rows', 'counter', 'Transaction rows generated per channel and campaign type',
+        [('_total', labels, value) for labels, value in counters.get('fundraising_generated_rows_total', [])],
+    )
+
+    stats = cache_stats()
+    for name in ('hits', 'misses', 'evictions'):
+        writer.family(f'fundraising_cache_{name}', 'counter', f'Dataset cache {name}', [('_total', {}, stats[name])])
+    return writer.render()
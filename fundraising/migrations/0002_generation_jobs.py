@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def mark_existing_completed(apps, schema_editor):
+    # Datasets created before the job queue were generated synchronously.
+    GeneratedDataset = apps.get_model('fundraising', 'GeneratedDataset')
+    GeneratedDataset.objects.update(status='completed', progress=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('fundraising', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetconfiguration',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dataset_configurations', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='contacts_file',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='error_message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='transactions_file',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='generateddataset',
+            name='data',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_completed, migrations.RunPython.noop),
+    ]
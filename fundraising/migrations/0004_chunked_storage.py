@@ -0,0 +1,145 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:56
+
+import hashlib
+import json
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+FORMATS = {'.csv.gz': 'csv.gz', '.parquet': 'parquet', '.csv': 'csv'}
+
+
+def _file_format(name):
+    for extension, file_format in FORMATS.items():
+        if name.endswith(extension):
+            return file_format
+    return 'csv'
+
+
+def _describe_file(name):
+    """Build a single-chunk table manifest for an existing file"""
+    import pandas as pd
+
+    file_format = _file_format(name)
+    digest = hashlib.sha256()
+    with default_storage.open(name, 'rb') as f:
+        for block in iter(lambda: f.read(256 * 1024), b''):
+            digest.update(block)
+    with default_storage.open(name, 'rb') as f:
+        if file_format == 'parquet':
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(f)
+            rows = parquet_file.metadata.num_rows
+            columns = parquet_file.schema_arrow.names
+            dtypes = {}
+        else:
+            rows, columns, dtypes = 0, None, {}
+            compression = 'gzip' if file_format == 'csv.gz' else None
+            for frame in pd.read_csv(f, compression=compression, chunksize=100_000):
+                if columns is None:
+                    columns = list(frame.columns)
+                    dtypes = {column: str(dtype) for column, dtype in frame.dtypes.items()}
+                rows += len(frame)
+    return {
+        'format': file_format,
+        'columns': columns or [],
+        'dtypes': dtypes,
+        'chunks': [{
+            'name': name,
+            'rows': rows,
+            'bytes': default_storage.size(name),
+            'sha256': digest.hexdigest(),
+        }],
+    }
+
+
+def _store_records(dataset_id, table, records):
+    """Write legacy JSON records of one table as a CSV chunk"""
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(records)
+    content = frame.to_csv(index=False).encode()
+    name = default_storage.save(f'datasets/{dataset_id}/{table}/part-00000.csv', ContentFile(content))
+    return {
+        'format': 'csv',
+        'columns': list(frame.columns),
+        'dtypes': {column: str(dtype) for column, dtype in frame.dtypes.items()},
+        'chunks': [{
+            'name': name,
+            'rows': len(frame),
+            'bytes': len(content),
+            'sha256': hashlib.sha256(content).hexdigest(),
+        }],
+    }
+
+
+def move_payloads_to_storage(apps, schema_editor):
+    GeneratedDataset = apps.get_model('fundraising', 'GeneratedDataset')
+    for dataset in GeneratedDataset.objects.iterator():
+        manifest = {}
+        files = {'transactions': dataset.transactions_file, 'contacts': dataset.contacts_file}
+        if any(files.values()):
+            for table, name in files.items():
+                if name and default_storage.exists(name):
+                    manifest[table] = _describe_file(name)
+        elif dataset.data is not None:
+            data = dataset.data
+            if isinstance(data, dict) and any(isinstance(data.get(t), list) for t in ('transactions', 'contacts')):
+                for table in ('transactions', 'contacts'):
+                    if isinstance(data.get(table), list):
+                        manifest[table] = _store_records(dataset.id, table, data[table])
+            elif isinstance(data, list):
+                manifest['transactions'] = _store_records(dataset.id, 'transactions', data)
+            else:
+                # Unknown payload shape: keep it verbatim next to the dataset
+                content = json.dumps(data).encode()
+                name = default_storage.save(f'datasets/{dataset.id}/legacy.json', ContentFile(content))
+                manifest['legacy'] = {'format': 'json', 'columns': [], 'dtypes': {}, 'chunks': [{
+                    'name': name, 'rows': 0, 'bytes': len(content),
+                    'sha256': hashlib.sha256(content).hexdigest(),
+                }]}
+
+        dataset.manifest = manifest
+        dataset.transactions_rows = sum(c['rows'] for c in manifest.get('transactions', {}).get('chunks', []))
+        dataset.contacts_rows = sum(c['rows'] for c in manifest.get('contacts', {}).get('chunks', []))
+        dataset.size_bytes = sum(c['bytes'] for t in manifest.values() for c in t['chunks'])
+        dataset.save(update_fields=['manifest', 'transactions_rows', 'contacts_rows', 'size_bytes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraising', '0003_dataset_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generateddataset',
+            name='contacts_rows',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='manifest',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='transactions_rows',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(move_payloads_to_storage, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='generateddataset',
+            name='contacts_file',
+        ),
+        migrations.RemoveField(
+            model_name='generateddataset',
+            name='data',
+        ),
+        migrations.RemoveField(
+            model_name='generateddataset',
+            name='transactions_file',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraising', '0004_chunked_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generateddataset',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
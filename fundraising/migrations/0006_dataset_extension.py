@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraising', '0005_dataset_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generateddataset',
+            name='lineage',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='extensions', to='fundraising.generateddataset'),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='snapshot',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraising', '0006_dataset_extension'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generateddataset',
+            name='sql_tables',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
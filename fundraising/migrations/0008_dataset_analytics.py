@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraising', '0007_dataset_sql_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generateddataset',
+            name='analytics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fundraising', '0008_dataset_analytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('labels', models.CharField(blank=True, max_length=255)),
+                ('value', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='metriccounter',
+            constraint=models.UniqueConstraint(fields=('name', 'labels'), name='unique_metric_counter'),
+        ),
+    ]
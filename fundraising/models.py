@@ -1,11 +1,78 @@
+from django.conf import settings
 from django.db import models
 
 class DatasetConfiguration(models.Model):
     name = models.CharField(max_length=100)
     config = models.JSONField()
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='dataset_configurations'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
 class GeneratedDataset(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_PROCESSING = 'processing'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_EVICTED = 'evicted'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_EVICTED, 'Evicted'),
+    ]
+
     configuration = models.ForeignKey(DatasetConfiguration, on_delete=models.CASCADE)
-    data = models.JSONField()
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    # Set on datasets extended from an earlier one. Extensions reuse their
+    # parent's transaction chunk files; lineage is the id of the first
+    # dataset of the chain and scopes that file sharing.
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='extensions'
+    )
+    lineage = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    # Table chunk files, schema and checksums; see fundraising/storage.py
+    manifest = models.JSONField(default=dict, blank=True)
+    transactions_rows = models.BigIntegerField(default=0)
+    contacts_rows = models.BigIntegerField(default=0)
+    # Generator state saved after the run, used to extend the dataset
+    snapshot = models.CharField(max_length=255, blank=True)
+    # {table: name} of the SQL tables loaded when DATASET_SQL_SINK is on
+    sql_tables = models.JSONField(default=dict, blank=True)
+    # Aggregates served by the analytics endpoint, computed on first request
+    analytics = models.JSONField(default=dict, blank=True)
+    # Request and generation stage timings, memory and row counts
+    metrics = models.JSONField(default=dict, blank=True)
+    config_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    size_bytes = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_accessed_at = models.DateTimeField(null=True, blank=True)
+
+class DatasetCacheStats(models.Model):
+    """Singleton row of dataset cache counters"""
+    hits = models.BigIntegerField(default=0)
+    misses = models.BigIntegerField(default=0)
+    evictions = models.BigIntegerField(default=0)
+
+class MetricCounter(models.Model):
+    """Monotonic Prometheus sample, incremented as requests and runs finish"""
+    name = models.CharField(max_length=100)
+    # Labels as canonical JSON, so each label set is one row
+    labels = models.CharField(max_length=255, blank=True)
+    value = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['name', 'labels'], name='unique_metric_counter')]
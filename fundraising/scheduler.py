@@ -0,0 +1,138 @@
+"""Fair scheduling of generation jobs across users.
+
+Every user's jobs run on the same worker processes. Three rules keep one
+user from starving the others:
+
+- A user may have GENERATION_USER_MAX_PENDING jobs queued or processing;
+  further submissions are refused with a Retry-After hint
+  (submission_retry_after).
+- At most GENERATION_USER_MAX_RUNNING jobs of a user are processed at
+  once, and the processing jobs together must fit the CPU and memory
+  budgets (GENERATION_CPU_BUDGET, GENERATION_MEMORY_BUDGET).
+- Queued jobs are taken in the order of a weighted fair queue: a job's
+  virtual finish time is the estimated seconds of its user's processing
+  jobs and of the user's queued jobs up to and including it, divided by
+  the user's weight, minus the time it has waited. Light users and cheap
+  jobs go first, and waiting ages every job to the front eventually.
+
+Costs come from the estimate recorded on the job at submission. All state
+is read from the dataset rows, so every worker process, and every
+run_generation_worker instance, schedules against the same numbers.
+"""
+import math
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import GeneratedDataset
+
+# Queued jobs considered per scheduling decision, oldest first
+CANDIDATES = 500
+# Extra resident memory of each shard worker process of a job
+SHARD_PROCESS_BYTES = 150 * 2 ** 20
+# Costs of jobs queued without an estimate
+DEFAULT_SECONDS = 60.0
+DEFAULT_MEMORY_BYTES = 300 * 2 ** 20
+# Bounds of the Retry-After hint, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 3600
+
+JOB_FIELDS = {
+    'id': 'id',
+    'user': 'configuration__created_by_id',
+    'staff': 'configuration__created_by__is_staff',
+    'seconds': 'metrics__estimate__seconds',
+    'memory_bytes': 'metrics__estimate__memory_bytes',
+    'created_at': 'created_at',
+    'started_at': 'started_at',
+}
+
+
+def _jobs(queryset):
+    jobs = []
+    for row in queryset.values_list(*JOB_FIELDS.values()):
+        job = dict(zip(JOB_FIELDS, row))
+        job['seconds'] = float(job['seconds'] or DEFAULT_SECONDS)
+        job['memory_bytes'] = int(job['memory_bytes'] or DEFAULT_MEMORY_BYTES)
+        jobs.append(job)
+    return jobs
+
+
+def job_cpu():
+    """Cores a processing job holds: one per shard worker"""
+    return max(1, settings.GENERATION_SHARD_WORKERS)
+
+
+def job_memory(job):
+    return job['memory_bytes'] + (job_cpu() - 1) * SHARD_PROCESS_BYTES
+
+
+def user_weight(job):
+    return settings.GENERATION_STAFF_WEIGHT if job['staff'] else 1.0
+
+
+def _remaining(job, now):
+    """Estimated seconds until a job finishes"""
+    if job['started_at'] is None:
+        return job['seconds']
+    return max(0.0, job['seconds'] - (now - job['started_at']).total_seconds())
+
+
+def claim_order():
+    """Ids of the queued jobs that may start now, best first.
+
+    Jobs of users at their running cap are skipped. The list stops at the
+    first job that does not fit the CPU or memory budget, so smaller jobs
+    cannot keep a large one waiting forever. A job larger than the whole
+    budget still runs, alone.
+    """
+    now = timezone.now()
+    running = _jobs(GeneratedDataset.objects.filter(status=GeneratedDataset.STATUS_PROCESSING))
+    queued = _jobs(
+        GeneratedDataset.objects.filter(status=GeneratedDataset.STATUS_QUEUED).order_by('created_at', 'id')[:CANDIDATES]
+    )
+
+    running_jobs = {}
+    backlog = {}
+    for job in running:
+        running_jobs[job['user']] = running_jobs.get(job['user'], 0) + 1
+        backlog[job['user']] = backlog.get(job['user'], 0.0) + _remaining(job, now)
+
+    finish = {}
+    for job in queued:
+        backlog[job['user']] = backlog.get(job['user'], 0.0) + job['seconds']
+        waited = (now - job['created_at']).total_seconds()
+        finish[job['id']] = backlog[job['user']] / user_weight(job) - waited
+
+    cpu = len(running) * job_cpu()
+    memory = sum(job_memory(job) for job in running)
+    order = []
+    for job in sorted(queued, key=lambda job: (finish[job['id']], job['created_at'], job['id'])):
+        if running_jobs.get(job['user'], 0) >= settings.GENERATION_USER_MAX_RUNNING:
+            continue
+        fits = (
+            cpu + job_cpu() <= settings.GENERATION_CPU_BUDGET
+            and memory + job_memory(job) <= settings.GENERATION_MEMORY_BUDGET
+        )
+        if running and not fits:
+            break
+        order.append(job['id'])
+    return order
+
+
+def submission_retry_after(user):
+    """Seconds before user may queue another job, None when they may now.
+
+    The hint is the estimated time until the first of the user's pending
+    jobs finishes. Two simultaneous submissions can both pass the check,
+    so the cap may be exceeded by a job or two.
+    """
+    pending = _jobs(GeneratedDataset.objects.filter(
+        configuration__created_by=user,
+        status__in=[GeneratedDataset.STATUS_QUEUED, GeneratedDataset.STATUS_PROCESSING],
+    ))
+    if len(pending) < settings.GENERATION_USER_MAX_PENDING:
+        return None
+    now = timezone.now()
+    wait = min(_remaining(job, now) for job in pending)
+    return min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, math.ceil(wait)))
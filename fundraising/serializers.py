@@ -1,7 +1,17 @@
 from rest_framework import serializers
-from .models import DatasetConfiguration, GeneratedDataset
+from .models import DatasetConfiguration
 
 class DatasetConfigurationSerializer(serializers.ModelSerializer):
     class Meta:
         model = DatasetConfiguration
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        read_only_fields = ['created_by']
+
+class ConfigEstimateSerializer(serializers.Serializer):
+    """A config to estimate, as a YAML string or a mapping"""
+    config = serializers.JSONField()
+
+class ConfigPreviewSerializer(serializers.Serializer):
+    """A config to preview and the approximate number of rows to generate"""
+    config = serializers.JSONField()
+    rows = serializers.IntegerField(required=False, min_value=100, max_value=50_000)
@@ -0,0 +1,195 @@
+"""Load generated tables into SQL tables of the project database.
+
+With DATASET_SQL_SINK enabled every table of a dataset is also written to
+fundraising_dataset_<id>_<table> while it is generated. PostgreSQL tables
+are filled with COPY FROM STDIN, one in-memory CSV block per chunk; other
+backends (SQLite in development) get executemany batches. Indexes are
+created once a table is loaded, which is much cheaper than maintaining
+them row by row.
+"""
+import io
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .generator.writers import DATE_COLUMNS, TableWriter, arrow_table
+
+# Columns indexed after loading, when the table has them
+SQL_INDEXES = {
+    'transactions': ('contact_id', 'campaign_id', 'date'),
+    'contacts': ('contact_id',),
+    'campaigns': ('campaign_id',),
+}
+
+
+def sql_database():
+    return getattr(settings, 'DATASET_SQL_DATABASE', 'default')
+
+
+def sql_table_name(dataset_id, table):
+    return f'fundraising_dataset_{dataset_id}_{table}'
+
+
+def _sql_type(name, arrow_type):
+    import pyarrow as pa
+
+    if name in DATE_COLUMNS or pa.types.is_date(arrow_type):
+        return 'date'
+    if pa.types.is_timestamp(arrow_type):
+        return 'timestamp'
+    if pa.types.is_boolean(arrow_type):
+        return 'boolean'
+    if pa.types.is_integer(arrow_type):
+        return {8: 'smallint', 16: 'smallint', 32: 'integer'}.get(arrow_type.bit_width, 'bigint')
+    if pa.types.is_floating(arrow_type):
+        return 'real' if arrow_type.bit_width <= 32 else 'double precision'
+    return 'text'
+
+
+def _plain_table(frame):
+    """Arrow table of a chunk with categoricals decoded"""
+    import pyarrow as pa
+
+    table = arrow_table(frame, dictionaries=False)
+    for index, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(index, field.name, table.column(index).cast(field.type.value_type))
+    return table
+
+
+class SqlTableWriter(TableWriter):
+    """Write a table into a new SQL table, replacing any previous one.
+
+    copy_from names an existing table whose rows are copied in first, as
+    an extension does with its parent's transactions.
+    """
+
+    def __init__(self, name, table, using=None, copy_from=None, batch_rows=100_000):
+        super().__init__(name, batch_rows=batch_rows)
+        self.table = table
+        self.connection = connections[using or sql_database()]
+        self.copy_from = copy_from
+        self.columns = None
+        self._created = False
+
+    @property
+    def quoted_name(self):
+        return self.connection.ops.quote_name(self.path)
+
+    def _write_frame(self, frame):
+        table = _plain_table(frame)
+        if not self._created:
+            self._create(table.schema)
+        if not table.num_rows:
+            return
+        if self.connection.vendor == 'postgresql':
+            self._copy(table)
+        else:
+            self._insert(table)
+
+    def _create(self, schema):
+        quote = self.connection.ops.quote_name
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.quoted_name}')
+            if schema is None:
+                # Nothing new to write: take the copied table as it is
+                cursor.execute(f'CREATE TABLE {self.quoted_name} AS SELECT * FROM {quote(self.copy_from)}')
+                description = self.connection.introspection.get_table_description(cursor, self.path)
+                self.columns = [column.name for column in description]
+            else:
+                columns = ', '.join(f'{quote(field.name)} {_sql_type(field.name, field.type)}' for field in schema)
+                cursor.execute(f'CREATE TABLE {self.quoted_name} ({columns})')
+                self.columns = list(schema.names)
+                if self.copy_from:
+                    columns = ', '.join(quote(column) for column in self.columns)
+                    cursor.execute(
+                        f'INSERT INTO {self.quoted_name} ({columns}) SELECT {columns} FROM {quote(self.copy_from)}'
+                    )
+        self._created = True
+
+    def _copy(self, table):
+        import pyarrow.csv as pv
+
+        buffer = io.BytesIO()
+        pv.write_csv(table, buffer, pv.WriteOptions(include_header=False))
+        buffer.seek(0)
+        columns = ', '.join(self.connection.ops.quote_name(column) for column in self.columns)
+        sql = f'COPY {self.quoted_name} ({columns}) FROM STDIN WITH (FORMAT csv)'
+        with self.connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):
+                raw.copy_expert(sql, buffer)
+            else:
+                # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getbuffer())
+
+    def _insert(self, table):
+        import pyarrow as pa
+
+        columns = []
+        for column in table.columns:
+            if pa.types.is_date(column.type) or pa.types.is_timestamp(column.type):
+                column = column.cast(pa.string())
+            columns.append(column.to_pylist())
+        quote = self.connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            self.quoted_name, ', '.join(quote(column) for column in self.columns), ', '.join(['%s'] * len(self.columns))
+        )
+        rows = list(zip(*columns))
+        with transaction.atomic(using=self.connection.alias), self.connection.cursor() as cursor:
+            for start in range(0, len(rows), 10_000):
+                cursor.executemany(sql, rows[start:start + 10_000])
+
+    def close(self):
+        super().close()
+        if not self._created:
+            if not self.copy_from:
+                return
+            self._create(None)
+        quote = self.connection.ops.quote_name
+        with self.connection.cursor() as cursor:
+            for column in SQL_INDEXES.get(self.table, ()):
+                if column in self.columns:
+                    index = quote(f'{self.path}_{column}')
+                    cursor.execute(f'CREATE INDEX {index} ON {self.quoted_name} ({quote(column)})')
+            if self.connection.vendor == 'postgresql':
+                cursor.execute(f'ANALYZE {self.quoted_name}')
+
+
+class TeeTableWriter:
+    """Send every chunk to a primary writer and to additional sinks"""
+
+    def __init__(self, writer, *sinks):
+        self.writer = writer
+        self.sinks = sinks
+
+    @property
+    def rows(self):
+        return self.writer.rows
+
+    def write(self, frame):
+        self.writer.write(frame)
+        for sink in self.sinks:
+            sink.write(frame)
+
+    def close(self):
+        self.writer.close()
+        for sink in self.sinks:
+            sink.close()
+
+    def manifest(self):
+        return self.writer.manifest()
+
+
+def drop_sql_tables(names, using=None):
+    connection = connections[using or sql_database()]
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(f'DROP TABLE IF EXISTS {connection.ops.quote_name(name)}')
+
+
+def sql_table_exists(name, using=None):
+    connection = connections[using or sql_database()]
+    with connection.cursor() as cursor:
+        return name in connection.introspection.table_names(cursor)
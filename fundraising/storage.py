@@ -0,0 +1,244 @@
+"""Chunked file storage for generated datasets.
+
+Each table of a dataset is stored as a sequence of chunk files on the
+default storage backend. The dataset row only keeps the manifest:
+
+    {table: {'format': 'parquet', 'columns': [...], 'chunks': [
+        {'name': ..., 'rows': ..., 'bytes': ..., 'sha256': ...,
+         'stats': {'date': [min, max], 'donation_amount': [min, max]}}, ...]}}
+
+CSV chunks carry the header only in the first chunk and csv.gz chunks are
+independent gzip members, so for those formats the chunks concatenated
+byte for byte form one valid file. An extended dataset lists its parent's
+transaction chunks followed by its own, so chunk files can be shared.
+
+Filtered reads skip the chunks whose stats exclude the filter, and
+Parquet chunks on a local filesystem are memory-mapped.
+
+Chunks are written by chunk_writer.ChunkedTableWriter. This module only
+lists, reads and deletes them and imports pandas when a chunk is parsed,
+so web processes can serve status and byte downloads without it.
+"""
+import tempfile
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from .streaming import FILE_BLOCK_SIZE, TEXT_COLUMNS
+
+TABLES = ('transactions', 'contacts', 'campaigns')
+# Tables an extension appends to; the contacts table is rewritten
+APPENDED_TABLES = ('transactions', 'campaigns')
+# Columns whose min/max is recorded per chunk; dates as ISO strings
+STATS_COLUMNS = ('date', 'donation_amount')
+
+
+def chunk_rows():
+    return getattr(settings, 'DATASET_CHUNK_ROWS', 500_000)
+
+
+def parquet_compression():
+    return getattr(settings, 'DATASET_PARQUET_COMPRESSION', 'zstd')
+
+
+def chunk_stats(frame):
+    """Min and max of the STATS_COLUMNS of a chunk"""
+    stats = {}
+    for column in STATS_COLUMNS:
+        if column in frame.columns and len(frame):
+            stats[column] = [_stat_value(frame[column].min()), _stat_value(frame[column].max())]
+    return stats
+
+
+def _stat_value(value):
+    if hasattr(value, 'date'):
+        return value.date().isoformat()
+    return float(value)
+
+
+def table_rows(table_manifest):
+    return sum(chunk['rows'] for chunk in table_manifest.get('chunks', []))
+
+
+def table_bytes(table_manifest):
+    return sum(chunk['bytes'] for chunk in table_manifest.get('chunks', []))
+
+
+def is_concatenable(table_manifest):
+    """True when the chunk bytes joined together form one valid file"""
+    return table_manifest['format'] in ('csv', 'csv.gz') or len(table_manifest['chunks']) == 1
+
+
+def iter_table_bytes(table_manifest, start=0, end=None, storage=None):
+    """Yield bytes start..end (inclusive) of the concatenated chunk files"""
+    storage = storage or default_storage
+    end = table_bytes(table_manifest) - 1 if end is None else end
+    position = 0
+    for chunk in table_manifest['chunks']:
+        chunk_start, chunk_end = position, position + chunk['bytes'] - 1
+        position += chunk['bytes']
+        if chunk_end < start:
+            continue
+        if chunk_start > end:
+            break
+        with storage.open(chunk['name'], 'rb') as f:
+            f.seek(max(0, start - chunk_start))
+            remaining = min(end, chunk_end) - max(start, chunk_start) + 1
+            while remaining > 0:
+                block = f.read(min(FILE_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                yield block
+
+
+def iter_table_frames(table_manifest, columns=None, offset=0, limit=None, batch_rows=50_000, storage=None,
+                      filters=None):
+    """Yield DataFrame chunks of a stored table with projection, filtering and paging.
+
+    filters maps STATS_COLUMNS to inclusive (low, high) bounds, either of
+    which may be None; dates are ISO strings. Offset and limit count the
+    rows left by the filters. Chunk files whose stats exclude a filter,
+    or that lie wholly before offset when nothing is filtered, are
+    skipped using the manifest, without being opened.
+    """
+    storage = storage or default_storage
+    if limit is not None and limit <= 0:
+        return
+    all_columns = table_manifest['columns']
+    output_format = table_manifest['format']
+    read_columns = columns
+    if columns and filters:
+        read_columns = columns + [column for column in filters if column not in columns]
+    for index, chunk in enumerate(table_manifest['chunks']):
+        if not filters and offset >= chunk['rows']:
+            offset -= chunk['rows']
+            continue
+        if filters and _excluded(chunk.get('stats', {}), filters):
+            continue
+        path = _local_path(storage, chunk['name']) if output_format == 'parquet' else None
+        with (nullcontext(path) if path else storage.open(chunk['name'], 'rb')) as f:
+            for frame in _read_chunk(f, output_format, index == 0, all_columns, read_columns, batch_rows):
+                if filters:
+                    frame = frame[_filter_mask(frame, filters)]
+                    if read_columns != columns:
+                        frame = frame[columns]
+                if offset >= len(frame):
+                    offset -= len(frame)
+                    continue
+                if offset:
+                    frame = frame.iloc[offset:]
+                    offset = 0
+                if limit is not None:
+                    frame = frame.iloc[:limit]
+                    limit -= len(frame)
+                yield frame.reset_index(drop=True)
+                if limit == 0:
+                    return
+
+
+def _excluded(stats, filters):
+    """True when a chunk's stats show no row can pass the filters"""
+    for column, (low, high) in filters.items():
+        if column not in stats:
+            continue
+        minimum, maximum = stats[column]
+        if (low is not None and maximum < low) or (high is not None and minimum > high):
+            return True
+    return False
+
+
+def _filter_mask(frame, filters):
+    import numpy as np
+
+    mask = np.ones(len(frame), dtype=bool)
+    for column, (low, high) in filters.items():
+        values = frame[column]
+        if column == 'date':
+            # Parquet dates are datetime64, CSV dates ISO strings
+            if values.dtype.kind == 'M':
+                low = np.datetime64(low) if low is not None else None
+                high = np.datetime64(high) if high is not None else None
+            else:
+                values = values.astype(str).str[:10]
+        if low is not None:
+            mask &= (values >= low).to_numpy()
+        if high is not None:
+            mask &= (values <= high).to_numpy()
+    return mask
+
+
+def _local_path(storage, name):
+    """Filesystem path of a stored file, None when the backend has none"""
+    try:
+        return storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+def _read_chunk(f, output_format, has_header, all_columns, columns, batch_rows):
+    """Parse a chunk from a file object, or from a local path (memory-mapped Parquet)"""
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+        with pq.ParquetFile(f, memory_map=isinstance(f, str)) as parquet_file:
+            for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+                yield batch.to_pandas(date_as_object=False)
+        return
+
+    import pandas as pd
+
+    frames = pd.read_csv(
+        f,
+        header=0 if has_header else None,
+        names=None if has_header else all_columns,
+        usecols=columns,
+        dtype={column: str for column in TEXT_COLUMNS if column in all_columns},
+        compression='gzip' if output_format == 'csv.gz' else None,
+        chunksize=batch_rows,
+    )
+    for frame in frames:
+        yield frame[columns] if columns else frame
+
+
+def manifest_files(manifest):
+    return {chunk['name'] for table_manifest in manifest.values() for chunk in table_manifest.get('chunks', [])}
+
+
+def delete_manifest_files(manifest, keep=(), storage=None):
+    """Delete the chunk files of a manifest, except those named in keep"""
+    for name in manifest_files(manifest) - set(keep):
+        delete_file(name, storage)
+
+
+def delete_file(name, storage=None):
+    storage = storage or default_storage
+    if name and storage.exists(name):
+        storage.delete(name)
+
+
+def manifest_files_exist(manifest, storage=None):
+    storage = storage or default_storage
+    return all(storage.exists(name) for name in manifest_files(manifest))
+
+
+def save_snapshot_file(prefix, generator, storage=None):
+    """Store a generator snapshot; return its name and size in bytes"""
+    from .generator.snapshot import save_snapshot
+
+    storage = storage or default_storage
+    with tempfile.TemporaryFile() as buffer:
+        save_snapshot(generator, buffer)
+        size = buffer.tell()
+        buffer.seek(0)
+        name = storage.save(f'{prefix}/snapshot.npz', File(buffer, name='snapshot.npz'))
+    return name, size
+
+
+def open_snapshot_file(name, storage=None):
+    """Open a stored snapshot, or return None when it is gone"""
+    storage = storage or default_storage
+    if not name or not storage.exists(name):
+        return None
+    return storage.open(name, 'rb')
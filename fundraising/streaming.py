@@ -0,0 +1,161 @@
+"""Streaming encoders for dataset downloads.
+
+Everything here works on iterators of DataFrames or byte strings so that
+a download never holds more than one chunk of a table in memory.
+"""
+import re
+import zlib
+
+FILE_BLOCK_SIZE = 256 * 1024
+
+DOWNLOAD_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'ndjson': ('application/x-ndjson', '.ndjson'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+
+# Read back as text so that IDs and phone numbers keep their leading zeros
+TEXT_COLUMNS = [
+    'contact_id', 'channel', 'campaign_name', 'campaign_type', 'payment_method',
+    'first_name', 'last_name', 'email', 'phone', 'address',
+]
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """Parse a single 'bytes=' Range header.
+
+    Returns (start, end) inclusive, None when the header is absent or not
+    a single range (the whole file is served), and raises ValueError when
+    the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            raise ValueError('Unsatisfiable range')
+        start, end = max(0, size - length), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+
+def accepts_gzip(header):
+    """True when an Accept-Encoding header accepts gzip with a non-zero quality"""
+    qualities = {}
+    for coding in (header or '').split(','):
+        name, *params = [part.strip() for part in coding.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            qualities[name.lower()] = quality
+    # An explicit gzip entry overrides the wildcard
+    quality = qualities.get('gzip', qualities.get('x-gzip', qualities.get('*', 0.0)))
+    return quality > 0
+
+
+def encode_csv(frames):
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header).encode()
+        header = False
+
+
+def encode_ndjson(frames):
+    for frame in frames:
+        if len(frame):
+            text = frame.to_json(orient='records', lines=True, date_format='iso')
+            yield (text if text.endswith('\n') else text + '\n').encode()
+
+
+class _ByteSink:
+    """Write-only file object that hands written bytes to a generator"""
+
+    def __init__(self):
+        self.blocks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.blocks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        blocks, self.blocks = self.blocks, []
+        return b''.join(blocks)
+
+
+def encode_parquet(frames):
+    import pyarrow.parquet as pq
+    from .generator.writers import PARQUET_COMPRESSION, arrow_table
+
+    sink = _ByteSink()
+    writer = None
+    for frame in frames:
+        table = arrow_table(frame, writer.schema if writer is not None else None)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema, compression=PARQUET_COMPRESSION)
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'ndjson': encode_ndjson,
+    'parquet': encode_parquet,
+}
+
+
+def gzip_stream(blocks, level=6):
+    """Compress a byte stream into gzip framing on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def gunzip_stream(blocks):
+    """Inflate a gzip byte stream made of one or more members"""
+    decompressor = zlib.decompressobj(31)
+    for block in blocks:
+        while block:
+            data = decompressor.decompress(block)
+            if data:
+                yield data
+            if not decompressor.eof:
+                break
+            # Chunked csv.gz tables are concatenated gzip members
+            block = decompressor.unused_data
+            decompressor = zlib.decompressobj(31)
+    yield decompressor.flush()
@@ -0,0 +1,81 @@
+import shutil
+import tempfile
+
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from ..analytics import compute_analytics
+from ..jobs import enqueue_generation, run_job
+from ..models import DatasetConfiguration, GeneratedDataset
+from ..storage import iter_table_frames
+
+CONFIG = {
+    'FIRST_YEAR': 2020, 'YEARS': 3, 'SEED': 5,
+    'CHANNELS': {
+        'mail': {
+            'payment': {'cheque': 2, 'card': 1},
+            'campaigns': {'prospecting': {'nb': 2, 'max_reach_contact': 1500}, 'retention': {'nb': 3}},
+        },
+        'phone': {
+            'payment': {'card': 1, 'sepa': 1},
+            'campaigns': {'prospecting': {'nb': 1, 'max_reach_contact': 800}, 'retention': {'nb': 2}},
+        },
+    },
+}
+
+
+class AnalyticsTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root, DATASET_SQL_SINK=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create(username='owner')
+
+    def _manifest(self, config):
+        configuration = DatasetConfiguration.objects.create(name='test', config=config, created_by=self.user)
+        dataset = enqueue_generation(configuration)
+        with self.assertLogs('fundraising', 'INFO'):
+            self.assertTrue(run_job(dataset.id))
+        return GeneratedDataset.objects.get(id=dataset.id).manifest
+
+
+class DonorCountTests(AnalyticsTestCase):
+    def test_donors_match_the_stored_transactions(self):
+        for schema in ('wide', 'compact'):
+            with self.subTest(schema=schema):
+                manifest = self._manifest({**CONFIG, 'SCHEMA': schema})
+                transactions = pd.concat(iter_table_frames(manifest['transactions']), ignore_index=True)
+                transactions['payment_method'] = transactions['payment_method'].astype(str)
+
+                analytics = compute_analytics(manifest)
+                self.assertEqual(analytics['donors'], transactions['contact_id'].nunique())
+                donors = transactions.groupby('payment_method')['contact_id'].nunique()
+                self.assertEqual(
+                    {record['payment_method']: record['donors'] for record in analytics['payment_methods']},
+                    donors.to_dict(),
+                )
+
+
+class CampaignKeyTests(AnalyticsTestCase):
+    def test_campaigns_sharing_a_name_are_kept_apart(self):
+        # 200 retention campaigns a year: several start on the same day and share a name
+        config = {
+            'FIRST_YEAR': 2020, 'YEARS': 2, 'SEED': 3,
+            'CHANNELS': {'mail': {'campaigns': {
+                'prospecting': {'nb': 1, 'max_reach_contact': 2000},
+                'retention': {'nb': 200, 'transformation_rate': 0.05},
+            }}},
+        }
+        campaigns = {}
+        for schema in ('wide', 'compact'):
+            manifest = self._manifest({**config, 'SCHEMA': schema})
+            transactions = pd.concat(iter_table_frames(manifest['transactions']), ignore_index=True)
+            records = compute_analytics(manifest)['campaigns']
+            self.assertEqual(len(records), transactions['campaign_id'].nunique())
+            campaigns[schema] = {record['campaign_id']: record['transactions'] for record in records}
+        names = [record['campaign_name'] for record in records]
+        self.assertGreater(len(names), len(set(names)))
+        self.assertEqual(campaigns['wide'], campaigns['compact'])
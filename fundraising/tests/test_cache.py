@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .. import cache
+from ..jobs import run_job
+from ..models import GeneratedDataset
+from ..storage import manifest_files
+
+CONFIG = {
+    'FIRST_YEAR': 2020, 'YEARS': 1, 'SEED': 5,
+    'CHANNELS': {'mail': {'campaigns': {'prospecting': {'nb': 1, 'max_reach_contact': 200}, 'retention': {'nb': 1}}}},
+}
+
+
+@override_settings(DATASET_CACHE_ENABLED=True)
+class CacheTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root, DATASET_SQL_SINK=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.alice = User.objects.create(username='alice')
+        self.bob = User.objects.create(username='bob')
+
+    def _client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def _submit(self, user, config=CONFIG):
+        with self.assertLogs('fundraising', 'INFO'):
+            response = self._client(user).post(
+                reverse('fundraising:generate_dataset'), {'name': 'test', 'config': config}, format='json'
+            )
+        self.assertIn(response.status_code, (200, 202))
+        return GeneratedDataset.objects.get(id=response.data['dataset_id'])
+
+    def _generated(self, user, config=CONFIG):
+        dataset = self._submit(user, config)
+        with self.assertLogs('fundraising', 'INFO'):
+            self.assertTrue(run_job(dataset.id))
+        return GeneratedDataset.objects.get(id=dataset.id)
+
+    def assertFilesExist(self, dataset, exist=True):
+        for name in manifest_files(dataset.manifest):
+            self.assertEqual(default_storage.exists(name), exist, name)
+
+
+class LookupTests(CacheTestCase):
+    def test_owner_gets_their_dataset(self):
+        first = self._submit(self.alice)
+        self.assertEqual(self._submit(self.alice).id, first.id)
+        self.assertEqual(GeneratedDataset.objects.count(), 1)
+
+    def test_pending_jobs_of_other_users_are_not_shared(self):
+        first = self._submit(self.alice)
+        second = self._submit(self.bob)
+        self.assertNotEqual(second.id, first.id)
+        self.assertEqual(second.configuration.created_by, self.bob)
+        self.assertEqual(second.status, GeneratedDataset.STATUS_QUEUED)
+
+    def test_other_users_get_a_clone(self):
+        source = self._generated(self.alice)
+        dataset = self._submit(self.bob)
+        self.assertNotEqual(dataset.id, source.id)
+        self.assertEqual(dataset.configuration.created_by, self.bob)
+        self.assertEqual(dataset.status, GeneratedDataset.STATUS_COMPLETED)
+        self.assertEqual(dataset.manifest, source.manifest)
+        self.assertEqual(dataset.lineage, source.id)
+        self.assertEqual(dataset.metrics['cloned_from'], source.id)
+        self.assertEqual(cache.cache_stats()['hits'], 1)
+
+        # Bob's next submission reuses his clone
+        self.assertEqual(self._submit(self.bob).id, dataset.id)
+
+
+class EvictionTests(CacheTestCase):
+    def test_evict_deletes_files(self):
+        dataset = self._generated(self.alice)
+        self.assertFilesExist(dataset)
+        self.assertEqual(cache.shared_files(dataset), set())
+        cache.evict(dataset)
+        self.assertFilesExist(dataset, exist=False)
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.status, GeneratedDataset.STATUS_EVICTED)
+        self.assertEqual(dataset.manifest, {})
+        self.assertEqual(cache.cache_stats()['evictions'], 1)
+
+    def test_files_of_a_clone_are_kept(self):
+        source = self._generated(self.alice)
+        clone = self._submit(self.bob)
+        shared = manifest_files(source.manifest) | {source.snapshot}
+        self.assertEqual(cache.shared_files(source), shared)
+        self.assertEqual(cache.shared_files(clone), shared)
+
+        cache.evict(source)
+        self.assertFilesExist(clone)
+        self.assertTrue(default_storage.exists(clone.snapshot))
+        self.assertEqual(cache.shared_files(clone), set())
+
+        # The last dataset listing the files deletes them
+        cache.evict(clone)
+        self.assertFilesExist(clone, exist=False)
+        self.assertFalse(default_storage.exists(clone.snapshot))
+
+    def test_missing_files_are_evicted_on_lookup(self):
+        dataset = self._generated(self.alice)
+        for name in manifest_files(dataset.manifest):
+            os.remove(default_storage.path(name))
+        self.assertNotEqual(self._submit(self.alice).id, dataset.id)
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.status, GeneratedDataset.STATUS_EVICTED)
+
+    def test_budget_evicts_least_recently_used(self):
+        now = timezone.now()
+        datasets = []
+        for seed in (1, 2, 3):
+            dataset = self._generated(self.alice, {**CONFIG, 'SEED': seed})
+            GeneratedDataset.objects.filter(id=dataset.id).update(last_accessed_at=now - timedelta(hours=seed))
+            datasets.append(dataset)
+        newest, middle, oldest = datasets
+
+        # Room for one dataset, and the oldest one is kept
+        self.assertEqual(cache.enforce_budget(max_bytes=oldest.size_bytes, keep=oldest.id), 2)
+        statuses = dict(GeneratedDataset.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {
+            newest.id: GeneratedDataset.STATUS_EVICTED,
+            middle.id: GeneratedDataset.STATUS_EVICTED,
+            oldest.id: GeneratedDataset.STATUS_COMPLETED,
+        })
+        self.assertFilesExist(oldest)
+        self.assertEqual(cache.enforce_budget(max_bytes=oldest.size_bytes), 0)
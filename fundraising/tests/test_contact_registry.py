@@ -0,0 +1,36 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from ..generator.contact_registry import ID_ALPHABET, ID_LENGTH, ID_SPACE, decode_contact_ids, encode_contact_ids
+
+
+class ContactIdTests(SimpleTestCase):
+    def _indices(self):
+        rng = np.random.default_rng(0)
+        return np.concatenate([
+            np.arange(200_000),
+            # Near the top of the id space, where the multiplications are largest
+            np.arange(ID_SPACE - 200_000, ID_SPACE),
+            rng.integers(0, ID_SPACE, size=200_000),
+        ])
+
+    def test_round_trip(self):
+        indices = self._indices()
+        np.testing.assert_array_equal(decode_contact_ids(encode_contact_ids(indices)), indices)
+
+    def test_ids_are_unique(self):
+        indices = np.unique(self._indices())
+        ids = encode_contact_ids(indices)
+        self.assertEqual(len(set(ids)), len(indices))
+
+    def test_ids_use_the_alphabet(self):
+        alphabet = set(ID_ALPHABET.tobytes().decode())
+        ids = encode_contact_ids(np.array([0, 1, ID_SPACE // 2, ID_SPACE - 1]))
+        for contact_id in ids:
+            self.assertEqual(len(contact_id), ID_LENGTH)
+            self.assertLessEqual(set(contact_id), alphabet)
+
+    def test_decode_accepts_object_arrays(self):
+        # Contact ids read back from CSV or Parquet chunks are Python strings
+        ids = encode_contact_ids(np.arange(10))
+        np.testing.assert_array_equal(decode_contact_ids(list(ids)), np.arange(10))
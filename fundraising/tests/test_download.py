@@ -0,0 +1,139 @@
+import gzip
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..jobs import enqueue_generation, run_job
+from ..models import DatasetConfiguration, GeneratedDataset
+from ..storage import iter_table_bytes, table_bytes
+from ..streaming import accepts_gzip, parse_range
+
+CONFIG = {
+    'FIRST_YEAR': 2020, 'YEARS': 1, 'SEED': 9,
+    'CHANNELS': {'mail': {'campaigns': {'prospecting': {'nb': 2, 'max_reach_contact': 1000}, 'retention': {'nb': 1}}}},
+}
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        # The end is clipped to the last byte
+        self.assertEqual(parse_range('bytes=900-5000', 1000), (900, 999))
+
+    def test_suffix_ranges(self):
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 999))
+
+    def test_whole_file_when_not_a_single_range(self):
+        for header in (None, '', 'bytes=-', 'bytes=0-10,20-30', 'items=0-10'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 1000))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=-0', 'bytes=1000-', 'bytes=2000-3000', 'bytes=50-10'):
+            with self.subTest(header=header), self.assertRaises(ValueError):
+                parse_range(header, 1000)
+
+
+class AcceptsGzipTests(SimpleTestCase):
+    def test_quality_values(self):
+        accepted = ('gzip', 'gzip, deflate, br', 'br;q=1.0, gzip;q=0.8', 'GZIP', 'x-gzip', '*', 'identity, *;q=0.5')
+        refused = (None, '', 'identity', 'br, deflate', 'gzip;q=0', 'gzip; q=0.0', 'gzip;q=0, *', '*;q=0', 'gzip;q=x')
+        for header in accepted:
+            with self.subTest(header=header):
+                self.assertTrue(accepts_gzip(header))
+        for header in refused:
+            with self.subTest(header=header):
+                self.assertFalse(accepts_gzip(header))
+
+
+class DownloadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root, DATASET_SQL_SINK=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create(username='owner')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _dataset(self, output_format):
+        configuration = DatasetConfiguration.objects.create(
+            name='test', config={**CONFIG, 'OUTPUT_FORMAT': output_format}, created_by=self.user
+        )
+        dataset = enqueue_generation(configuration)
+        with self.assertLogs('fundraising', 'INFO'):
+            self.assertTrue(run_job(dataset.id))
+        return GeneratedDataset.objects.get(id=dataset.id)
+
+    def _get(self, dataset, **headers):
+        return self.client.get(reverse('fundraising:download_dataset', args=[dataset.id]), **headers)
+
+    def _body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_range_requests(self):
+        dataset = self._dataset('csv')
+        manifest = dataset.manifest['transactions']
+        content = b''.join(iter_table_bytes(manifest))
+        size = table_bytes(manifest)
+        self.assertEqual(len(content), size)
+
+        response = self._get(dataset, HTTP_RANGE='bytes=10-109')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-109/{size}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self._body(response), content[10:110])
+
+        response = self._get(dataset, HTTP_RANGE='bytes=-64')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes {size - 64}-{size - 1}/{size}')
+        self.assertEqual(self._body(response), content[-64:])
+
+        for header in ('bytes=-0', f'bytes={size}-'):
+            with self.subTest(header=header):
+                response = self._get(dataset, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], f'bytes */{size}')
+
+        response = self._get(dataset, HTTP_RANGE='bytes=0-9,20-29')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(size))
+        self.assertEqual(self._body(response), content)
+
+    def test_gzip_follows_accept_encoding(self):
+        dataset = self._dataset('csv')
+        content = b''.join(iter_table_bytes(dataset.manifest['transactions']))
+
+        response = self._get(dataset, HTTP_ACCEPT_ENCODING='br;q=1.0, gzip;q=0.5')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(self._body(response)), content)
+
+        response = self._get(dataset, HTTP_ACCEPT_ENCODING='gzip;q=0, br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(self._body(response), content)
+
+        # Ranges address the stored bytes, which are not compressed on request
+        response = self._get(dataset, HTTP_ACCEPT_ENCODING='gzip', HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(self._body(response), content[:10])
+
+    def test_stored_gzip_is_sent_or_inflated(self):
+        dataset = self._dataset('csv.gz')
+        stored = b''.join(iter_table_bytes(dataset.manifest['transactions']))
+
+        response = self._get(dataset, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(self._body(response), stored)
+
+        response = self._get(dataset, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(self._body(response), gzip.decompress(stored))
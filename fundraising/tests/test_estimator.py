@@ -0,0 +1,53 @@
+import time
+
+from django.test import SimpleTestCase
+
+from ..generator.estimator import estimate_config
+
+
+def cross_sell_config(channels, nb, years=20):
+    names = [f'channel_{index}' for index in range(channels)]
+    return {
+        'FIRST_YEAR': 2000, 'YEARS': years,
+        'CHANNELS': {name: {'campaigns': {
+            'prospecting': {'nb': 2, 'max_reach_contact': 1000, 'transformation_rate': 0.05},
+            'retention': {'nb': nb, 'transformation_rate': 0.1, 'cross_sell': {
+                other: 0.5 for other in names if other != name
+            }},
+        }} for name in names},
+    }
+
+
+class CrossSellEstimateTests(SimpleTestCase):
+    def test_campaigns_compound_like_single_campaigns(self):
+        estimate = estimate_config({'FIRST_YEAR': 2000, 'YEARS': 1, 'CHANNELS': {
+            'mail': {'campaigns': {'prospecting': {'nb': 1, 'max_reach_contact': 1000, 'transformation_rate': 0.1}}},
+            'phone': {'campaigns': {'retention': {'nb': 3, 'transformation_rate': 0.1, 'cross_sell': {'mail': 0.5}}}},
+        }})
+        # The same three campaigns replayed one at a time
+        rate, donors, joined, transactions = 0.1, 100.0, 0.0, 0.0
+        for _ in range(3):
+            reached = joined + (donors - joined) * 0.5
+            joined += (reached - joined) * rate
+            transactions += reached * rate
+        self.assertEqual(estimate['channels']['phone']['transactions'], int(transactions))
+        self.assertEqual(estimate['channels']['phone']['campaigns'], 3)
+
+    def test_estimate_time_does_not_grow_with_nb(self):
+        start = time.perf_counter()
+        estimate = estimate_config(cross_sell_config(16, 10_000))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(estimate['campaigns'], 16 * 20 * (2 + 10_000))
+
+
+class ResumedEstimateTests(SimpleTestCase):
+    def test_resumed_run_is_charged_for_new_years(self):
+        config = cross_sell_config(3, 500, years=6)
+        parent = estimate_config({**config, 'YEARS': 4})
+        full = estimate_config(config)
+        extension = estimate_config(config, resumed_years=4)
+        for key in ('transactions', 'contacts', 'campaigns'):
+            self.assertAlmostEqual(extension[key], full[key] - parent[key], delta=len(full['channels']))
+        self.assertLess(extension['seconds'], full['seconds'])
+        self.assertEqual(extension['memory_bytes'], full['memory_bytes'])
+        self.assertEqual(estimate_config(config, resumed_years=0), full)
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from ..generator.generator import FundraisingDataGenerator
+from ..generator.schema import OUTPUT_FORMATS
+from ..generator.writers import open_table_writer
+
+CONFIG = {
+    'FIRST_YEAR': 2020, 'YEARS': 2, 'SEED': 11,
+    'CHANNELS': {
+        'mail': {
+            'payment': {'cheque': 2, 'card': 1},
+            'campaigns': {'prospecting': {'nb': 3, 'max_reach_contact': 500}, 'retention': {'nb': 2}},
+        },
+        'phone': {
+            'payment': {'card': 1, 'sepa': 1},
+            'campaigns': {'prospecting': {'nb': 2, 'max_reach_contact': 300}, 'retention': {'nb': 1}},
+        },
+    },
+}
+TABLES = ('transactions', 'contacts')
+CATEGORICAL_COLUMNS = {
+    'wide': ['channel', 'campaign_name', 'campaign_type', 'payment_method'],
+    'compact': ['payment_method'],
+}
+
+
+class GenerateTests(SimpleTestCase):
+    def test_categorical_columns_survive_concatenation(self):
+        for schema, columns in CATEGORICAL_COLUMNS.items():
+            with self.subTest(schema=schema):
+                transactions, _ = FundraisingDataGenerator({**CONFIG, 'SCHEMA': schema}).generate()
+                for column in columns:
+                    self.assertIsInstance(transactions[column].dtype, pd.CategoricalDtype, column)
+                self.assertEqual(set(transactions['payment_method']), {'cheque', 'card', 'sepa'})
+
+
+class WorkersTests(SimpleTestCase):
+    def _write(self, directory, workers, output_format):
+        generator = FundraisingDataGenerator(CONFIG, workers=workers)
+        paths = [os.path.join(directory, f'{table}-{workers}{OUTPUT_FORMATS[output_format]}') for table in TABLES]
+        writers = [open_table_writer(path, output_format) for path in paths]
+        generator.generate_to(*writers)
+        contents = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                contents.append(f.read())
+        return contents
+
+    def test_output_does_not_depend_on_workers(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for output_format in ('csv', 'parquet'):
+            with self.subTest(output_format=output_format):
+                self.assertEqual(self._write(directory, 1, output_format), self._write(directory, 2, output_format))
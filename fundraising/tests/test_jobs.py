@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from ..generator.generator import FundraisingDataGenerator
+from ..generator.profiles import ProfileGenerator
+from ..jobs import enqueue_generation, extension_config, run_job
+from ..models import DatasetConfiguration, GeneratedDataset
+from ..storage import iter_table_frames, manifest_files
+
+CONFIG = {
+    'FIRST_YEAR': 2020, 'YEARS': 2, 'SEED': 7,
+    'CHANNELS': {'mail': {'campaigns': {'prospecting': {'nb': 2, 'max_reach_contact': 2000}, 'retention': {'nb': 2}}}},
+}
+
+EXTENDED_CONFIG = {
+    'FIRST_YEAR': 2020, 'YEARS': 2, 'SEED': 13,
+    'CHANNELS': {
+        'mail': {
+            'payment': {'cheque': 2, 'card': 1},
+            'recurring': {'conversion_rate': 0.2},
+            'campaigns': {'prospecting': {'nb': 2, 'max_reach_contact': 1500}, 'retention': {'nb': 2}},
+        },
+        'phone': {'campaigns': {
+            'prospecting': {'nb': 1, 'max_reach_contact': 800},
+            'retention': {'nb': 1, 'cross_sell': {'mail': 0.5}},
+        }},
+    },
+}
+
+
+def failing_generate_to(generator, transactions_writer, *args, **kwargs):
+    """Store one transactions chunk, then fail"""
+    frame = next(iter(generator.iter_chunks()))
+    transactions_writer.write(frame)
+    transactions_writer.flush()
+    raise RuntimeError('generation failed')
+
+
+class JobTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root, DATASET_SQL_SINK=False, DATASET_SNAPSHOTS=True)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create(username='owner')
+
+    def _job(self, config, parent=None):
+        configuration = DatasetConfiguration.objects.create(name='test', config=config, created_by=self.user)
+        return enqueue_generation(configuration, parent=parent)
+
+    def _run(self, config, parent=None):
+        dataset = self._job(config, parent=parent)
+        with self.assertLogs('fundraising', 'INFO'):
+            self.assertTrue(run_job(dataset.id))
+        return GeneratedDataset.objects.get(id=dataset.id)
+
+
+class FailedJobFilesTests(JobTestCase):
+    def _stored_files(self, dataset_id):
+        directory = os.path.join(self.media_root, 'datasets', str(dataset_id))
+        return [name for _, _, names in os.walk(directory) for name in names]
+
+    def test_failed_job_deletes_its_chunks(self):
+        dataset = self._job(CONFIG)
+        with mock.patch.object(FundraisingDataGenerator, 'generate_to', failing_generate_to), \
+                self.assertLogs('fundraising', 'ERROR'):
+            self.assertFalse(run_job(dataset.id))
+        self.assertEqual(GeneratedDataset.objects.get(id=dataset.id).status, GeneratedDataset.STATUS_FAILED)
+        self.assertEqual(self._stored_files(dataset.id), [])
+
+    def test_failed_extension_keeps_parent_chunks(self):
+        parent = self._run(CONFIG)
+        extension = self._job(extension_config(parent, 1), parent=parent)
+        with mock.patch.object(FundraisingDataGenerator, 'generate_to', failing_generate_to), \
+                self.assertLogs('fundraising', 'ERROR'):
+            self.assertFalse(run_job(extension.id))
+        self.assertEqual(self._stored_files(extension.id), [])
+        for name in manifest_files(parent.manifest):
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)), name)
+
+
+class ExtensionTests(JobTestCase):
+    def _tables(self, dataset):
+        tables = {}
+        for table, manifest in dataset.manifest.items():
+            # Chunks of the parent and of the extension hold their own categories
+            tables[table] = pd.concat(
+                [chunk.astype({column: str for column in chunk.select_dtypes('category')})
+                 for chunk in iter_table_frames(manifest)],
+                ignore_index=True,
+            )
+        return tables
+
+    def test_extension_matches_full_run(self):
+        for output_format in ('csv', 'parquet'):
+            for schema in ('wide', 'compact'):
+                with self.subTest(output_format=output_format, schema=schema):
+                    config = {**EXTENDED_CONFIG, 'OUTPUT_FORMAT': output_format, 'SCHEMA': schema}
+                    parent = self._run(config)
+                    extension = self._run(extension_config(parent, 2), parent=parent)
+                    full = self._run({**config, 'YEARS': config['YEARS'] + 2})
+                    extended, expected = self._tables(extension), self._tables(full)
+                    self.assertEqual(set(extended), set(expected))
+                    for table, frame in expected.items():
+                        pd.testing.assert_frame_equal(extended[table], frame, obj=table)
+
+    def test_extension_profiles_only_new_contacts(self):
+        parent = self._run(EXTENDED_CONFIG)
+        profiled = []
+        generate = ProfileGenerator.generate
+
+        def recording_generate(profiles, contact_ids):
+            profiled.append(contact_ids)
+            return generate(profiles, contact_ids)
+
+        with mock.patch.object(ProfileGenerator, 'generate', recording_generate):
+            extension = self._run(extension_config(parent, 2), parent=parent)
+        profiled = np.concatenate(profiled)
+        self.assertEqual(len(profiled), extension.contacts_rows - parent.contacts_rows)
+        self.assertGreater(len(profiled), 0)
+        self.assertGreaterEqual(profiled.min(), parent.contacts_rows)
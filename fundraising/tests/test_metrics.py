@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .. import cache
+from ..jobs import run_job
+from ..metrics import render_metrics
+from ..models import GeneratedDataset
+
+CONFIG = {
+    'FIRST_YEAR': 2020, 'YEARS': 1, 'SEED': 11,
+    'CHANNELS': {'mail': {'campaigns': {'prospecting': {'nb': 1, 'max_reach_contact': 200}, 'retention': {'nb': 1}}}},
+}
+RUN_FAMILIES = (
+    'fundraising_generated_rows_total', 'fundraising_generation_seconds_',
+    'fundraising_generation_stage_seconds_', 'fundraising_request_stage_seconds_',
+)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root, DATASET_SQL_SINK=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='owner'))
+
+    def _generate(self):
+        with self.assertLogs('fundraising', 'INFO'):
+            response = self.client.post(
+                reverse('fundraising:generate_dataset'), {'name': 'test', 'config': CONFIG}, format='json'
+            )
+            self.assertTrue(run_job(response.data['dataset_id']))
+        return GeneratedDataset.objects.get(id=response.data['dataset_id'])
+
+    def _samples(self):
+        samples = {}
+        for line in render_metrics().splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def _rows(self, samples):
+        return sum(value for name, value in samples.items() if name.startswith('fundraising_generated_rows_total'))
+
+    def test_counters_survive_eviction(self):
+        dataset = self._generate()
+        samples = self._samples()
+        self.assertEqual(self._rows(samples), dataset.transactions_rows)
+        self.assertEqual(samples['fundraising_generation_seconds_count{status="completed"}'], 1)
+        self.assertEqual(samples['fundraising_request_stage_seconds_count{stage="enqueue"}'], 1)
+        self.assertEqual(samples['fundraising_stored_rows{table="transactions"}'], dataset.transactions_rows)
+
+        cache.evict(dataset)
+        GeneratedDataset.objects.all().delete()
+        after = self._samples()
+        self.assertEqual(after['fundraising_stored_rows{table="transactions"}'], 0)
+        for name, value in samples.items():
+            if name.startswith(RUN_FAMILIES):
+                self.assertEqual(after[name], value, name)
+
+    def test_counters_accumulate(self):
+        first = self._generate()
+        cache.evict(first)
+        # An evicted config is generated again
+        second = self._generate()
+        samples = self._samples()
+        self.assertEqual(self._rows(samples), first.transactions_rows + second.transactions_rows)
+        self.assertEqual(samples['fundraising_generation_seconds_count{status="completed"}'], 2)
@@ -0,0 +1,19 @@
+from django.test import SimpleTestCase
+
+from ..generator.parallel import SerialExecutor, bounded_map
+
+
+class BoundedMapTests(SimpleTestCase):
+    def test_items_are_drawn_at_most_window_ahead(self):
+        drawn = []
+
+        def items():
+            for item in range(10):
+                drawn.append(item)
+                yield item
+
+        results = bounded_map(SerialExecutor(), lambda value: value * 2, items(), 3)
+        for consumed, (item, result) in enumerate(results, 1):
+            self.assertEqual(result, item * 2)
+            self.assertLessEqual(len(drawn), consumed + 3)
+        self.assertEqual(consumed, 10)
@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase
+
+from ..generator.estimator import estimate_config
+from ..generator.preview import PREVIEW_RETENTION_CAMPAIGNS, preview_config
+
+CONFIG = {
+    'FIRST_YEAR': 2010, 'YEARS': 10, 'SEED': 3,
+    'CHANNELS': {f'channel_{index}': {'campaigns': {
+        'prospecting': {'nb': 4, 'max_reach_contact': 20000},
+        'retention': {'nb': 12, 'transformation_rate': 0.05},
+    }} for index in range(5)},
+}
+
+
+class PreviewConfigTests(SimpleTestCase):
+    def test_retention_campaigns_are_merged(self):
+        scaled, _ = preview_config(CONFIG)
+        for channel in scaled['CHANNELS'].values():
+            retention = channel['campaigns']['retention']
+            self.assertEqual(retention['nb'], PREVIEW_RETENTION_CAMPAIGNS)
+            self.assertAlmostEqual(retention['transformation_rate'], 0.05 * 12 / PREVIEW_RETENTION_CAMPAIGNS)
+        self.assertEqual(CONFIG['CHANNELS']['channel_0']['campaigns']['retention']['nb'], 12)
+
+    def test_campaigns_do_not_grow_with_retention_nb(self):
+        scaled, _ = preview_config(CONFIG)
+        self.assertLessEqual(estimate_config(scaled)['campaigns'], 5 * 10 * (4 + PREVIEW_RETENTION_CAMPAIGNS))
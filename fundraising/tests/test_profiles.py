@@ -0,0 +1,18 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from ..generator.profiles import ProfileGenerator
+
+
+class FakerProfilesTests(SimpleTestCase):
+    def test_profiles_depend_on_contact_not_batch(self):
+        generator = ProfileGenerator(mode='faker', salt=3)
+        first = generator.generate(np.arange(0, 4))
+        shifted = generator.generate(np.arange(2, 6))
+        self.assertEqual(first.iloc[2:].values.tolist(), shifted.iloc[:2].values.tolist())
+
+    def test_later_batches_get_other_profiles(self):
+        generator = ProfileGenerator(mode='faker', salt=3)
+        first = generator.generate(np.arange(0, 4))
+        later = generator.generate(np.arange(250_000, 250_004))
+        self.assertNotEqual(first['email'].tolist(), later['email'].tolist())
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import DatasetConfiguration, GeneratedDataset
+from ..scheduler import claim_order, submission_retry_after
+
+CONFIG = {
+    'FIRST_YEAR': 2020, 'YEARS': 1, 'SEED': 3,
+    'CHANNELS': {'mail': {'campaigns': {'prospecting': {'nb': 1, 'max_reach_contact': 100}}}},
+}
+GiB = 1024 ** 3
+
+
+@override_settings(
+    GENERATION_SHARD_WORKERS=1, GENERATION_USER_MAX_PENDING=4, GENERATION_USER_MAX_RUNNING=1,
+    GENERATION_CPU_BUDGET=8, GENERATION_MEMORY_BUDGET=8 * GiB, GENERATION_STAFF_WEIGHT=2.0,
+)
+class SchedulerTestCase(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.alice = User.objects.create(username='alice')
+        self.bob = User.objects.create(username='bob')
+        self.staff = User.objects.create(username='staff', is_staff=True)
+
+    def _job(self, user, seconds, memory_bytes=GiB, status=GeneratedDataset.STATUS_QUEUED, age=0, running_for=None):
+        configuration = DatasetConfiguration.objects.create(name='test', config=CONFIG, created_by=user)
+        dataset = GeneratedDataset.objects.create(
+            configuration=configuration, status=status,
+            metrics={'estimate': {'seconds': seconds, 'memory_bytes': memory_bytes}},
+        )
+        started_at = self.now - timedelta(seconds=running_for) if running_for is not None else None
+        # created_at is set on insert; backdate it to give jobs a queue order
+        GeneratedDataset.objects.filter(id=dataset.id).update(
+            created_at=self.now - timedelta(seconds=age), started_at=started_at
+        )
+        return dataset.id
+
+    def _running(self, user, seconds=100, memory_bytes=GiB):
+        return self._job(user, seconds, memory_bytes, status=GeneratedDataset.STATUS_PROCESSING, running_for=0)
+
+
+class ClaimOrderTests(SchedulerTestCase):
+    def test_cheaper_jobs_go_first(self):
+        slow = self._job(self.alice, 100, age=2)
+        fast = self._job(self.bob, 10, age=1)
+        self.assertEqual(claim_order(), [fast, slow])
+
+    def test_staff_jobs_are_weighted(self):
+        # 150 seconds at weight 2 finish before 100 seconds at weight 1
+        user_job = self._job(self.alice, 100, age=2)
+        staff_job = self._job(self.staff, 150, age=1)
+        self.assertEqual(claim_order(), [staff_job, user_job])
+        with self.settings(GENERATION_STAFF_WEIGHT=1.0):
+            self.assertEqual(claim_order(), [user_job, staff_job])
+
+    def test_users_at_their_running_cap_are_skipped(self):
+        self._running(self.alice)
+        alice_job = self._job(self.alice, 10, age=2)
+        bob_job = self._job(self.bob, 100, age=1)
+        self.assertEqual(claim_order(), [bob_job])
+        with self.settings(GENERATION_USER_MAX_RUNNING=2):
+            # Alice's running job counts towards her backlog
+            self.assertEqual(claim_order(), [bob_job, alice_job])
+
+    def test_cpu_budget_stops_the_order(self):
+        self._running(self.alice)
+        self._job(self.bob, 10)
+        with self.settings(GENERATION_CPU_BUDGET=1):
+            self.assertEqual(claim_order(), [])
+        with self.settings(GENERATION_CPU_BUDGET=2, GENERATION_SHARD_WORKERS=2):
+            # Each job holds two cores
+            self.assertEqual(claim_order(), [])
+
+    def test_memory_budget_stops_the_order(self):
+        self._running(self.alice, memory_bytes=3 * GiB)
+        large = self._job(self.bob, 10, memory_bytes=2 * GiB, age=2)
+        small = self._job(self.staff, 100, memory_bytes=GiB // 2, age=1)
+        with self.settings(GENERATION_MEMORY_BUDGET=4 * GiB):
+            # The large job does not fit and the smaller one may not pass it
+            self.assertEqual(claim_order(), [])
+        with self.settings(GENERATION_MEMORY_BUDGET=6 * GiB):
+            self.assertEqual(claim_order(), [large, small])
+
+    def test_job_over_the_whole_budget_runs_alone(self):
+        job = self._job(self.alice, 10, memory_bytes=16 * GiB)
+        self.assertEqual(claim_order(), [job])
+
+
+class RetryAfterTests(SchedulerTestCase):
+    def test_no_hint_below_the_pending_cap(self):
+        self._job(self.alice, 100)
+        self.assertIsNone(submission_retry_after(self.alice))
+
+    def test_hint_is_the_first_pending_job_to_finish(self):
+        # 70 seconds left on the running job, 50 on the fastest queued one
+        self._job(self.alice, 100, status=GeneratedDataset.STATUS_PROCESSING, running_for=30)
+        for seconds in (50, 80, 200):
+            self._job(self.alice, seconds)
+        self.assertEqual(submission_retry_after(self.alice), 50)
+        self.assertIsNone(submission_retry_after(self.bob))
+
+    def test_hint_is_bounded(self):
+        self._job(self.alice, 100, status=GeneratedDataset.STATUS_PROCESSING, running_for=500)
+        with self.settings(GENERATION_USER_MAX_PENDING=1):
+            self.assertEqual(submission_retry_after(self.alice), 1)
+
+    def test_submission_over_the_cap_gets_429(self):
+        for seconds in (40, 90):
+            self._job(self.alice, seconds)
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        with self.settings(GENERATION_USER_MAX_PENDING=2):
+            response = client.post(
+                reverse('fundraising:generate_dataset'),
+                {'name': 'test', 'config': CONFIG, 'use_cache': False},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '40')
+        self.assertEqual(response.data['retry_after'], 40)
+        self.assertEqual(GeneratedDataset.objects.count(), 2)
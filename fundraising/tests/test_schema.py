@@ -0,0 +1,131 @@
+import copy
+
+from django.test import SimpleTestCase
+
+from ..generator.schema import MAX_CAMPAIGNS, MAX_CHANNELS, MAX_YEARS, ConfigError, validate_config
+
+CONFIG = {
+    'FIRST_YEAR': 2020, 'YEARS': 3, 'SEED': 1, 'OUTPUT_FORMAT': 'parquet', 'SCHEMA': 'wide',
+    'CHANNELS': {
+        'mail': {
+            'duration': 60, 'cost_per_reach': 0.8, 'seasonality': 'year_end',
+            'payment': {'cheque': 2, 'card': 1},
+            'lifecycle': {'first_year_retention': 0.5, 'churn_rate': 0.2},
+            'recurring': {'conversion_rate': 0.1, 'attrition_rate': 0.02, 'payment': {'sepa': 1}},
+            'campaigns': {
+                'prospecting': {'nb': 2, 'max_reach_contact': 1000, 'transformation_rate': 0.1},
+                'retention': {'nb': 3, 'seasonality': [1] * 12},
+            },
+        },
+        'phone': {'campaigns': {'retention': {'nb': 1, 'cross_sell': {'mail': 0.5}}}},
+    },
+}
+
+
+def with_value(path, value):
+    """CONFIG with the key at a dotted path set to value"""
+    config = copy.deepcopy(CONFIG)
+    *parents, key = path.split('.')
+    mapping = config
+    for parent in parents:
+        mapping = mapping[parent]
+    mapping[key] = value
+    return config
+
+
+class ValidateConfigTests(SimpleTestCase):
+    def assertErrors(self, config, errors):
+        with self.assertRaises(ConfigError) as raised:
+            validate_config(config)
+        self.assertEqual(raised.exception.errors, errors)
+
+    def test_valid_config(self):
+        self.assertEqual(validate_config(CONFIG), [])
+
+    def test_unknown_keys_are_warnings(self):
+        config = with_value('CHANNELS.mail.campaigns.retention.colour', 'red')
+        self.assertEqual(validate_config(config), ['CHANNELS.mail.campaigns.retention.colour: unknown key, ignored'])
+
+    def test_every_error_is_reported_at_its_path(self):
+        config = with_value('YEARS', -1)
+        config['CHANNELS']['mail']['duration'] = 'long'
+        config['CHANNELS']['phone']['campaigns']['retention']['transformation_rate'] = 2
+        self.assertErrors(config, [
+            'YEARS: must be at least 0',
+            'CHANNELS.mail.duration: must be an integer',
+            'CHANNELS.phone.campaigns.retention.transformation_rate: must be at most 1',
+        ])
+
+    def test_payment(self):
+        cases = {
+            'CHANNELS.mail.payment': ([], 'must be a non-empty mapping of payment method weights'),
+            'CHANNELS.mail.payment.card': (-1, 'must be a non-negative number'),
+            'CHANNELS.mail.recurring.payment': ({'sepa': 0}, 'weights must not all be zero'),
+        }
+        for path, (value, error) in cases.items():
+            with self.subTest(path=path):
+                self.assertErrors(with_value(path, value), [f'{path}: {error}'])
+
+    def test_recurring_bounds(self):
+        cases = {
+            'conversion_rate': (1.5, 'must be at most 1'),
+            'attrition_rate': (-0.1, 'must be at least 0'),
+            'avg_donation': ('ten', 'must be a number'),
+            'std_deviation': (-1, 'must be at least 0'),
+        }
+        for key, (value, error) in cases.items():
+            with self.subTest(key=key):
+                path = f'CHANNELS.mail.recurring.{key}'
+                self.assertErrors(with_value(path, value), [f'{path}: {error}'])
+        self.assertErrors(
+            with_value('CHANNELS.mail.recurring', 0.1),
+            ['CHANNELS.mail.recurring: must be a mapping of recurring giving settings'],
+        )
+
+    def test_lifecycle_bounds(self):
+        for key in ('first_year_retention', 'repeat_retention', 'reactivation_rate', 'churn_rate'):
+            for value, error in ((1.01, 'must be at most 1'), (-0.5, 'must be at least 0'), (True, 'must be a number')):
+                with self.subTest(key=key, value=value):
+                    path = f'CHANNELS.mail.lifecycle.{key}'
+                    self.assertErrors(with_value(path, value), [f'{path}: {error}'])
+
+    def test_seasonality(self):
+        profiles = "must be one of flat, year_end or a list of 12 monthly weights"
+        cases = {
+            'CHANNELS.mail.seasonality': ('summer', profiles),
+            'CHANNELS.mail.campaigns.retention.seasonality': ([1] * 11, profiles),
+            'CHANNELS.mail.campaigns.prospecting.seasonality': (
+                [1] * 11 + [-1], 'monthly weights must be non-negative numbers'
+            ),
+            'CHANNELS.phone.campaigns.retention.seasonality': ([0] * 12, 'monthly weights must not all be zero'),
+        }
+        for path, (value, error) in cases.items():
+            with self.subTest(path=path):
+                self.assertErrors(with_value(path, value), [f'{path}: {error}'])
+
+    def test_max_channels(self):
+        channels = {f'channel_{index}': {'campaigns': {}} for index in range(MAX_CHANNELS)}
+        self.assertEqual(validate_config({'CHANNELS': channels}), [])
+        channels['one_more'] = {'campaigns': {}}
+        self.assertErrors({'CHANNELS': channels}, [f'CHANNELS: at most {MAX_CHANNELS} channels are supported'])
+
+    def test_max_years(self):
+        self.assertEqual(validate_config(with_value('YEARS', MAX_YEARS)), [])
+        self.assertErrors(with_value('YEARS', MAX_YEARS + 1), [f'YEARS: must be at most {MAX_YEARS}'])
+        self.assertErrors(
+            with_value('FIRST_YEAR', 9999 - MAX_YEARS + 1), [f'FIRST_YEAR: must be at most {9999 - MAX_YEARS}']
+        )
+
+    def test_max_campaigns(self):
+        path = 'CHANNELS.mail.campaigns.retention.nb'
+        self.assertEqual(validate_config(with_value(path, MAX_CAMPAIGNS)), [])
+        self.assertErrors(with_value(path, MAX_CAMPAIGNS + 1), [f'{path}: must be at most {MAX_CAMPAIGNS}'])
+        self.assertErrors(with_value(path, 2.5), [f'{path}: must be an integer'])
+
+    def test_cross_sell_sources(self):
+        path = 'CHANNELS.phone.campaigns.retention.cross_sell'
+        self.assertErrors(with_value(path, {'phone': 0.5, 'web': 0.5, 'mail': 2}), [
+            f'{path}.phone: must be another channel of CHANNELS',
+            f'{path}.web: must be another channel of CHANNELS',
+            f'{path}.mail: must be at most 1',
+        ])
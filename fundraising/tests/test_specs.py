@@ -0,0 +1,46 @@
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from ..generator import specs
+from ..generator.schema import MAX_PAYMENT_METHODS, ConfigError, validate_config
+from ..generator.specs import ALIAS_MIN_METHODS, payment_mix
+
+DRAWS = 400_000
+
+
+class PaymentMixTests(SimpleTestCase):
+    def _frequencies(self, mix, seed):
+        codes = mix.sample(np.random.default_rng(seed), DRAWS)
+        self.assertEqual(codes.dtype, np.int8)
+        return np.bincount(codes, minlength=len(mix.methods)) / DRAWS
+
+    def assertMatchesWeights(self, frequencies, weights):
+        expected = np.asarray(weights) / sum(weights)
+        # Five standard deviations of each method's share
+        tolerance = 5 * np.sqrt(expected * (1 - expected) / DRAWS)
+        np.testing.assert_array_less(np.abs(frequencies - expected), tolerance + 1e-12)
+
+    def test_alias_table_matches_cumulative_weights(self):
+        for count in (ALIAS_MIN_METHODS, 40, MAX_PAYMENT_METHODS):
+            with self.subTest(methods=count):
+                # Uneven weights, one of them zero
+                weights = [float(index % 7) + (index % 3) * 0.25 for index in range(count)]
+                mix = payment_mix({f'method_{index}': weight for index, weight in enumerate(weights)})
+                alias = self._frequencies(mix, seed=count)
+                with mock.patch.object(specs, 'ALIAS_MIN_METHODS', MAX_PAYMENT_METHODS + 1):
+                    cumulative = self._frequencies(mix, seed=count)
+                self.assertMatchesWeights(alias, weights)
+                self.assertMatchesWeights(cumulative, weights)
+                self.assertEqual(alias[0], 0)
+                self.assertEqual(cumulative[0], 0)
+
+    def test_method_count_is_capped(self):
+        payment = {f'method_{index}': 1 for index in range(MAX_PAYMENT_METHODS + 1)}
+        config = {'CHANNELS': {'mail': {'payment': payment, 'campaigns': {'prospecting': {'nb': 1}}}}}
+        with self.assertRaises(ConfigError) as raised:
+            validate_config(config)
+        self.assertEqual(raised.exception.errors, [
+            f'CHANNELS.mail.payment: at most {MAX_PAYMENT_METHODS} payment methods are supported'
+        ])
@@ -1,8 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views.configuration import ConfigurationViewSet
-from .views.download import DownloadDatasetView, DatasetStatusView
-from .views import GenerateDatasetView
+from .views.download import DownloadDatasetView, DatasetStatusView, DatasetCacheStatsView
+from .views.analytics import DatasetAnalyticsView
+from .views.metrics import MetricsView
+from .views import ExtendDatasetView, GenerateDatasetView
 
 router = DefaultRouter()
 router.register(r'configurations', ConfigurationViewSet, basename='configuration')
@@ -14,4 +16,8 @@ urlpatterns = [
     path('generate/', GenerateDatasetView.as_view(), name='generate_dataset'),
     path('datasets/<int:dataset_id>/download/', DownloadDatasetView.as_view(), name='download_dataset'),
     path('datasets/<int:dataset_id>/status/', DatasetStatusView.as_view(), name='dataset_status'),
+    path('datasets/<int:dataset_id>/analytics/', DatasetAnalyticsView.as_view(), name='dataset_analytics'),
+    path('datasets/<int:dataset_id>/extend/', ExtendDatasetView.as_view(), name='extend_dataset'),
+    path('datasets/cache/', DatasetCacheStatsView.as_view(), name='dataset_cache_stats'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
@@ -1 +1 @@
-from .generate_dataset import GenerateDatasetView
\ No newline at end of file
+from .generate_dataset import ExtendDatasetView, GenerateDatasetView
\ No newline at end of file
@@ -0,0 +1,31 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from ..models import GeneratedDataset
+
+class DatasetAnalyticsView(APIView):
+    """Aggregates of a completed dataset.
+
+    Revenue per channel and year, revenue, cost, ROI and response rate
+    per campaign (the retention rate for retention campaigns), and
+    transactions, revenue and distinct donors per payment method. They
+    are computed on the first request and cached on the dataset.
+    """
+
+    def get(self, request, dataset_id):
+        from ..analytics import dataset_analytics
+
+        dataset = (
+            GeneratedDataset.objects
+            .filter(id=dataset_id)
+            .only('id', 'status', 'manifest', 'analytics')
+            .first()
+        )
+        if dataset is None:
+            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if dataset.status != GeneratedDataset.STATUS_COMPLETED:
+            return Response({'error': 'Dataset is not available', 'status': dataset.status},
+                            status=status.HTTP_409_CONFLICT)
+
+        return Response({'dataset_id': dataset.id, **dataset_analytics(dataset)})
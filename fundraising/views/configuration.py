@@ -1,7 +1,34 @@
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+import yaml
+from ..generator.schema import ConfigError
+from ..jobs import assess_config, parse_config
 from ..models import DatasetConfiguration
-from ..serializers import DatasetConfigurationSerializer
+from ..serializers import ConfigEstimateSerializer, DatasetConfigurationSerializer
 
 class ConfigurationViewSet(viewsets.ModelViewSet):
     queryset = DatasetConfiguration.objects.all()
-    serializer_class = DatasetConfigurationSerializer
\ No newline at end of file
+    serializer_class = DatasetConfigurationSerializer
+
+    @action(detail=False, methods=['post'], serializer_class=ConfigEstimateSerializer)
+    def estimate(self, request):
+        """Validate a config and predict its size and runtime without generating it"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            config_data = parse_config(serializer.validated_data['config'])
+            warnings, estimate, rejected = assess_config(config_data)
+        except ConfigError as e:
+            return Response({'valid': False, 'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        except (yaml.YAMLError, ValueError) as e:
+            return Response({'valid': False, 'errors': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'valid': True,
+            'warnings': warnings,
+            'estimate': estimate,
+            'admitted': not rejected,
+            'budget_errors': rejected,
+        })
@@ -1,24 +1,182 @@
+from datetime import date
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from ..cache import cache_stats
 from ..models import GeneratedDataset
+from ..storage import TABLES, is_concatenable, iter_table_bytes, iter_table_frames, table_bytes
+from ..streaming import DOWNLOAD_FORMATS, ENCODERS, accepts_gzip, gunzip_stream, gzip_stream, parse_range
 
 class DownloadDatasetView(APIView):
+    """Stream a generated table.
+
+    Query parameters: table (transactions|contacts), format
+    (csv|ndjson|parquet, default csv), offset, limit, columns (comma
+    separated), date_from/date_to and min_amount/max_amount (inclusive
+    filters on date and donation_amount) and gzip=1. Gzip is also applied
+    when the client's Accept-Encoding accepts it (q > 0). Range requests are
+    honoured when the stored chunks are served unchanged.
+    """
+
+    # Query parameter pairs filtering a column, and how their values are parsed
+    FILTERS = {
+        'date': ('date_from', 'date_to', lambda value: date.fromisoformat(value).isoformat()),
+        'donation_amount': ('min_amount', 'max_amount', float),
+    }
+
+    def perform_content_negotiation(self, request, force=False):
+        # 'format' selects the file format here, not a DRF renderer.
+        return super().perform_content_negotiation(request, force=True)
+
     def get(self, request, dataset_id):
-        try:
-            dataset = GeneratedDataset.objects.get(id=dataset_id)
-            return Response(dataset.data)
-        except GeneratedDataset.DoesNotExist:
+        dataset = (
+            GeneratedDataset.objects
+            .filter(id=dataset_id)
+            .only('id', 'status', 'manifest')
+            .first()
+        )
+        if dataset is None:
             return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
 
+        if dataset.status != GeneratedDataset.STATUS_COMPLETED:
+            return Response({'error': 'Dataset is not available', 'status': dataset.status},
+                            status=status.HTTP_409_CONFLICT)
+
+        table = request.query_params.get('table', 'transactions')
+        table_manifest = dataset.manifest.get(table)
+        if table not in TABLES or table_manifest is None:
+            return Response({'error': f'Unknown table: {table}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        source_format = table_manifest['format']
+        output_format = request.query_params.get('format', 'csv')
+        if output_format not in DOWNLOAD_FORMATS:
+            return Response({'error': f'Unknown format: {output_format}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            offset = int(request.query_params.get('offset', 0))
+            limit = request.query_params.get('limit')
+            limit = int(limit) if limit is not None else None
+        except ValueError:
+            return Response({'error': 'offset and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if offset < 0 or (limit is not None and limit < 0):
+            return Response({'error': 'offset and limit must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+        columns = request.query_params.get('columns')
+        columns = [column for column in columns.split(',') if column] if columns else None
+        if columns:
+            unknown = sorted(set(columns) - set(table_manifest['columns']))
+            if unknown:
+                return Response({'error': f"Unknown columns: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            filters = self._filters(request, table_manifest)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Range requests get the stored bytes, so only compress them on demand
+        compress = request.query_params.get('gzip') in ('1', 'true') or (
+            accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING')) and 'HTTP_RANGE' not in request.META
+        )
+        content_type, extension = DOWNLOAD_FORMATS[output_format]
+        filename = f'{dataset.id}_{table}{extension}'
+        passthrough = (
+            output_format == source_format.replace('csv.gz', 'csv')
+            and is_concatenable(table_manifest)
+            and offset == 0 and limit is None and not columns and not filters
+        )
+
+        if passthrough and source_format == 'csv.gz':
+            # The stored bytes are already gzip: send them as-is or inflate
+            blocks = iter_table_bytes(table_manifest)
+            if not compress:
+                blocks = gunzip_stream(blocks)
+        elif passthrough and not compress:
+            return self._ranged_response(request, table_manifest, content_type, filename)
+        elif passthrough:
+            blocks = gzip_stream(iter_table_bytes(table_manifest))
+        else:
+            frames = iter_table_frames(table_manifest, columns=columns, offset=offset, limit=limit, filters=filters)
+            blocks = ENCODERS[output_format](frames)
+            if compress:
+                blocks = gzip_stream(blocks)
+
+        response = StreamingHttpResponse(blocks, content_type=content_type)
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Vary'] = 'Accept-Encoding'
+        return response
+
+    def _filters(self, request, table_manifest):
+        filters = {}
+        for column, (low_param, high_param, parse) in self.FILTERS.items():
+            low, high = request.query_params.get(low_param), request.query_params.get(high_param)
+            if low is None and high is None:
+                continue
+            if column not in table_manifest['columns']:
+                raise ValueError(f'{low_param} and {high_param} need a {column} column')
+            try:
+                filters[column] = (parse(low) if low is not None else None, parse(high) if high is not None else None)
+            except ValueError:
+                raise ValueError(f'Invalid {low_param} or {high_param}')
+        return filters
+
+    def _ranged_response(self, request, table_manifest, content_type, filename):
+        size = table_bytes(table_manifest)
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range is None:
+            response = StreamingHttpResponse(iter_table_bytes(table_manifest), content_type=content_type)
+            response['Content-Length'] = str(size)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(iter_table_bytes(table_manifest, start, end), content_type=content_type,
+                                             status=status.HTTP_206_PARTIAL_CONTENT)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
 class DatasetStatusView(APIView):
+    STATUS_FIELDS = (
+        'id', 'status', 'progress', 'error_message', 'transactions_rows', 'contacts_rows',
+        'size_bytes', 'sql_tables', 'metrics', 'created_at', 'started_at', 'finished_at',
+    )
+
     def get(self, request, dataset_id):
-        try:
-            dataset = GeneratedDataset.objects.get(id=dataset_id)
-            return Response({'status': 'completed' if dataset.data else 'processing'})
-        except GeneratedDataset.DoesNotExist:
+        # Narrow query: the manifest is never loaded for a status poll
+        dataset = GeneratedDataset.objects.filter(id=dataset_id).values(*self.STATUS_FIELDS).first()
+        if dataset is None:
             return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
 
-class GenerateDatasetView(APIView):
-    def post(self, request):
-        return Response({'status': 'success'}, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        response = {
+            'dataset_id': dataset['id'],
+            'status': dataset['status'],
+            'progress': dataset['progress'],
+            'created_at': dataset['created_at'],
+            'started_at': dataset['started_at'],
+            'finished_at': dataset['finished_at'],
+        }
+        if dataset['status'] == GeneratedDataset.STATUS_COMPLETED:
+            response.update({
+                'transactions_rows': dataset['transactions_rows'],
+                'contacts_rows': dataset['contacts_rows'],
+                'size_bytes': dataset['size_bytes'],
+                'sql_tables': dataset['sql_tables'],
+                'metrics': dataset['metrics'],
+            })
+        if dataset['status'] == GeneratedDataset.STATUS_FAILED:
+            response['error'] = dataset['error_message']
+            response['metrics'] = dataset['metrics']
+        return Response(response)
+
+class DatasetCacheStatsView(APIView):
+    def get(self, request):
+        return Response(cache_stats())
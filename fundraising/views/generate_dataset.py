@@ -1,10 +1,191 @@
-from rest_framework.views import APIView
+from django.conf import settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
+import json
+import logging
+import yaml
+from .. import cache
+from ..cache import config_fingerprint
+from ..generator.instrumentation import StageTimer
+from ..generator.schema import ConfigError
+from ..jobs import assess_config, enqueue_generation, extension_config, parse_config
+from ..metrics import record_request
+from ..models import DatasetConfiguration, GeneratedDataset
+from ..scheduler import submission_retry_after
+from ..serializers import ConfigPreviewSerializer, DatasetConfigurationSerializer
+
+logger = logging.getLogger(__name__)
 
 class GenerateDatasetView(APIView):
-    def post(self, request):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        timer = StageTimer(stages=())
+        if request.data.get('preview') in (True, 'true', '1'):
+            return self._preview(request, timer)
+        with timer.stage('validate'):
+            serializer = DatasetConfigurationSerializer(data=request.data)
+            valid = serializer.is_valid()
+
+        if not valid:
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Reject unparsable YAML before anything is queued
+            with timer.stage('parse_config'):
+                config_data = parse_config(serializer.validated_data['config'])
+        except (yaml.YAMLError, ValueError) as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return self._submit(request, timer, config_data, lambda: serializer.save(created_by=request.user))
+
+    def _preview(self, request, timer):
+        """Generate a scaled-down sample of a config and return its summary inline"""
+        from ..generator.preview import PREVIEW_ROWS, run_preview
+
+        serializer = ConfigPreviewSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with timer.stage('validate_config'):
+                config_data = parse_config(serializer.validated_data['config'])
+                warnings, _, _ = assess_config(config_data)
+        except ConfigError as e:
+            return Response({
+                'status': 'error',
+                'message': 'Invalid configuration',
+                'errors': e.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except (yaml.YAMLError, ValueError) as e:
+            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with timer.stage('preview'):
+                summary = run_preview(
+                    config_data, serializer.validated_data.get('rows', PREVIEW_ROWS),
+                    max_campaigns=settings.PREVIEW_MAX_CAMPAIGNS,
+                )
+        except ValueError as e:
+            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        logger.info('dataset_preview %s', json.dumps({
+            'rows': summary['transactions'],
+            'fraction': summary['fraction'],
+            'stages': timer.as_dict(),
+        }, separators=(',', ':')))
+        return Response({'status': 'preview', 'warnings': warnings, 'preview': summary})
+
+    def _submit(self, request, timer, config_data, save_configuration, parent=None, resumed_years=0):
+        """Validate, look up the cache, apply the budget and the user quota and queue a job.
+
+        An extension of a parent dataset of resumed_years is charged for
+        its additional years only.
+        """
         try:
-            # Logique de génération de données à implémenter
-            return Response({'message': 'Dataset generated successfully'})
-        except Exception as e:
-            return Response({'error': str(e)}, status=400)
\ No newline at end of file
+            with timer.stage('validate_config'):
+                warnings, estimate, rejected = assess_config(config_data, resumed_years=resumed_years)
+        except ConfigError as e:
+            return Response({
+                'status': 'error',
+                'message': 'Invalid configuration',
+                'errors': e.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        with timer.stage('fingerprint'):
+            fingerprint = config_fingerprint(config_data)
+        if request.data.get('use_cache', True) not in (False, 'false', '0'):
+            with timer.stage('cache_lookup'):
+                dataset = cache.lookup(fingerprint, request.user, save_configuration)
+            if dataset is not None:
+                self._log_request(timer, dataset, cached=True)
+                return self._job_response(dataset, cached=True)
+
+        # Cached datasets cost nothing, so the budget only applies to new jobs
+        if rejected:
+            return Response({
+                'status': 'error',
+                'message': 'Configuration exceeds the generation budget',
+                'errors': rejected,
+                'estimate': estimate
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        with timer.stage('quota'):
+            retry_after = submission_retry_after(request.user)
+        if retry_after is not None:
+            response = Response({
+                'status': 'error',
+                'message': f'You already have {settings.GENERATION_USER_MAX_PENDING} generation jobs pending',
+                'retry_after': retry_after
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            response['Retry-After'] = str(retry_after)
+            return response
+
+        with timer.stage('enqueue'):
+            config = save_configuration()
+            dataset = enqueue_generation(config, config_hash=fingerprint, parent=parent, metrics={
+                'request': timer.as_dict(),
+                'estimate': estimate,
+                'warnings': warnings,
+            })
+
+        self._log_request(timer, dataset, cached=False)
+        return self._job_response(dataset, cached=False, estimate=estimate, warnings=warnings)
+
+    def _log_request(self, timer, dataset, cached):
+        record_request(timer.as_dict())
+        logger.info('dataset_request %s', json.dumps({
+            'dataset_id': dataset.id,
+            'cached': cached,
+            'stages': timer.as_dict(),
+        }, separators=(',', ':')))
+
+    def _job_response(self, dataset, cached, **extra):
+        completed = dataset.status == GeneratedDataset.STATUS_COMPLETED
+        return Response({
+            'status': dataset.status,
+            'dataset_id': dataset.id,
+            'cached': cached,
+            'status_url': reverse('fundraising:dataset_status', args=[dataset.id]),
+            **extra
+        }, status=status.HTTP_200_OK if completed else status.HTTP_202_ACCEPTED)
+
+class ExtendDatasetView(GenerateDatasetView):
+    """Queue a job appending more years to a completed dataset.
+
+    The new dataset resumes from the parent's snapshot and holds the same
+    rows as a full run of the parent's config with YEARS increased.
+    """
+
+    def post(self, request, dataset_id):
+        timer = StageTimer(stages=())
+        parent = GeneratedDataset.objects.select_related('configuration').filter(id=dataset_id).first()
+        if parent is None:
+            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+        if parent.status != GeneratedDataset.STATUS_COMPLETED:
+            return Response({'error': 'Only completed datasets can be extended', 'status': parent.status},
+                            status=status.HTTP_409_CONFLICT)
+
+        try:
+            years = int(request.data.get('years', 1))
+        except (TypeError, ValueError):
+            years = 0
+        if years < 1:
+            return Response({'error': 'years must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with timer.stage('parse_config'):
+                config_data = extension_config(parent, years)
+        except (yaml.YAMLError, ValueError) as e:
+            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        return self._submit(request, timer, config_data, lambda: DatasetConfiguration.objects.create(
+            name=parent.configuration.name,
+            config=config_data,
+            created_by=request.user,
+        ), parent=parent, resumed_years=config_data['YEARS'] - years)
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.views import APIView
+from ..metrics import render_metrics
+
+class MetricsView(APIView):
+    """Prometheus scrape endpoint.
+
+    Anonymous scrapes are allowed when METRICS_PUBLIC is set, since
+    Prometheus cannot refresh JWT access tokens.
+    """
+
+    def get_permissions(self):
+        if settings.METRICS_PUBLIC:
+            return [AllowAny()]
+        return [IsAuthenticated()]
+
+    def get(self, request):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
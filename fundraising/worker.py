@@ -0,0 +1,15 @@
+"""Entry points for generation worker processes.
+
+Kept free of model imports so that spawned children can unpickle them
+before Django is set up.
+"""
+
+
+def init_process():
+    import django
+    django.setup()
+
+
+def execute_job(dataset_id):
+    from .jobs import run_job
+    return run_job(dataset_id)